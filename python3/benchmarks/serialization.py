@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+"""
+Throughput and memory benchmarks for elevated_objects serialization.
+
+Builds synthetic object graphs from the example Person/Address classes and a
+generated Team class, then measures serialize, deserialize, to_json and
+from_json. Results are written as JSON so that runs can be compared, and a
+previous result file can be given with --baseline to fail on regressions.
+
+Usage:
+    python3 benchmarks/serialization.py --breadth 50 --depth 3 --shared 0.5
+    python3 benchmarks/serialization.py --output new.json --baseline old.json
+"""
+
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevated_objects import Visitor, Builder, serialize, deserialize
+from elevated_objects.json import to_json, from_json
+from elevated_objects.examples import Address, Person, AddressBuilder, PersonBuilder
+
+# Benchmarks whose ops/sec may drop by this fraction before --baseline fails
+DEFAULT_TOLERANCE = 0.10
+
+class Team:
+    """Generated container class that nests teams to give graphs depth."""
+
+    # visit() makes the same calls for every instance, so codecs may use a compiled plan
+    compiled_plan = True
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.members: List[Person] = []
+        self.subteams: List[Team] = []
+        self.roster: Dict[str, Person] = {}
+
+    def visit(self, visitor: Visitor, identity_only: bool = False) -> None:
+        visitor.begin(self)
+        visitor.primitive(str, self, "name")
+        if not identity_only:
+            visitor.property(list, self, "members", PersonBuilder)
+            visitor.property(list, self, "subteams", TeamBuilder)
+            visitor.property(dict, self, "roster", PersonBuilder, key_type=str)
+        visitor.end(self)
+
+    def get_class_spec(self) -> str:
+        return "benchmarks.Team"
+
+
+@Builder.register("benchmarks.Team")
+class TeamBuilder(Builder[Team]):
+    """Builder for Team objects."""
+
+    def _create_default_instance(self) -> Team:
+        return Team()
+
+    def with_name(self, name: str) -> 'TeamBuilder':
+        self._instance.name = name
+        return self
+
+    def add_member(self, member: Person) -> 'TeamBuilder':
+        self._instance.members.append(member)
+        self._instance.roster[member.name] = member
+        return self
+
+    def add_subteam(self, subteam: Team) -> 'TeamBuilder':
+        self._instance.subteams.append(subteam)
+        return self
+
+
+class GraphSpec:
+    """Shape of a synthetic object graph."""
+
+    def __init__(self, breadth: int, depth: int, shared: float, list_size: int, seed: int):
+        """
+        Args:
+            breadth: Members and subteams per team
+            depth: Levels of nested teams below the root
+            shared: Fraction (0..1) of members and addresses that reuse an existing object
+            list_size: Contacts and metadata entries per person
+            seed: Random seed, so that the same spec always builds the same graph
+        """
+        self.breadth = breadth
+        self.depth = depth
+        self.shared = shared
+        self.list_size = list_size
+        self.seed = seed
+
+    def to_json(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+def build_graph(spec: GraphSpec) -> Tuple[Team, int]:
+    """
+    Build a synthetic team hierarchy.
+
+    Args:
+        spec: The shape of the graph
+
+    Returns:
+        The root team and the number of distinct objects in the graph
+    """
+    rng = random.Random(spec.seed)
+    people: List[Person] = []
+    addresses: List[Address] = []
+    count = 0
+
+    def make_person() -> Person:
+        nonlocal count
+        if people and rng.random() < spec.shared:
+            return rng.choice(people)
+        if addresses and rng.random() < spec.shared:
+            address = rng.choice(addresses)
+        else:
+            address = AddressBuilder()\
+                .with_street(f"{len(addresses)} Main St")\
+                .with_city(rng.choice(["Anytown", "Springfield", "Riverside"]))\
+                .with_postal_code(f"{rng.randrange(100000):05d}")\
+                .done()
+            addresses.append(address)
+            count += 1
+        builder = PersonBuilder()\
+            .with_name(f"Person {len(people)}")\
+            .with_age(rng.randrange(100))\
+            .with_address(address)
+        for index in range(spec.list_size):
+            builder.add_contact(f"person{len(people)}.{index}@example.com")
+            builder.with_metadata(f"key{index}", rng.random())
+        person = builder.done()
+        people.append(person)
+        count += 1
+        return person
+
+    def make_team(name: str, level: int) -> Team:
+        nonlocal count
+        builder = TeamBuilder().with_name(name)
+        for _ in range(spec.breadth):
+            builder.add_member(make_person())
+        if level < spec.depth:
+            for index in range(spec.breadth):
+                builder.add_subteam(make_team(f"{name}.{index}", level + 1))
+        count += 1
+        return builder.done()
+
+    return make_team("root", 0), count
+
+
+def measure(operation: Callable[[], Any], min_time: float, repeat: int) -> Dict[str, Any]:
+    """
+    Time an operation and measure the memory it allocates.
+
+    The operation is run in batches until each batch takes at least min_time
+    seconds; the fastest of `repeat` batches is reported.
+
+    Args:
+        operation: The operation to measure
+        min_time: Minimum duration of a timed batch, in seconds
+        repeat: Number of timed batches
+
+    Returns:
+        ops_per_sec, seconds_per_op and peak_alloc_bytes for the operation
+    """
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    peak_alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        best = min(best, (time.perf_counter() - start) / loops)
+
+    return {
+        'ops_per_sec': 1.0 / best if best > 0 else float('inf'),
+        'seconds_per_op': best,
+        'peak_alloc_bytes': peak_alloc
+    }
+
+
+def peak_rss_bytes() -> int:
+    """
+    Get the peak resident set size of this process.
+
+    Returns:
+        The peak RSS in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run(spec: GraphSpec, min_time: float, repeat: int) -> Dict[str, Any]:
+    """
+    Run every benchmark on one graph.
+
+    Args:
+        spec: The shape of the graph
+        min_time: Minimum duration of a timed batch, in seconds
+        repeat: Number of timed batches per benchmark
+
+    Returns:
+        The results, keyed by benchmark name
+    """
+    root, object_count = build_graph(spec)
+    json_str = serialize(root)
+    json_data = to_json(root)
+
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        'serialize': lambda: serialize(root),
+        'deserialize': lambda: deserialize(json_str),
+        'to_json': lambda: to_json(root),
+        'from_json': lambda: from_json(json_data)
+    }
+    results: Dict[str, Any] = {}
+    for name, operation in benchmarks.items():
+        result = measure(operation, min_time, repeat)
+        result['objects_per_sec'] = result['ops_per_sec'] * object_count
+        results[name] = result
+
+    return {
+        'graph': spec.to_json(),
+        'objects': object_count,
+        'bytes': len(json_str.encode('utf-8')),
+        'bytes_per_object': len(json_str.encode('utf-8')) / object_count,
+        'benchmarks': results,
+        'peak_rss_bytes': peak_rss_bytes()
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Find benchmarks that regressed relative to a baseline run.
+
+    Args:
+        current: The results of this run
+        baseline: The results of the baseline run
+        tolerance: The fraction by which ops/sec may drop, or bytes/object may grow
+
+    Returns:
+        A description of every regression
+    """
+    regressions: List[str] = []
+    for name, result in current['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before is None:
+            continue
+        if result['ops_per_sec'] < before['ops_per_sec'] * (1.0 - tolerance):
+            regressions.append(
+                f"{name}: {result['ops_per_sec']:.1f} ops/sec, baseline {before['ops_per_sec']:.1f}"
+            )
+    before_size = baseline.get('bytes_per_object')
+    if before_size is not None and current['bytes_per_object'] > before_size * (1.0 + tolerance):
+        regressions.append(
+            f"bytes_per_object: {current['bytes_per_object']:.1f}, baseline {before_size:.1f}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--breadth', type=int, default=10, help='members and subteams per team')
+    parser.add_argument('--depth', type=int, default=2, help='levels of nested teams')
+    parser.add_argument('--shared', type=float, default=0.2, help='fraction of shared references')
+    parser.add_argument('--list-size', type=int, default=3, help='contacts and metadata entries per person')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the graph')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timed batch')
+    parser.add_argument('--repeat', type=int, default=3, help='timed batches per benchmark')
+    parser.add_argument('--output', help='write results to this file instead of stdout')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed fractional regression against the baseline')
+    args = parser.parse_args(argv)
+
+    spec = GraphSpec(args.breadth, args.depth, args.shared, args.list_size, args.seed)
+    results = run(spec, args.min_time, args.repeat)
+    results['python'] = platform.python_version()
+    results['platform'] = platform.platform()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            stream.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -19,10 +19,13 @@ The core components are:
 from .serializable import Serializable, Visitor
 from .builder import Builder
 from .registry import Registry
+from .json import serialize, deserialize
 
 __all__ = [
     'Serializable',
     'Visitor',
     'Builder',
-    'Registry'
+    'Registry',
+    'serialize',
+    'deserialize'
 ]
\ No newline at end of file
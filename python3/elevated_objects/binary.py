@@ -0,0 +1,878 @@
+#!/usr/bin/env python3
+
+"""
+Compact binary encoding for Serializable objects.
+
+The format is a tagged, MessagePack-style encoding and a peer of the JSON
+encoding in json.py: it is produced and consumed through the same Visitor
+protocol and preserves the same class/identity/reference semantics. Class
+specs and property names are written once per document and referred to by
+index afterwards, and primitives (including bytes and sets) are encoded
+natively rather than as JSON text.
+"""
+
+from __future__ import annotations
+import struct
+from typing import Dict, List, Any, Set, Optional, Type, TypeVar, Union, Callable, Tuple
+
+from .serializable import Serializable, Visitor
+from .registry import Registry
+from .builder import Builder
+from .plans import ClassPlan, PlanCache
+from .identity import IdentityCache, scoped
+from .interning import InternPool
+
+T = TypeVar('T', bound=Serializable)
+
+# Leading bytes of every document; the last byte is the format version
+MAGIC = b'EOB\x01'
+
+# Value tags. Tags 0x80-0xFF encode the integers 0-127 directly.
+NONE = 0x00
+FALSE = 0x01
+TRUE = 0x02
+INT8 = 0x03
+INT16 = 0x04
+INT32 = 0x05
+INT64 = 0x06
+BIGINT = 0x07
+FLOAT = 0x08
+STR = 0x09
+BYTES = 0x0A
+LIST = 0x0B
+DICT = 0x0C
+SET = 0x0D
+OBJECT = 0x0E
+OBJECT_REF = 0x0F
+VERBATIM = 0x10
+END = 0x11
+NAME = 0x12
+NAME_REF = 0x13
+FIXINT = 0x80
+
+_INT8 = struct.Struct('<b')
+_INT16 = struct.Struct('<h')
+_INT32 = struct.Struct('<i')
+_INT64 = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+
+class _Frame:
+    """
+    Output state of one object being written by a BinaryWriter.
+    """
+
+    def __init__(self, class_spec: str, object_id: Any, is_ref: bool):
+        self.class_spec = class_spec
+        self.object_id = object_id
+        self.is_ref = is_ref
+        self.opened = False
+        self.verbatim = False
+
+
+class BinaryWriter(Visitor[T]):
+    """
+    Visitor that serializes Serializable objects to the compact binary format.
+
+    Like JsonWriter, the BinaryWriter records every object with an ID in a
+    reference table and writes later occurrences as references. Class specs
+    and property names are interned in a per-document name table.
+    """
+
+    def __init__(self, refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None):
+        """
+        Initialize the binary writer.
+
+        Args:
+            refs: Optional dictionary to track serialized objects by class and id
+        """
+        self.out = bytearray()
+        self.refs = refs if refs is not None else {}
+        self.names: Dict[str, int] = {}
+        self._frames: List[_Frame] = []
+
+    def begin(self, obj: T, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object; its header is written once its first property is.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        class_spec = obj.get_class_spec()
+        by_id = self.refs.setdefault(class_spec, {})
+
+        object_id = IdentityCache.get_id(obj)
+        if object_id:
+            is_ref = object_id in by_id
+            if not is_ref:
+                by_id[object_id] = obj
+        else:
+            object_id = None
+            is_ref = False
+        self._frames.append(_Frame(class_spec, object_id, is_ref))
+
+    def end(self, obj: T) -> None:
+        """
+        End visiting an object and terminate its encoding.
+
+        Args:
+            obj: The object being visited
+        """
+        frame = self._frames.pop()
+        if frame.is_ref:
+            self.out.append(OBJECT_REF)
+            self._write_name(frame.class_spec)
+            self._write_value(frame.object_id)
+        elif not frame.verbatim:
+            if not frame.opened:
+                self._open(frame)
+            self.out.append(END)
+
+    def owner(self, target: T, owner_prop_name: str) -> None:
+        """
+        Visit the owner relationship.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Write a verbatim value in place of the object's properties.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+
+        Raises:
+            ValueError: If other properties of the object have already been written
+        """
+        frame = self._frames[-1]
+        if frame.is_ref:
+            return
+        if frame.opened:
+            raise ValueError("verbatim() must be visited before any other property")
+
+        frame.verbatim = True
+        self.out.append(VERBATIM)
+        self._write_name(frame.class_spec)
+        self._write_value(get_value(target))
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Write a primitive property (int, float, str, bytes, set, etc.).
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        frame = self._frames[-1]
+        if frame.is_ref:
+            return
+
+        value = getattr(target, prop_name, None)
+        if value is not None:
+            if not frame.opened:
+                self._open(frame)
+            self._write_name(prop_name)
+            self._write_value(value)
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[Type[Builder]] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Write a complex property (object, list, dictionary, etc.).
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        frame = self._frames[-1]
+        if frame.is_ref:
+            return
+
+        if not frame.opened:
+            self._open(frame)
+        self._write_name(prop_name)
+        self._write_value(getattr(target, prop_name, None))
+
+    def write(self, obj: Any) -> bytes:
+        """
+        Encode a value, including the document header.
+
+        Args:
+            obj: A Serializable object or any natively encodable value
+
+        Returns:
+            The encoded document
+        """
+        self.out += MAGIC
+        self._write_value(obj)
+        return bytes(self.out)
+
+    def _open(self, frame: _Frame) -> None:
+        """
+        Write the header of an object that has at least one property.
+
+        Args:
+            frame: The object's output state
+        """
+        frame.opened = True
+        self.out.append(OBJECT)
+        self._write_name(frame.class_spec)
+        self._write_value(frame.object_id)
+
+    def _write_object(self, obj: Serializable) -> None:
+        """
+        Encode a Serializable object, using its compiled plan when available.
+
+        Args:
+            obj: The object to encode
+        """
+        plan = PlanCache.get(obj)
+        if plan is None:
+            obj.visit(self)
+        else:
+            self.begin(obj)
+            if not self._frames[-1].is_ref:
+                plan.compile('binary.encode', _compile_encoder)(self, obj)
+            self.end(obj)
+
+    def _write_name(self, name: str) -> None:
+        """
+        Encode an interned name: inline the first time, by index afterwards.
+
+        Args:
+            name: A class spec or property name
+        """
+        out = self.out
+        index = self.names.get(name)
+        if index is None:
+            self.names[name] = len(self.names)
+            encoded = name.encode('utf-8')
+            out.append(NAME)
+            _write_length(out, len(encoded))
+            out += encoded
+        else:
+            out.append(NAME_REF)
+            _write_length(out, index)
+
+    def _write_value(self, value: Any) -> None:
+        """
+        Encode any supported value.
+
+        Args:
+            value: The value to encode
+        """
+        out = self.out
+        value_type = type(value)
+        if value is None:
+            out.append(NONE)
+        elif value_type is bool:
+            out.append(TRUE if value else FALSE)
+        elif value_type is int:
+            _write_int(out, value)
+        elif value_type is float:
+            out.append(FLOAT)
+            out += _FLOAT.pack(value)
+        elif value_type is str:
+            encoded = value.encode('utf-8')
+            out.append(STR)
+            _write_length(out, len(encoded))
+            out += encoded
+        elif isinstance(value, (list, tuple)):
+            out.append(LIST)
+            _write_length(out, len(value))
+            for item in value:
+                self._write_value(item)
+        elif isinstance(value, dict):
+            out.append(DICT)
+            _write_length(out, len(value))
+            for key, item in value.items():
+                self._write_value(key)
+                self._write_value(item)
+        elif isinstance(value, (set, frozenset)):
+            out.append(SET)
+            _write_length(out, len(value))
+            for item in value:
+                self._write_value(item)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            out.append(BYTES)
+            _write_length(out, len(value))
+            out += value
+        elif Registry.is_serializable(value):
+            self._write_object(value)
+        elif isinstance(value, int):
+            _write_int(out, int(value))
+        elif isinstance(value, float):
+            out.append(FLOAT)
+            out += _FLOAT.pack(value)
+        else:
+            # For other types, encode the string representation like to_json() does
+            self._write_value(str(value))
+
+
+class BinaryReader(Visitor[T]):
+    """
+    Visitor that populates a Serializable object from its decoded binary properties.
+
+    The BinaryReader is created by the decoder once all properties of an
+    object have been decoded; nested objects are already built by then.
+    """
+
+    # Assigns the properties of the objects it visits (see Builder.visit)
+    populates = True
+
+    def __init__(self, fields: Dict[str, Any], verbatim_value: Any = None):
+        """
+        Initialize the reader with the decoded properties of one object.
+
+        Args:
+            fields: The decoded property values by property name
+            verbatim_value: The decoded verbatim value, for objects written with verbatim()
+        """
+        self.fields = fields
+        self.verbatim_value = verbatim_value
+
+    def begin(self, obj: T, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        pass
+
+    def end(self, obj: T) -> None:
+        """
+        End visiting an object.
+
+        Args:
+            obj: The object being visited
+        """
+        pass
+
+    def owner(self, target: T, owner_prop_name: str) -> None:
+        """
+        Visit the owner relationship.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Read a verbatim value with custom getter/setter.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+        """
+        set_value(target, self.verbatim_value)
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Read a primitive property.
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        if prop_name not in self.fields:
+            return
+
+        value = self.fields[prop_name]
+        if from_string is not None and isinstance(value, str):
+            try:
+                value = from_string(value)
+            except Exception:
+                pass
+        setattr(target, prop_name, value)
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[Type[Builder]] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Read a complex property.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        if prop_name in self.fields:
+            value = self.fields[prop_name]
+            if prop_type is frozenset and type(value) is set:
+                value = frozenset(value)
+            setattr(target, prop_name, value)
+
+
+class _Decoder:
+    """
+    Decoder for one binary document, holding its name table and reference table.
+    """
+
+    def __init__(self, data: bytes, refs: Dict[str, Dict[Union[str, int], Serializable]]):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.names: List[str] = []
+        self.refs = refs
+
+    def read_value(self) -> Any:
+        """
+        Decode the value at the current position.
+
+        Returns:
+            The decoded value
+
+        Raises:
+            ValueError: If the data is malformed
+        """
+        data = self.data
+        tag = data[self.pos]
+        self.pos += 1
+        if tag >= FIXINT:
+            return tag - FIXINT
+        elif tag == NONE:
+            return None
+        elif tag == FALSE:
+            return False
+        elif tag == TRUE:
+            return True
+        elif tag == STR:
+            return str(self._read_span(), 'utf-8')
+        elif tag == INT8:
+            return self._unpack(_INT8)
+        elif tag == INT16:
+            return self._unpack(_INT16)
+        elif tag == INT32:
+            return self._unpack(_INT32)
+        elif tag == INT64:
+            return self._unpack(_INT64)
+        elif tag == BIGINT:
+            return int.from_bytes(self._read_span(), 'little', signed=True)
+        elif tag == FLOAT:
+            return self._unpack(_FLOAT)
+        elif tag == BYTES:
+            return bytes(self._read_span())
+        elif tag == LIST:
+            return [self.read_value() for _ in range(self._read_length())]
+        elif tag == DICT:
+            result = {}
+            for _ in range(self._read_length()):
+                key = self._read_key()
+                result[key] = self.read_value()
+            return result
+        elif tag == SET:
+            return {self._read_key() for _ in range(self._read_length())}
+        elif tag == OBJECT:
+            return self._read_object()
+        elif tag == OBJECT_REF:
+            return self._read_object_ref()
+        elif tag == VERBATIM:
+            return self._read_verbatim()
+        raise ValueError(f"Invalid binary tag 0x{tag:02x} at offset {self.pos - 1}")
+
+    def _read_key(self) -> Any:
+        """
+        Decode a dictionary key or set element.
+
+        Tuples and frozensets are encoded as lists and sets, which are rebuilt
+        here since a key must be hashable.
+
+        Returns:
+            The decoded key
+        """
+        return _freeze(self.read_value())
+
+    def _read_object(self) -> Any:
+        """
+        Decode an object whose OBJECT tag has been consumed.
+
+        Returns:
+            The built object, the previously built object with the same ID, or a
+            dict of its properties if no builder is registered for its class
+        """
+        class_spec = self._read_name()
+        object_id = self.read_value()
+        by_id = self.refs.setdefault(class_spec, {})
+
+        builder = None
+        obj = None
+        if object_id is not None:
+            if object_id in by_id:
+                obj = by_id[object_id]
+            elif InternPool.active:
+                obj = InternPool.lookup(class_spec, object_id)
+                if obj is not None:
+                    # An interned instance that an earlier call already read
+                    by_id[object_id] = obj
+        if obj is None:
+            factory = Registry.get_factory(class_spec)
+            if factory is not None:
+                builder = factory()
+                if object_id is not None:
+                    by_id[object_id] = builder.done()
+
+        fields: Dict[str, Any] = {}
+        while self.data[self.pos] != END:
+            prop_name = self._read_name()
+            fields[prop_name] = self.read_value()
+        self.pos += 1
+
+        if obj is not None:
+            return obj
+        if builder is None:
+            fields['__class__'] = class_spec
+            return fields
+        return self._populate(builder, BinaryReader(fields))
+
+    def _read_object_ref(self) -> Any:
+        """
+        Decode a reference whose OBJECT_REF tag has been consumed.
+
+        Returns:
+            The referenced object, or an unpopulated placeholder if it has not been read yet
+        """
+        class_spec = self._read_name()
+        object_id = self.read_value()
+        by_id = self.refs.setdefault(class_spec, {})
+        if object_id in by_id:
+            return by_id[object_id]
+        pooled = InternPool.lookup(class_spec, object_id) if InternPool.active else None
+        if pooled is not None:
+            by_id[object_id] = pooled
+            return pooled
+        factory = Registry.get_factory(class_spec)
+        if factory is None:
+            return None
+        obj = factory().done()
+        by_id[object_id] = obj
+        return obj
+
+    def _read_verbatim(self) -> Any:
+        """
+        Decode a verbatim object whose VERBATIM tag has been consumed.
+
+        Returns:
+            The built object, or the verbatim value if no builder is registered for its class
+        """
+        class_spec = self._read_name()
+        value = self.read_value()
+        factory = Registry.get_factory(class_spec)
+        if factory is None:
+            return value
+        return self._populate(factory(), BinaryReader({}, value))
+
+    def _populate(self, builder: Builder, reader: BinaryReader) -> Any:
+        """
+        Populate a builder's instance from decoded properties.
+
+        Args:
+            builder: The builder of the object
+            reader: A reader holding the decoded properties
+
+        Returns:
+            The built object, or the interned instance equal to it (see InternPool)
+        """
+        obj = builder.done()
+        plan = PlanCache.get(obj)
+        if plan is None:
+            builder.visit(reader)
+        else:
+            plan.compile('binary.decode', _compile_decoder)(reader, obj)
+        obj = builder.done()
+        return InternPool.intern(obj) if InternPool.active else obj
+
+    def _read_name(self) -> str:
+        """
+        Decode an interned name.
+
+        Returns:
+            The name
+
+        Raises:
+            ValueError: If no name is encoded at the current position
+        """
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == NAME_REF:
+            return self.names[self._read_length()]
+        if tag != NAME:
+            raise ValueError(f"Expected a name at offset {self.pos - 1}")
+        name = str(self._read_span(), 'utf-8')
+        self.names.append(name)
+        return name
+
+    def _read_length(self) -> int:
+        """
+        Decode an unsigned varint.
+
+        Returns:
+            The decoded integer
+        """
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def _read_span(self) -> memoryview:
+        """
+        Decode a length-prefixed run of bytes.
+
+        Returns:
+            A view of the bytes
+
+        Raises:
+            IndexError: If the run extends past the end of the data
+        """
+        length = self._read_length()
+        start = self.pos
+        self.pos += length
+        if self.pos > len(self.data):
+            raise IndexError("binary span out of range")
+        return self.data[start:self.pos]
+
+    def _unpack(self, packer: struct.Struct) -> Any:
+        """
+        Decode a fixed-size value.
+
+        Args:
+            packer: The struct describing the value
+
+        Returns:
+            The decoded value
+        """
+        value = packer.unpack_from(self.data, self.pos)[0]
+        self.pos += packer.size
+        return value
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Convert decoded lists and sets to tuples and frozensets, recursively.
+
+    Args:
+        value: A decoded value
+
+    Returns:
+        The hashable equivalent of the value
+    """
+    value_type = type(value)
+    if value_type is list:
+        return tuple(_freeze(item) for item in value)
+    if value_type is set:
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def _write_length(out: bytearray, length: int) -> None:
+    """
+    Encode an unsigned varint.
+
+    Args:
+        out: The output buffer
+        length: The non-negative integer to encode
+    """
+    while length >= 0x80:
+        out.append((length & 0x7F) | 0x80)
+        length >>= 7
+    out.append(length)
+
+
+def _write_int(out: bytearray, value: int) -> None:
+    """
+    Encode an integer in the smallest available representation.
+
+    Args:
+        out: The output buffer
+        value: The integer to encode
+    """
+    if 0 <= value < 0x80:
+        out.append(FIXINT | value)
+    elif -0x80 <= value < 0x80:
+        out.append(INT8)
+        out += _INT8.pack(value)
+    elif -0x8000 <= value < 0x8000:
+        out.append(INT16)
+        out += _INT16.pack(value)
+    elif -0x80000000 <= value < 0x80000000:
+        out.append(INT32)
+        out += _INT32.pack(value)
+    elif -0x8000000000000000 <= value < 0x8000000000000000:
+        out.append(INT64)
+        out += _INT64.pack(value)
+    else:
+        encoded = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+        out.append(BIGINT)
+        _write_length(out, len(encoded))
+        out += encoded
+
+
+def _compile_encoder(plan: ClassPlan) -> Callable[[BinaryWriter, Serializable], None]:
+    """
+    Compile a ClassPlan into a flat encoder for BinaryWriter.
+
+    Args:
+        plan: The plan to compile
+
+    Returns:
+        A function taking the writer and the object being written
+    """
+    steps: List[Callable[[BinaryWriter, Serializable], None]] = []
+    for step in plan.steps:
+        if step.kind == 'primitive':
+            def encode_primitive(writer: BinaryWriter, obj: Serializable, prop_name: str = step.prop_name) -> None:
+                value = getattr(obj, prop_name, None)
+                if value is not None:
+                    frame = writer._frames[-1]
+                    if not frame.opened:
+                        writer._open(frame)
+                    writer._write_name(prop_name)
+                    writer._write_value(value)
+            steps.append(encode_primitive)
+        elif step.kind == 'property':
+            def encode_property(writer: BinaryWriter, obj: Serializable, step: Any = step) -> None:
+                writer.property(step.data_type, obj, step.prop_name, step.element_builder_type, step.key_type)
+            steps.append(encode_property)
+        else:
+            def encode_verbatim(writer: BinaryWriter, obj: Serializable, step: Any = step) -> None:
+                writer.verbatim(step.data_type, obj, step.get_value, step.set_value, step.get_prop_names)
+            steps.append(encode_verbatim)
+
+    def encode(writer: BinaryWriter, obj: Serializable) -> None:
+        for encode_step in steps:
+            encode_step(writer, obj)
+    return encode
+
+
+def _compile_decoder(plan: ClassPlan) -> Callable[[BinaryReader, Serializable], None]:
+    """
+    Compile a ClassPlan into a flat decoder for BinaryReader.
+
+    Properties without a from_string conversion are assigned straight from the
+    decoded fields; anything else, including frozenset properties, which are
+    decoded as sets, is delegated to the reader.
+
+    Args:
+        plan: The plan to compile
+
+    Returns:
+        A function taking the reader and the object being populated
+    """
+    if all(
+        step.kind != 'verbatim' and step.from_string is None and step.data_type is not frozenset
+        for step in plan.steps
+    ):
+        prop_names = tuple(step.prop_name for step in plan.steps)
+
+        def decode_fast(reader: BinaryReader, obj: Serializable) -> None:
+            fields = reader.fields
+            for prop_name in prop_names:
+                if prop_name in fields:
+                    setattr(obj, prop_name, fields[prop_name])
+        return decode_fast
+
+    def decode(reader: BinaryReader, obj: Serializable) -> None:
+        plan.replay(reader, obj)
+    return decode
+
+
+@scoped
+def serialize(obj: Any) -> bytes:
+    """
+    Serialize a Serializable object to the compact binary format.
+
+    Args:
+        obj: The object to serialize
+
+    Returns:
+        The binary representation of the object
+    """
+    return BinaryWriter().write(obj)
+
+
+def deserialize(data: bytes, refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None) -> Any:
+    """
+    Deserialize an object from the compact binary format.
+
+    Args:
+        data: The binary representation produced by serialize()
+        refs: Optional dictionary to track deserialized objects by class and id
+
+    Returns:
+        The deserialized object
+
+    Raises:
+        ValueError: If the data is not a valid binary document
+    """
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not an elevated_objects binary document")
+    decoder = _Decoder(data, refs if refs is not None else {})
+    decoder.pos = len(MAGIC)
+    try:
+        return decoder.read_value()
+    except (IndexError, struct.error) as e:
+        raise ValueError("truncated binary document") from e
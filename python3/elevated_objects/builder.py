@@ -1,13 +1,38 @@
 #!/usr/bin/env python3
 
 from __future__ import annotations
-from typing import TypeVar, Generic, Optional, Any, Type
+import functools
+from typing import TypeVar, Generic, Optional, Any, Type, Callable, Tuple
 
 from .serializable import Serializable, Visitor
+from .identity import IdentityCache
+from .tracking import MutationTracker
+from .interning import InternPool
 
 # Type variable for the built object
 T = TypeVar('T')
 
+# Builder methods with these prefixes are treated as mutations of the instance
+MUTATOR_PREFIXES: Tuple[str, ...] = ('with_', 'add_', 'set_', 'remove_', 'clear_')
+
+def _mutator(method: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a builder method so that the builder is notified after it mutates the instance.
+    
+    Args:
+        method: The builder method to wrap
+        
+    Returns:
+        The wrapped method
+    """
+    @functools.wraps(method)
+    def wrapper(self: Builder, *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        self._mutated()
+        return result
+    wrapper.__elevated_mutator__ = True
+    return wrapper
+
 class Builder(Generic[T]):
     """
     Base class for builders of serializable objects.
@@ -19,8 +44,28 @@ class Builder(Generic[T]):
     
     Each Serializable class should have a corresponding Builder class
     that handles the creation and modification of instances.
+    
+    Methods named with_*, add_*, set_*, remove_* or clear_* are treated as
+    mutations: after each call, cached state derived from the instance (such
+    as its object ID and its encoded JSON fragments) is invalidated.
+    
+    If interning is enabled for the class (see InternPool), done() returns
+    the pooled instance equal to the one that was built.
     """
     
+    # True once the instance has been modified through this builder
+    _modified = False
+    
+    def __init_subclass__(cls, **kwargs: Any):
+        """
+        Wrap the mutating methods declared by a Builder subclass.
+        """
+        super().__init_subclass__(**kwargs)
+        for name, member in list(vars(cls).items()):
+            if (name.startswith(MUTATOR_PREFIXES) and callable(member)
+                    and not getattr(member, '__elevated_mutator__', False)):
+                setattr(cls, name, _mutator(member))
+    
     def __init__(self, instance: Optional[T] = None):
         """
         Initialize the builder, optionally with an existing instance to modify.
@@ -50,8 +95,10 @@ class Builder(Generic[T]):
         Accept a visitor to process this builder's instance.
         
         This method delegates to the visit method of the instance being built,
-        allowing the visitor to process the object structure.
-        
+        allowing the visitor to process the object structure. If the visitor
+        populates the instance (its 'populates' attribute is True, as for
+        JsonReader and BinaryReader), the instance is treated as mutated.
+
         Args:
             visitor: The visitor to accept
             identity_only: If True, only visit properties that participate in the 
@@ -67,27 +114,46 @@ class Builder(Generic[T]):
             self._instance.visit(visitor, identity_only)
         else:
             raise AttributeError(f"Instance of type {type(self._instance)} does not implement 'visit'")
+        # Writers, hashers and comparators only read the instance
+        if getattr(visitor, 'populates', False):
+            self._mutated()
         return self
     
+    def _mutated(self) -> None:
+        """
+        Called after the instance has been modified through this builder.
+        
+        Invalidates cached state derived from the instance, such as its object ID,
+        and gives it a new mutation version.
+        """
+        IdentityCache.invalidate(self._instance)
+        MutationTracker.touch(self._instance)
+        self._modified = True
+    
     def done(self) -> T:
         """
         Complete the building process and return the built object.
         
         This method finalizes any pending operations and returns the 
-        fully configured instance.
+        fully configured instance. If the instance was modified through this
+        builder and its class is interned, the pooled instance with the same
+        object ID is returned instead.
         
         Returns:
             The fully configured instance
         """
+        if self._modified:
+            return InternPool.intern(self._instance)
         return self._instance
     
     @staticmethod
-    def register(class_spec: str):
+    def register(class_spec: str, version: Optional[str] = None):
         """
         Decorator to register a builder class with the Registry.
         
         Args:
             class_spec: The class specification string for the built class
+            version: Optional current version of the built class (see Registry.set_version)
             
         Returns:
             A decorator function that registers the builder class
@@ -100,5 +166,7 @@ class Builder(Generic[T]):
         def decorator(builder_class: Type[Builder]):
             from .registry import Registry
             Registry.register(class_spec, builder_class)
+            if version is not None:
+                Registry.set_version(class_spec, version)
             return builder_class
         return decorator
\ No newline at end of file
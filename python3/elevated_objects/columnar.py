@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import typing
+from typing import Dict, List, Any, Optional, Union
+
+from .serializable import Serializable
+from .registry import Registry
+from .plans import PlanCache
+
+if typing.TYPE_CHECKING:
+    from .json import JsonWriter, JsonReader
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Key that marks a columnar batch; its value is the class spec of every row
+COLUMNS_KEY = '__columns__'
+
+# Keys of a columnar batch that are not property columns
+_BATCH_KEYS = (COLUMNS_KEY, '__count__', '__id__', '__is_ref__', '__version__')
+
+# Minimum number of same-class objects in a list before it is written as columns
+MIN_ROWS = 2
+
+def write_columns(writer: JsonWriter, items: Union[List[Any], tuple]) -> Optional[Dict[str, Any]]:
+    """
+    Write a list of objects of the same class as one column per property.
+
+    The batch looks like
+    {"__columns__": class spec, "__count__": n, "__id__": [...], "__is_ref__": [...], prop: [...], ...}
+    where "__id__" and "__is_ref__" are omitted when no row has an ID or is a
+    reference. Rows that are references have None in every property column.
+    The batch of a versioned class also has "__version__", the version of its rows.
+    Objects are encoded in list order with the writer's reference table, so
+    references resolve exactly as they would in the row-wise layout.
+
+    Args:
+        writer: The writer of the object that owns the list
+        items: The list property value
+
+    Returns:
+        The columnar JSON, or None if the list is not a batch of at least
+        MIN_ROWS objects of one class with a compiled plan and no verbatim values
+    """
+    if len(items) < MIN_ROWS:
+        return None
+
+    first = items[0]
+    if not Registry.is_serializable(first):
+        return None
+    class_spec = first.get_class_spec()
+    for item in items:
+        if item is None or not Registry.is_serializable(item) or item.get_class_spec() != class_spec:
+            return None
+
+    plan = PlanCache.get(first)
+    if plan is None or any(step.kind == 'verbatim' for step in plan.steps):
+        return None
+
+    rows = [writer._child(item).write() for item in items]
+    prop_names = [step.prop_name for step in plan.steps]
+
+    columns: Dict[str, Any] = {COLUMNS_KEY: rows[0]['__class__'], '__count__': len(rows)}
+    ids = [row.get('__id__') for row in rows]
+    if any(object_id is not None for object_id in ids):
+        columns['__id__'] = ids
+    is_refs = [bool(row.get('__is_ref__')) for row in rows]
+    if any(is_refs):
+        columns['__is_ref__'] = is_refs
+    version = Registry.get_version(class_spec)
+    if version is not None:
+        columns['__version__'] = version
+    for prop_name in prop_names:
+        columns[prop_name] = [row.get(prop_name) for row in rows]
+    return columns
+
+
+def read_columns(reader: JsonReader, columns: Dict[str, Any]) -> List[Any]:
+    """
+    Rebuild the objects of a columnar batch written by write_columns().
+
+    Every row is built through the Builder registered for the batch's class and
+    populated straight from the columns; only complex properties go through
+    JsonReader.property().
+
+    Args:
+        reader: The reader of the object that owns the list
+        columns: The columnar JSON
+
+    Returns:
+        The list of objects
+    """
+    class_spec = reader._class_spec({'__class__': columns[COLUMNS_KEY]})
+    if class_spec is None:
+        return []
+
+    count = columns['__count__']
+    ids = columns.get('__id__') or [None] * count
+    if Registry.migrations_active and Registry.get_migration(class_spec, columns.get('__version__')) is not None:
+        return _read_rows(reader, columns, ids)
+    by_id = reader.refs.setdefault(class_spec, {})
+
+    factory = Registry.get_builder_class(class_spec)
+    # The first row is built with the builder that the plan is looked up with
+    builder = factory()
+    plan = PlanCache.get(builder.done())
+    if plan is None:
+        # The reading process may not have opted the class into compiled plans
+        return _read_rows(reader, columns, ids)
+    primitives = [
+        (step.prop_name, step.from_string, columns.get(step.prop_name))
+        for step in plan.steps if step.kind == 'primitive'
+    ]
+    properties = [step for step in plan.steps if step.kind == 'property']
+
+    result: List[Any] = []
+    for index in range(count):
+        object_id = ids[index]
+        if object_id is not None and object_id in by_id:
+            result.append(by_id[object_id])
+            continue
+
+        if builder is None:
+            builder = factory()
+        obj = builder.done()
+        if object_id is not None:
+            by_id[object_id] = obj
+
+        for prop_name, from_string, column in primitives:
+            if column is None:
+                continue
+            value = column[index]
+            if value is None:
+                continue
+            if from_string is not None and isinstance(value, str):
+                try:
+                    value = from_string(value)
+                except Exception:
+                    pass
+            setattr(obj, prop_name, value)
+
+        if properties:
+            row_reader = reader._child({
+                step.prop_name: columns[step.prop_name][index]
+                for step in properties if step.prop_name in columns
+            })
+            for step in properties:
+                row_reader.property(step.data_type, obj, step.prop_name, step.element_builder_type, step.key_type)
+
+        result.append(builder.done())
+        builder = None
+    return result
+
+
+def _read_rows(reader: JsonReader, columns: Dict[str, Any], ids: List[Any]) -> List[Any]:
+    """
+    Rebuild the objects of a columnar batch one row at a time, so that each
+    row of an older version is upgraded by its class's migrations, or so that
+    a class without a compiled plan is read through its visit().
+
+    Args:
+        reader: The reader of the object that owns the list
+        columns: The columnar JSON
+        ids: The object ID of every row
+
+    Returns:
+        The list of objects
+    """
+    is_refs = columns.get('__is_ref__') or [False] * len(ids)
+    prop_names = [name for name in columns if name not in _BATCH_KEYS]
+    result: List[Any] = []
+    for index, object_id in enumerate(ids):
+        row: Dict[str, Any] = {'__class__': columns[COLUMNS_KEY]}
+        if object_id is not None:
+            row['__id__'] = object_id
+        if is_refs[index]:
+            row['__is_ref__'] = True
+        else:
+            row['__version__'] = columns.get('__version__')
+            for prop_name in prop_names:
+                row[prop_name] = columns[prop_name][index]
+        result.append(reader._child(row).read())
+    return result
+
+
+def column_arrays(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the property columns of a columnar batch for analytics use.
+
+    When NumPy is installed, columns whose values are all ints, floats or bools
+    are returned as NumPy arrays; every other column is returned as a list.
+
+    Args:
+        columns: The columnar JSON
+
+    Returns:
+        The property columns by property name
+    """
+    result: Dict[str, Any] = {}
+    for prop_name, column in columns.items():
+        if prop_name in _BATCH_KEYS:
+            continue
+        if numpy is not None and column and all(isinstance(value, (int, float)) for value in column):
+            result[prop_name] = numpy.asarray(column)
+        else:
+            result[prop_name] = column
+    return result
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+
+"""
+Structural comparison of Serializable objects.
+
+A Comparator walks two objects of the same class in lockstep, one property
+at a time, as their visit() methods (or compiled plans) describe them, and
+compares the property values directly rather than comparing serialized
+JSON. Nested objects are compared recursively. A pair of objects that is
+reached twice, such as a subgraph shared by both sides, is compared only
+once, and a nested object that is the same instance on both sides is not
+walked at all.
+
+compare() orders two objects and equals() tests them for equality; both stop
+at the first difference. diff() walks both objects completely and reports
+the path of every difference.
+"""
+
+from __future__ import annotations
+import functools
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set, NamedTuple
+
+from .serializable import Serializable, Visitor
+from .registry import Registry
+from .plans import PlanCache
+
+class _Absent:
+    """
+    Type of ABSENT.
+    """
+
+    def __repr__(self) -> str:
+        return 'ABSENT'
+
+
+# Stands for the missing side of a list element or dictionary entry in a Difference
+ABSENT = _Absent()
+
+# Unordered collections, which are compared as their sorted elements
+_SETS = (set, frozenset)
+
+class Difference(NamedTuple):
+    """
+    One difference between two objects, found by diff().
+    """
+    # Where the values differ, e.g. "members[2].address.city" or "roster['Ann']"
+    path: str
+    # The value in the first object, or ABSENT
+    a: Any
+    # The value in the second object, or ABSENT
+    b: Any
+
+
+class Comparator(Visitor[Any]):
+    """
+    Visitor that compares the properties of one object with those of another object of the same class.
+
+    The Comparator is driven by a.visit(comparator), or by a's compiled plan,
+    and reads each visited property from both a and b. Unless differences
+    are being collected, the properties after the first difference are not
+    compared.
+    """
+
+    def __init__(
+        self,
+        a: Serializable,
+        b: Serializable,
+        ordered: bool = True,
+        differences: Optional[List[Difference]] = None,
+        memo: Optional[Dict[Tuple[int, int], int]] = None,
+        path: str = ''
+    ):
+        """
+        Args:
+            a: The first object
+            b: The second object, of the same class spec as a
+            ordered: If True, the result orders a and b; if False, only whether
+                     it is 0 is meaningful, which is cheaper to compute
+            differences: Optional list to append every difference to; when
+                         given, the comparison does not stop at the first one
+            memo: Results of the object pairs compared so far, by (id(a), id(b))
+            path: The path of a and b within the objects being compared
+        """
+        self.a = a
+        self.b = b
+        self.ordered = ordered
+        self.differences = differences
+        self.memo: Dict[Tuple[int, int], int] = memo if memo is not None else {}
+        self.path = path
+        self.result = 0
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        pass
+
+    def end(self, obj: Any) -> None:
+        """
+        End visiting an object.
+
+        Args:
+            obj: The object being visited
+        """
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        """
+        Owner relationships are not compared.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Compare a verbatim value.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+        """
+        if self.result and self.differences is None:
+            return
+        self._compare_property(get_value(self.a), get_value(self.b), self.path)
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Compare a primitive property.
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        if self.result and self.differences is None:
+            return
+        self._compare_property(
+            getattr(self.a, prop_name, None), getattr(self.b, prop_name, None), self._prop_path(prop_name)
+        )
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Compare a complex property.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        if self.result and self.differences is None:
+            return
+        self._compare_property(
+            getattr(self.a, prop_name, None), getattr(self.b, prop_name, None), self._prop_path(prop_name)
+        )
+
+    def compare(self) -> int:
+        """
+        Compare the two objects.
+
+        Returns:
+            -1, 0 or 1 as a sorts before, equal to, or after b
+        """
+        a = self.a
+        plan = PlanCache.get(a)
+        if plan is None:
+            a.visit(self)
+            return self.result
+
+        b = self.b
+        collect = self.differences is not None
+        for step in plan.steps:
+            if step.kind == 'verbatim':
+                self._compare_property(step.get_value(a), step.get_value(b), self.path)
+            else:
+                prop_name = step.prop_name
+                self._compare_property(
+                    getattr(a, prop_name, None), getattr(b, prop_name, None), self._prop_path(prop_name)
+                )
+            if self.result and not collect:
+                break
+        return self.result
+
+    def _prop_path(self, prop_name: str) -> str:
+        """
+        Get the path of a property of the objects being compared.
+
+        Args:
+            prop_name: The name of the property
+
+        Returns:
+            The path
+        """
+        return f"{self.path}.{prop_name}" if self.path else prop_name
+
+    def _compare_property(self, a: Any, b: Any, path: str) -> None:
+        """
+        Compare the values of one property and record the first nonzero result.
+
+        Args:
+            a: The value in the first object
+            b: The value in the second object
+            path: The path of the property
+        """
+        result = self._compare_values(a, b, path)
+        if result and not self.result:
+            self.result = result
+
+    def _compare_values(self, a: Any, b: Any, path: str) -> int:
+        """
+        Compare two property values, recursing into objects and containers.
+
+        Args:
+            a: The first value
+            b: The second value
+            path: The path of the values
+
+        Returns:
+            -1, 0 or 1 as a sorts before, equal to, or after b
+        """
+        if a is b:
+            return 0
+        if a is None or b is None:
+            return self._leaf(-1 if a is None else 1, a, b, path)
+
+        if Registry.is_serializable(a) and Registry.is_serializable(b):
+            return self._compare_objects(a, b, path)
+        if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+            return self._compare_sequences(a, b, path)
+        if isinstance(a, dict) and isinstance(b, dict):
+            return self._compare_maps(a, b, path)
+        return self._leaf(self._compare_scalars(a, b), a, b, path)
+
+    def _compare_objects(self, a: Serializable, b: Serializable, path: str) -> int:
+        """
+        Compare two nested objects, reusing the result of an earlier comparison of the same pair.
+
+        Args:
+            a: The first object
+            b: The second object
+            path: The path of the objects
+
+        Returns:
+            -1, 0 or 1 as a sorts before, equal to, or after b
+        """
+        key = (id(a), id(b))
+        result = self.memo.get(key)
+        if result is not None:
+            return result
+
+        a_spec = a.get_class_spec()
+        b_spec = b.get_class_spec()
+        if a_spec != b_spec:
+            result = self._leaf(-1 if a_spec < b_spec else 1, a, b, path)
+        else:
+            # A pair reached again while it is being compared, through a cycle,
+            # is assumed equal; any difference is found on the first pass
+            self.memo[key] = 0
+            result = Comparator(a, b, self.ordered, self.differences, self.memo, path).compare()
+        self.memo[key] = result
+        return result
+
+    def _compare_sequences(self, a: Any, b: Any, path: str) -> int:
+        """
+        Compare two lists element by element, then by length.
+
+        Args:
+            a: The first list
+            b: The second list
+            path: The path of the lists
+
+        Returns:
+            -1, 0 or 1 as a sorts before, equal to, or after b
+        """
+        if len(a) != len(b) and not self.ordered and self.differences is None:
+            return 1
+        result = 0
+        for index, (a_item, b_item) in enumerate(zip(a, b)):
+            item_result = self._compare_values(a_item, b_item, f"{path}[{index}]")
+            if item_result and not result:
+                result = item_result
+                if self.differences is None:
+                    return result
+
+        if len(a) != len(b):
+            if self.differences is not None:
+                for index in range(len(b), len(a)):
+                    self.differences.append(Difference(f"{path}[{index}]", a[index], ABSENT))
+                for index in range(len(a), len(b)):
+                    self.differences.append(Difference(f"{path}[{index}]", ABSENT, b[index]))
+            if not result:
+                result = -1 if len(a) < len(b) else 1
+        return result
+
+    def _compare_maps(self, a: Dict[Any, Any], b: Dict[Any, Any], path: str) -> int:
+        """
+        Compare two dictionaries by their sorted keys, then by the values of the keys.
+
+        Args:
+            a: The first dictionary
+            b: The second dictionary
+            path: The path of the dictionaries
+
+        Returns:
+            -1, 0 or 1 as a sorts before, equal to, or after b
+        """
+        if self.differences is not None:
+            result = 0
+            for key, a_item in a.items():
+                b_item = b.get(key, ABSENT)
+                if b_item is ABSENT:
+                    self.differences.append(Difference(f"{path}[{key!r}]", a_item, ABSENT))
+                    item_result = 1
+                else:
+                    item_result = self._compare_values(a_item, b_item, f"{path}[{key!r}]")
+                if item_result and not result:
+                    result = item_result
+            for key, b_item in b.items():
+                if key not in a:
+                    self.differences.append(Difference(f"{path}[{key!r}]", ABSENT, b_item))
+                    if not result:
+                        result = -1
+            return result
+
+        if not self.ordered:
+            if len(a) != len(b):
+                return 1
+            for key, a_item in a.items():
+                b_item = b.get(key, ABSENT)
+                if b_item is ABSENT or self._compare_values(a_item, b_item, path):
+                    return 1
+            return 0
+
+        a_keys = _sorted_keys(a)
+        b_keys = _sorted_keys(b)
+        result = self._compare_sequences(a_keys, b_keys, path)
+        if result:
+            return result
+        for key in a_keys:
+            result = self._compare_values(a[key], b[key], path)
+            if result:
+                return result
+        return 0
+
+    def _compare_scalars(self, a: Any, b: Any) -> int:
+        """
+        Compare two values that are not objects or containers.
+
+        Args:
+            a: The first value
+            b: The second value
+
+        Returns:
+            -1, 0 or 1 as a sorts before, equal to, or after b
+        """
+        if a == b:
+            return 0
+        if not self.ordered:
+            return 1
+        return _order(a, b)
+
+    def _leaf(self, result: int, a: Any, b: Any, path: str) -> int:
+        """
+        Record a difference between two values that are not compared any further.
+
+        Args:
+            result: The result of comparing the values
+            a: The first value
+            b: The second value
+            path: The path of the values
+
+        Returns:
+            The result
+        """
+        if result and self.differences is not None:
+            self.differences.append(Difference(path, a, b))
+        return result
+
+
+def _order(a: Any, b: Any) -> int:
+    """
+    Order two unequal values.
+
+    Sets are ordered by their sorted elements. Values that cannot be compared,
+    or that are unordered with respect to each other, are ordered by type
+    name, then by repr, and finally by identity, so that unequal values
+    never compare as 0.
+
+    Args:
+        a: The first value
+        b: The second value
+
+    Returns:
+        -1 or 1 as a sorts before or after b
+    """
+    if isinstance(a, _SETS) and isinstance(b, _SETS):
+        for a_item, b_item in zip(_sorted_keys(a), _sorted_keys(b)):
+            if a_item != b_item:
+                return _order(a_item, b_item)
+        return (len(a) > len(b)) - (len(a) < len(b))
+    try:
+        if a < b:
+            return -1
+        if b < a:
+            return 1
+    except TypeError:
+        pass
+    a_name = type(a).__name__
+    b_name = type(b).__name__
+    if a_name != b_name:
+        return -1 if a_name < b_name else 1
+    a_text = repr(a)
+    b_text = repr(b)
+    if a_text != b_text:
+        return -1 if a_text < b_text else 1
+    return -1 if id(a) < id(b) else 1
+
+
+def _sorted_keys(value: Any) -> List[Any]:
+    """
+    Sort the keys of a dictionary, or the elements of a set, in the order of _order().
+
+    Args:
+        value: The dictionary or set
+
+    Returns:
+        The sorted keys
+    """
+    try:
+        items = sorted(value)
+    except TypeError:
+        return sorted(value, key=functools.cmp_to_key(_order))
+    # Sets are only partially ordered by <
+    if any(isinstance(item, _SETS) for item in items):
+        return sorted(value, key=functools.cmp_to_key(_order))
+    return items
+
+
+def _compare(a: Any, b: Any, ordered: bool, differences: Optional[List[Difference]]) -> int:
+    """
+    Compare two values with a new memo.
+
+    Args:
+        a: The first value
+        b: The second value
+        ordered: If True, compute an ordering rather than just equality
+        differences: Optional list to append every difference to
+
+    Returns:
+        -1, 0 or 1 as a sorts before, equal to, or after b
+    """
+    if a is b:
+        return 0
+    if Registry.is_serializable(a) and Registry.is_serializable(b) and a.get_class_spec() == b.get_class_spec():
+        return Comparator(a, b, ordered, differences, {(id(a), id(b)): 0}).compare()
+    return Comparator(a, b, ordered, differences)._compare_values(a, b, '')
+
+
+def compare(a: Any, b: Any) -> int:
+    """
+    Order two objects by their properties, in visit order.
+
+    Objects of different class specs are ordered by class spec; None sorts
+    before everything else. Stops at the first property that differs.
+
+    Args:
+        a: The first object
+        b: The second object
+
+    Returns:
+        -1, 0 or 1 as a sorts before, equal to, or after b
+    """
+    return _compare(a, b, True, None)
+
+
+def equals(a: Any, b: Any) -> bool:
+    """
+    Check whether two objects have equal properties, stopping at the first difference.
+
+    Args:
+        a: The first object
+        b: The second object
+
+    Returns:
+        True if the objects are structurally equal
+    """
+    return _compare(a, b, False, None) == 0
+
+
+def diff(a: Any, b: Any) -> List[Difference]:
+    """
+    Find every difference between two objects.
+
+    A pair of nested objects that appears at several paths is compared, and
+    its differences reported, only at the first of them.
+
+    Args:
+        a: The first object
+        b: The second object
+
+    Returns:
+        The differences, in visit order; empty if the objects are equal
+    """
+    differences: List[Difference] = []
+    _compare(a, b, True, differences)
+    return differences
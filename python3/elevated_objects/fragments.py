@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import json
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from .serializable import Serializable
+from .tracking import MutationTracker
+from .identity import scoped
+from .json import JsonWriter, _untracked_writes
+
+# Default maximum number of fragments kept by a FragmentCache
+DEFAULT_MAX_ENTRIES = 100000
+
+# Default maximum number of objects in all fragments kept by a FragmentCache
+DEFAULT_MAX_OBJECTS = 1000000
+
+# (class spec, object ID) of an object in a reference table
+RefKey = Tuple[str, Union[str, int]]
+
+# Cache key of a fragment: id() of the object, dictionary mode, columnar layout
+FragmentKey = Tuple[int, bool, bool]
+
+class _FragmentLog:
+    """
+    What the writers of one document have written so far, in order.
+    """
+
+    __slots__ = ('objects', 'defined', 'referenced', 'classes', 'fragments')
+
+    def __init__(self, dictionary: bool):
+        """
+        Args:
+            dictionary: True if the document is written in dictionary mode
+        """
+        # (id(obj), version) of every object begun
+        self.objects: List[Tuple[int, int]] = []
+        # (class spec, object ID, id(obj)) of every object written in full with an ID
+        self.defined: List[Tuple[str, Union[str, int], int]] = []
+        # Key of every object written as a reference
+        self.referenced: List[RefKey] = []
+        # In dictionary mode, the class spec of every object begun
+        self.classes: Optional[List[str]] = [] if dictionary else None
+        # Every fragment reused or stored, by id() of its JSON
+        self.fragments: Dict[int, _Fragment] = {}
+
+
+class _Fragment:
+    """
+    The JSON of one object, with what must hold for it to be written again as-is.
+    """
+
+    __slots__ = ('json', 'objects', 'defined', 'referenced', 'classes', 'partial', 'text')
+
+    def __init__(
+        self,
+        json: Any,
+        objects: List[Tuple[int, int]],
+        defined: List[Tuple[str, Union[str, int], int]],
+        referenced: List[RefKey],
+        classes: Optional[List[Tuple[str, int]]],
+        partial: bool
+    ):
+        """
+        Args:
+            json: The JSON of the object
+            objects: (id(obj), version) of every object in the JSON; none may have changed
+            defined: Objects written in full with an ID; none may have been written before
+            referenced: Objects written as references to objects outside the fragment;
+                        all must have been written before
+            classes: In dictionary mode, the class code of every class in the JSON
+            partial: True if other fragments were reused in the JSON, so that
+                     their text can be reused when encoding it
+        """
+        self.json = json
+        self.objects = objects
+        self.defined = defined
+        self.referenced = referenced
+        self.classes = classes
+        self.partial = partial
+        # The JSON text, once encoded by _encode()
+        self.text: Optional[str] = None
+
+    def splice(self, writer: FragmentWriter) -> bool:
+        """
+        Reuse the fragment in a writer if the writer would write the same JSON.
+
+        On success the fragment's objects are entered in the writer's tables
+        and log, as if the writer had written them.
+
+        Args:
+            writer: The writer of the object
+
+        Returns:
+            True if the fragment was reused, False if it must be written again
+        """
+        for key, version in self.objects:
+            if not MutationTracker.is_current(key, version):
+                return False
+
+        refs = writer.refs
+        for class_spec, object_id, _ in self.defined:
+            by_id = refs.get(class_spec)
+            if by_id is not None and object_id in by_id:
+                return False
+        for class_spec, object_id in self.referenced:
+            by_id = refs.get(class_spec)
+            if by_id is None or object_id not in by_id:
+                return False
+
+        classes = writer.classes
+        if self.classes is not None:
+            # Classes not in the table yet must get the same codes in the same order
+            count = len(classes)
+            for class_spec, code in self.classes:
+                current = classes.get(class_spec)
+                if current is None:
+                    if code != count:
+                        return False
+                    count += 1
+                elif current != code:
+                    return False
+            for class_spec, code in self.classes:
+                classes.setdefault(class_spec, code)
+
+        for class_spec, object_id, key in self.defined:
+            refs.setdefault(class_spec, {})[object_id] = MutationTracker.get_object(key)
+
+        log = writer.log
+        log.fragments[id(self.json)] = self
+        log.objects.extend(self.objects)
+        log.defined.extend(self.defined)
+        log.referenced.extend(self.referenced)
+        if log.classes is not None:
+            log.classes.extend(class_spec for class_spec, _ in self.classes)
+        return True
+
+
+class FragmentWriter(JsonWriter):
+    """
+    JsonWriter that reuses the JSON of objects that are unchanged since it was last written.
+
+    Every object written in full is stored in the FragmentCache as a fragment
+    together with the versions of the objects it contains and the references
+    it makes. When the object is written again, the fragment is spliced in
+    if none of those objects has been modified and the document so far leads
+    to exactly the same JSON: the same objects are written as references and
+    in dictionary mode the same class codes are used.
+    """
+
+    def __init__(
+        self,
+        obj: Serializable,
+        refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]],
+        classes: Optional[Dict[str, int]],
+        columnar: bool,
+        cache: FragmentCache,
+        log: _FragmentLog
+    ):
+        """
+        Args:
+            obj: The object to serialize
+            refs: Optional dictionary to track serialized objects by class and id
+            classes: Optional class table for dictionary mode
+            columnar: If True, write homogeneous object lists as columns
+            cache: The cache to reuse and store fragments in
+            log: The log shared by all writers of the document
+        """
+        super().__init__(obj, refs, classes, columnar)
+        self.cache = cache
+        self.log = log
+
+    def begin(self, obj: Serializable, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object, logging it for the fragments that contain it.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        super().begin(obj, parent_prop_name)
+        log = self.log
+        version = MutationTracker.watch(obj)
+        if version is None:
+            # Changes to the object cannot be detected; no fragment may contain it
+            _untracked_writes.count += 1
+        log.objects.append((id(obj), version))
+        object_id = self.json.get('__id__')
+        if object_id is not None:
+            class_spec = obj.get_class_spec()
+            if self.is_ref:
+                log.referenced.append((class_spec, object_id))
+            else:
+                log.defined.append((class_spec, object_id, id(obj)))
+        if log.classes is not None:
+            log.classes.append(obj.get_class_spec())
+
+    def write(self) -> Any:
+        """
+        Write the object, reusing its fragment if it is still valid.
+
+        Returns:
+            The JSON representation of the object
+        """
+        if self.json is not None:
+            return self.json
+
+        cache = self.cache
+        key = (id(self.obj), self.classes is not None, self.columnar)
+        fragment = cache._fragments.get(key)
+        if fragment is not None and fragment.splice(self):
+            cache._fragments.move_to_end(key)
+            cache.hits += 1
+            self.is_ref = False
+            self.json = fragment.json
+            return self.json
+
+        log = self.log
+        objects_start = len(log.objects)
+        defined_start = len(log.defined)
+        referenced_start = len(log.referenced)
+        classes_start = len(log.classes) if log.classes is not None else 0
+        untracked = _untracked_writes.count
+        hits = cache.hits
+
+        super().write()
+        if self.is_ref:
+            return self.json
+        cache.misses += 1
+        if _untracked_writes.count != untracked:
+            return self.json
+
+        defined = log.defined[defined_start:]
+        defined_keys = {(class_spec, object_id) for class_spec, object_id, _ in defined}
+        referenced = [
+            ref_key for ref_key in dict.fromkeys(log.referenced[referenced_start:]) if ref_key not in defined_keys
+        ]
+        classes = None
+        if log.classes is not None:
+            classes = [(class_spec, self.classes[class_spec]) for class_spec in dict.fromkeys(log.classes[classes_start:])]
+        fragment = _Fragment(
+            self.json, log.objects[objects_start:], defined, referenced, classes, cache.hits != hits
+        )
+        log.fragments[id(self.json)] = fragment
+        cache._store(key, fragment)
+        return self.json
+
+    def _child(self, obj: Serializable) -> JsonWriter:
+        """
+        Create a writer for a nested object that shares this writer's tables, cache and log.
+
+        Args:
+            obj: The nested object
+
+        Returns:
+            A writer for the nested object
+        """
+        return FragmentWriter(obj, self.refs, self.classes, self.columnar, self.cache, self.log)
+
+
+def _encode(value: Any, fragments: Dict[int, _Fragment], pieces: List[str]) -> None:
+    """
+    Encode a JSON value as json.dumps() does, reusing the text of fragments.
+
+    The text of a fragment is encoded once and kept with the fragment. Only
+    fragments in which other fragments were reused are encoded piece by
+    piece; the others are encoded by a single json.dumps() call.
+
+    Args:
+        value: The JSON value
+        fragments: The fragments reused or stored while writing the value, by id() of their JSON
+        pieces: The list to append the text pieces to
+    """
+    fragment = fragments.get(id(value))
+    if fragment is None:
+        if value and isinstance(value, (list, dict)):
+            _encode_container(value, fragments, pieces)
+        else:
+            pieces.append(json.dumps(value))
+        return
+
+    if fragment.text is None:
+        if fragment.partial:
+            start = len(pieces)
+            _encode_container(value, fragments, pieces)
+            fragment.text = ''.join(pieces[start:])
+            del pieces[start:]
+        else:
+            fragment.text = json.dumps(value)
+    pieces.append(fragment.text)
+
+
+def _encode_container(value: Union[List[Any], Dict[str, Any]], fragments: Dict[int, _Fragment], pieces: List[str]) -> None:
+    """
+    Encode a non-empty list or dict item by item (see _encode).
+    """
+    if isinstance(value, list):
+        pieces.append('[')
+        for index, item in enumerate(value):
+            if index:
+                pieces.append(', ')
+            _encode(item, fragments, pieces)
+        pieces.append(']')
+    else:
+        pieces.append('{')
+        for index, (key, item) in enumerate(value.items()):
+            pieces.append((', ' if index else '') + json.dumps(key) + ': ')
+            _encode(item, fragments, pieces)
+        pieces.append('}')
+
+
+class FragmentCache:
+    """
+    Size-bounded LRU cache of the JSON of objects, for serializing mostly unchanged graphs repeatedly.
+
+    Pass the cache to serialize() or to_json(). Objects must be modified
+    through their Builder, or touch() must be called after modifying them
+    directly, so that fragments containing them are no longer used. Objects
+    nested in primitive or verbatim values are not tracked; fragments that
+    contain them are not cached. The JSON returned by to_json() shares parts
+    with the cache and must not be modified.
+
+    The cache is not thread-safe.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_objects: int = DEFAULT_MAX_OBJECTS):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of fragments to keep
+            max_objects: Maximum number of objects in all fragments to keep, which bounds memory use
+        """
+        self.max_entries = max_entries
+        self.max_objects = max_objects
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._objects = 0
+        self._fragments: OrderedDict[FragmentKey, _Fragment] = OrderedDict()
+
+    @scoped
+    def write(self, obj: Serializable, classes: Optional[Dict[str, int]] = None, columnar: bool = False) -> Any:
+        """
+        Convert a Serializable object to its JSON representation, reusing cached fragments.
+
+        Args:
+            obj: The object to convert
+            classes: Optional class table for dictionary mode (see JsonWriter)
+            columnar: If True, write homogeneous object lists as columns (see JsonWriter)
+
+        Returns:
+            The JSON representation of the object
+        """
+        log = _FragmentLog(classes is not None)
+        return FragmentWriter(obj, None, classes, columnar, self, log).write()
+
+    @scoped
+    def serialize(self, obj: Serializable, dictionary: bool = False, columnar: bool = False) -> str:
+        """
+        Serialize a Serializable object to a JSON string, reusing cached fragments and their text.
+
+        The result is the same as serialize(obj, dictionary, columnar).
+
+        Args:
+            obj: The object to serialize
+            dictionary: If True, write the compact dictionary mode document
+            columnar: If True, write list properties holding objects of a single
+                      class one column per property
+
+        Returns:
+            A JSON string representation of the object
+        """
+        classes: Optional[Dict[str, int]] = {} if dictionary else None
+        log = _FragmentLog(dictionary)
+        root = FragmentWriter(obj, None, classes, columnar, self, log).write()
+        pieces: List[str] = []
+        _encode(root, log.fragments, pieces)
+        if classes is None:
+            return ''.join(pieces)
+        return '{"__classes__": ' + json.dumps(list(classes)) + ', "__root__": ' + ''.join(pieces) + '}'
+
+    def invalidate(self, obj: Any) -> None:
+        """
+        Drop the fragments of an object.
+
+        Fragments of other objects that contain it are dropped when they are
+        next used, if the object was modified.
+
+        Args:
+            obj: The object
+        """
+        for dictionary in (False, True):
+            for columnar in (False, True):
+                fragment = self._fragments.pop((id(obj), dictionary, columnar), None)
+                if fragment is not None:
+                    self._objects -= len(fragment.objects)
+
+    def clear(self) -> None:
+        """
+        Drop all fragments and reset the counters.
+        """
+        self._fragments.clear()
+        self._objects = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            hits, misses, evictions, and the number of fragments and objects kept
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._fragments),
+            'objects': self._objects
+        }
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def _store(self, key: FragmentKey, fragment: _Fragment) -> None:
+        """
+        Store a fragment, evicting the least recently used fragments beyond the limits.
+
+        Args:
+            key: The cache key of the fragment
+            fragment: The fragment
+        """
+        old = self._fragments.pop(key, None)
+        if old is not None:
+            self._objects -= len(old.objects)
+        if len(fragment.objects) > self.max_objects:
+            return
+        self._fragments[key] = fragment
+        self._objects += len(fragment.objects)
+        while len(self._fragments) > self.max_entries or self._objects > self.max_objects:
+            _, evicted = self._fragments.popitem(last=False)
+            self._objects -= len(evicted.objects)
+            self.evictions += 1
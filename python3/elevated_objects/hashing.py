@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+
+"""
+Stable content hashes of Serializable objects.
+
+A ContentHasher feeds the properties of an object straight into a BLAKE2b
+hash, without building its JSON. The encoding is canonical: dictionaries
+and sets are hashed in sorted order, so two objects with equal properties
+have the same digest regardless of insertion order, in any process. A
+nested object contributes its own digest, which is computed once per
+hasher however many times the object is referenced.
+"""
+
+from __future__ import annotations
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set
+
+from .serializable import Serializable, Visitor
+from .registry import Registry
+from .plans import ClassPlan, PlanStep, PlanCache
+from .identity import IdentityCache, scoped
+
+# Size in bytes of the digests computed by default
+DEFAULT_DIGEST_SIZE = 16
+
+# Encodings of the values that have no payload, and of the ends of containers
+_NONE = 'N'
+_TRUE = 'T'
+_FALSE = 'F'
+_LIST = '['
+_SET = '{'
+_DICT = '('
+_END = ')'
+
+# Label of a verbatim value
+_VERBATIM = 'v'
+
+# Built-in types whose subclasses are hashed as the built-in type
+_BASE_TYPES = (str, int, float, list, tuple, dict, set, frozenset)
+
+# A compiled plan step: the encoded property name, the property name, and the getter of a verbatim value
+HashStep = Tuple[str, Optional[str], Optional[Callable[[Serializable], Any]]]
+
+class ContentHasher(Visitor[Any]):
+    """
+    Visitor that computes a canonical digest of the properties of an object.
+
+    The digests of the objects hashed by one ContentHasher are remembered by
+    object identity, so hashing many objects that share subobjects with one
+    hasher hashes every subobject once. A hasher must not be reused after
+    the objects it has hashed are modified.
+    """
+
+    def __init__(self, identity_only: bool = False, digest_size: int = DEFAULT_DIGEST_SIZE):
+        """
+        Args:
+            identity_only: If True, hash only the properties that participate in
+                           the identity of each object
+            digest_size: Size of the digests in bytes, at most 64
+        """
+        self.identity_only = identity_only
+        self.digest_size = digest_size
+        # Hexadecimal digests of the objects hashed so far, by id(obj)
+        self.digests: Dict[int, str] = {}
+        # Keeps the hashed objects alive so that their ids are not reused
+        self._objects: List[Any] = []
+        # Objects whose digest is being computed, to detect cycles
+        self._in_progress: Set[int] = set()
+        # Encoded properties of the object being hashed
+        self._parts: List[str] = []
+
+    def digest(self, obj: Serializable) -> bytes:
+        """
+        Compute the digest of an object.
+
+        Args:
+            obj: The object to hash
+
+        Returns:
+            The digest
+        """
+        return bytes.fromhex(self.hexdigest(obj))
+
+    def hexdigest(self, obj: Serializable) -> str:
+        """
+        Compute the digest of an object as a hexadecimal string.
+
+        Args:
+            obj: The object to hash
+
+        Returns:
+            The digest in hexadecimal
+        """
+        key = id(obj)
+        digest = self.digests.get(key)
+        if digest is not None:
+            return digest
+
+        outer = self._parts
+        class_spec = obj.get_class_spec()
+        self._parts = parts = [f"o{len(class_spec)}:{class_spec}"]
+        self._in_progress.add(key)
+        try:
+            steps = None
+            plan = PlanCache.get(obj)
+            if plan is not None:
+                if self.identity_only:
+                    steps = plan.compile('hash.identity', _compile_identity_steps)
+                else:
+                    steps = plan.compile('hash', _compile_steps)
+            if steps is None:
+                obj.visit(self, identity_only=self.identity_only)
+            else:
+                encode = self._encode
+                for label, prop_name, get_value in steps:
+                    parts.append(label)
+                    encode(getattr(obj, prop_name, None) if get_value is None else get_value(obj))
+        finally:
+            self._in_progress.discard(key)
+            self._parts = outer
+
+        data = ''.join(parts).encode('utf-8', 'surrogatepass')
+        digest = hashlib.blake2b(data, digest_size=self.digest_size).hexdigest()
+        self.digests[key] = digest
+        self._objects.append(obj)
+        return digest
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        pass
+
+    def end(self, obj: Any) -> None:
+        """
+        End visiting an object.
+
+        Args:
+            obj: The object being visited
+        """
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        """
+        Owner relationships are not part of an object's content.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Hash a verbatim value.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+        """
+        self._parts.append(_VERBATIM)
+        self._encode(get_value(target))
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Hash a primitive property.
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        self._parts.append(_label(prop_name))
+        self._encode(getattr(target, prop_name, None))
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Hash a complex property.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        self._parts.append(_label(prop_name))
+        self._encode(getattr(target, prop_name, None))
+
+    def _encode(self, value: Any) -> None:
+        """
+        Append the canonical encoding of a value to the object being hashed.
+
+        Strings are length-prefixed and numbers end with a terminator, so
+        the encoding of one value cannot run into the next.
+
+        Args:
+            value: The value
+        """
+        parts = self._parts
+        value_type = type(value)
+        if value_type is str:
+            parts.append(f"s{len(value)}:{value}")
+        elif value is None:
+            parts.append(_NONE)
+        elif value is True:
+            parts.append(_TRUE)
+        elif value is False:
+            parts.append(_FALSE)
+        elif value_type is int:
+            parts.append(f"i{value};")
+        elif value_type is float:
+            parts.append(f"f{value!r};")
+        elif value_type is list or value_type is tuple:
+            parts.append(_LIST)
+            encode = self._encode
+            for item in value:
+                encode(item)
+            parts.append(_END)
+        elif value_type is dict:
+            parts.append(_DICT)
+            encode = self._encode
+            if all(type(key) is str for key in value):
+                for key in sorted(value):
+                    parts.append(f"s{len(key)}:{key}")
+                    encode(value[key])
+            else:
+                for encoded, key in sorted((self._encoded(key), key) for key in value):
+                    parts.append(encoded)
+                    encode(value[key])
+            parts.append(_END)
+        elif value_type is set or value_type is frozenset:
+            parts.append(_SET)
+            parts.extend(sorted(self._encoded(item) for item in value))
+            parts.append(_END)
+        elif Registry.is_serializable(value):
+            if id(value) in self._in_progress:
+                # A reference back to an object that contains this one
+                class_spec = value.get_class_spec()
+                object_id = str(IdentityCache.get_id(value))
+                parts.append(f"@{len(class_spec)}:{class_spec}{len(object_id)}:{object_id}")
+            else:
+                parts.append(f"o{self.hexdigest(value)};")
+        elif isinstance(value, (bytes, bytearray)):
+            parts.append(f"b{value.hex()};")
+        else:
+            for base_type in _BASE_TYPES:
+                if isinstance(value, base_type):
+                    self._encode(base_type(value))
+                    return
+            text = str(value)
+            parts.append(f"?{len(text)}:{text}")
+
+    def _encoded(self, value: Any) -> str:
+        """
+        Get the canonical encoding of a value on its own, for sorting.
+
+        Args:
+            value: The value
+
+        Returns:
+            The encoding
+        """
+        outer = self._parts
+        self._parts = []
+        try:
+            self._encode(value)
+            return ''.join(self._parts)
+        finally:
+            self._parts = outer
+
+
+def _label(prop_name: str) -> str:
+    """
+    Encode the name of a property.
+
+    Args:
+        prop_name: The name of the property
+
+    Returns:
+        The length-prefixed name
+    """
+    return f"p{len(prop_name)}:{prop_name}"
+
+
+def _compile(steps: List[PlanStep]) -> List[HashStep]:
+    """
+    Precompute the labels of plan steps.
+
+    Args:
+        steps: The plan steps
+
+    Returns:
+        The compiled steps
+    """
+    return [
+        (_VERBATIM, None, step.get_value) if step.kind == 'verbatim' else (_label(step.prop_name), step.prop_name, None)
+        for step in steps
+    ]
+
+
+def _compile_steps(plan: ClassPlan) -> List[HashStep]:
+    """
+    Compile the steps of a plan for hashing.
+
+    Args:
+        plan: The plan
+
+    Returns:
+        The compiled steps
+    """
+    return _compile(plan.steps)
+
+
+def _compile_identity_steps(plan: ClassPlan) -> Optional[List[HashStep]]:
+    """
+    Compile the identity steps of a plan for hashing.
+
+    Args:
+        plan: The plan
+
+    Returns:
+        The compiled steps, or None if the plan has no identity steps
+    """
+    if plan.identity_steps is None:
+        return None
+    return _compile(plan.identity_steps)
+
+
+@scoped
+def content_hash(obj: Serializable, digest_size: int = DEFAULT_DIGEST_SIZE) -> str:
+    """
+    Compute a stable fingerprint of the properties of an object and everything it contains.
+
+    Objects with equal properties have equal fingerprints in any process,
+    whatever the insertion order of their dictionaries and sets.
+
+    Args:
+        obj: The object to hash
+        digest_size: Size of the digest in bytes, at most 64
+
+    Returns:
+        The fingerprint in hexadecimal
+    """
+    return ContentHasher(digest_size=digest_size).hexdigest(obj)
+
+
+@scoped
+def identity_hash(obj: Serializable, digest_size: int = DEFAULT_DIGEST_SIZE) -> str:
+    """
+    Compute a stable fingerprint of the properties that participate in an object's identity.
+
+    This is a fixed-size alternative to the object ID for use as a cache or
+    deduplication key; objects whose identity properties are equal have
+    the same identity hash.
+
+    Args:
+        obj: The object to hash
+        digest_size: Size of the digest in bytes, at most 64
+
+    Returns:
+        The fingerprint in hexadecimal
+    """
+    return ContentHasher(identity_only=True, digest_size=digest_size).hexdigest(obj)
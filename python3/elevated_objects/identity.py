@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import contextlib
+import functools
+import json
+import threading
+import typing
+from typing import Dict, List, Any, Set, Optional, Tuple, Union, Callable, Iterator, TypeVar, ClassVar
+
+from .serializable import Serializable, Visitor
+from .registry import Registry
+from .plans import ClassPlan, PlanCache
+
+ObjectId = Union[str, int]
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+def format_id(values: List[Any]) -> Optional[ObjectId]:
+    """
+    Combine the values of an object's identity properties into an object ID.
+
+    A single str or int value is used as-is; several values are combined into
+    a compact JSON array string so that the ID is unambiguous.
+
+    Args:
+        values: The identity property values, in visit order
+
+    Returns:
+        The object ID, or None if every identity value is empty
+    """
+    if all(value is None or value == '' for value in values):
+        return None
+    if len(values) == 1 and isinstance(values[0], (str, int)) and not isinstance(values[0], bool):
+        return values[0]
+    return json.dumps([_identity_value(value) for value in values], separators=(',', ':'))
+
+
+def _identity_value(value: Any) -> Any:
+    """
+    Convert an identity property value to a JSON-compatible value.
+
+    Nested objects are represented by their own ID.
+
+    Args:
+        value: The property value
+
+    Returns:
+        A value that json.dumps() accepts
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if Registry.is_serializable(value):
+        return IdentityCache.get_id(value)
+    if isinstance(value, (list, tuple)):
+        return [_identity_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _identity_value(item) for key, item in value.items()}
+    return str(value)
+
+
+class IdWriter(Visitor[Any]):
+    """
+    Visitor that computes an object ID from the properties that participate in identity.
+
+    The IdWriter is driven by visit(id_writer, identity_only=True) and collects
+    the value of every primitive, property and verbatim call it sees.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty ID writer.
+        """
+        self.values: List[Any] = []
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        pass
+
+    def end(self, obj: Any) -> None:
+        """
+        End visiting an object.
+
+        Args:
+            obj: The object being visited
+        """
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        """
+        Visit the owner relationship.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Collect a verbatim value.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+        """
+        self.values.append(get_value(target))
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Collect a primitive property value.
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        self.values.append(getattr(target, prop_name, None))
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Collect a complex property value; nested objects contribute their own ID.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        self.values.append(getattr(target, prop_name, None))
+
+    def get_id(self) -> Optional[ObjectId]:
+        """
+        Get the ID computed from the collected values.
+
+        Returns:
+            The object ID, or None if the object has no identity
+        """
+        return format_id(self.values)
+
+
+def _compile_identity(plan: ClassPlan) -> Callable[[Serializable], Optional[ObjectId]]:
+    """
+    Compile a ClassPlan into a function that computes an object's ID.
+
+    When every identity step is a primitive the function reads the attributes
+    directly; otherwise it replays the identity steps through an IdWriter.
+
+    Args:
+        plan: The plan to compile
+
+    Returns:
+        A function taking an object and returning its ID
+    """
+    steps = plan.identity_steps
+    if steps is not None and all(step.kind == 'primitive' for step in steps):
+        prop_names = tuple(step.prop_name for step in steps)
+
+        def compute_fast(obj: Serializable) -> Optional[ObjectId]:
+            return format_id([getattr(obj, prop_name, None) for prop_name in prop_names])
+        return compute_fast
+
+    def compute(obj: Serializable) -> Optional[ObjectId]:
+        id_writer = IdWriter()
+        plan.replay(id_writer, obj, identity_only=True)
+        return id_writer.get_id()
+    return compute
+
+
+def compute_id(obj: Serializable) -> Optional[ObjectId]:
+    """
+    Compute an object's ID without consulting the cache.
+
+    Args:
+        obj: The object to compute the ID for
+
+    Returns:
+        The object ID, or None if the object has no identity
+    """
+    plan = PlanCache.get(obj)
+    if plan is not None:
+        return plan.compile('identity', _compile_identity)(obj)
+
+    id_writer = IdWriter()
+    obj.visit(id_writer, identity_only=True)
+    return id_writer.get_id()
+
+
+class IdentityCache:
+    """
+    Cache of object IDs, scoped to one operation.
+
+    IDs are only cached inside IdentityCache.scope(), which the serialization
+    entry points open for the duration of a call: each object's ID is then
+    computed once however many times the object is referenced. Outside a
+    scope every call computes the ID, so an identity property assigned
+    directly between two calls never leaves a stale ID behind. Scopes are
+    per thread. Builder invalidates the cached ID of its instance whenever one
+    of its mutating methods is called inside a scope.
+    """
+
+    # The current thread's cached IDs: id(obj) mapped to obj and its ID, or None outside a scope
+    _local: ClassVar[threading.local] = threading.local()
+
+    @classmethod
+    def get_id(cls, obj: Serializable) -> Optional[ObjectId]:
+        """
+        Get an object's ID, computing it, and caching it inside a scope.
+
+        Args:
+            obj: The object to get the ID for
+
+        Returns:
+            The object ID, or None if the object has no identity
+        """
+        ids = getattr(cls._local, 'ids', None)
+        if ids is None:
+            return compute_id(obj)
+        key = id(obj)
+        entry = ids.get(key)
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+        object_id = compute_id(obj)
+        # The entry holds obj, so its id() cannot be reused before the scope ends
+        ids[key] = (obj, object_id)
+        return object_id
+
+    @classmethod
+    @contextlib.contextmanager
+    def scope(cls) -> Iterator[None]:
+        """
+        Cache object IDs until the end of the block.
+
+        The objects must not be modified inside the block other than through
+        their builders. Nested scopes share the outermost scope's cache.
+        """
+        if getattr(cls._local, 'ids', None) is not None:
+            yield
+            return
+        cls._local.ids = {}
+        try:
+            yield
+        finally:
+            cls._local.ids = None
+
+    @classmethod
+    def invalidate(cls, obj: Any) -> None:
+        """
+        Forget the cached ID of an object after its identity properties changed.
+
+        Args:
+            obj: The object whose ID is stale
+        """
+        ids = getattr(cls._local, 'ids', None)
+        if ids is not None:
+            ids.pop(id(obj), None)
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Forget all IDs cached in the current scope.
+        """
+        ids = getattr(cls._local, 'ids', None)
+        if ids is not None:
+            ids.clear()
+
+
+def scoped(function: F) -> F:
+    """
+    Decorator that runs a function inside IdentityCache.scope().
+
+    Args:
+        function: The function, typically a serialization entry point
+
+    Returns:
+        The wrapped function
+    """
+    local = IdentityCache._local
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if getattr(local, 'ids', None) is not None:
+            # Already inside a scope, e.g. a recursive call
+            return function(*args, **kwargs)
+        local.ids = {}
+        try:
+            return function(*args, **kwargs)
+        finally:
+            local.ids = None
+    return typing.cast(F, wrapper)
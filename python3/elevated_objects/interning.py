@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import weakref
+from typing import Dict, Any, Optional, ClassVar
+
+from .serializable import Serializable
+from .identity import IdentityCache, ObjectId
+
+class InternPool:
+    """
+    Process-wide pool of canonical instances of value classes, keyed by object ID.
+
+    Interning is opt-in per class spec, with InternPool.enable(class_spec).
+    For an enabled class, Builder.done() and JsonReader return the pooled
+    instance with the same object ID instead of a new one, if there is one,
+    so equal objects read by separate deserialize() calls share one
+    instance. The pool holds its instances weakly.
+
+    Only enable interning for immutable classes whose object ID covers all
+    of their properties: an interned instance is shared by every holder, and
+    an object read from JSON is replaced by the pooled instance without
+    comparing the properties that are not part of its ID.
+    """
+
+    # Pooled instances by class spec and object ID, for the enabled class specs
+    _pools: ClassVar[Dict[str, weakref.WeakValueDictionary]] = {}
+
+    # True while interning is enabled for any class spec, checked first on hot paths
+    active: ClassVar[bool] = False
+
+    @classmethod
+    def enable(cls, class_spec: str) -> None:
+        """
+        Intern the instances of a class spec.
+
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+        """
+        cls._pools.setdefault(class_spec, weakref.WeakValueDictionary())
+        cls.active = True
+
+    @classmethod
+    def disable(cls, class_spec: str) -> None:
+        """
+        Stop interning the instances of a class spec and release its pool.
+
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+        """
+        cls._pools.pop(class_spec, None)
+        cls.active = bool(cls._pools)
+
+    @classmethod
+    def is_enabled(cls, class_spec: str) -> bool:
+        """
+        Check whether the instances of a class spec are interned.
+
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+
+        Returns:
+            True if interning is enabled for the class spec
+        """
+        return class_spec in cls._pools
+
+    @classmethod
+    def lookup(cls, class_spec: str, object_id: ObjectId) -> Optional[Any]:
+        """
+        Get the pooled instance with an object ID.
+
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            object_id: The object ID
+
+        Returns:
+            The pooled instance, or None if there is none or the class spec is not interned
+        """
+        pool = cls._pools.get(class_spec)
+        if pool is None:
+            return None
+        pooled = pool.get(object_id)
+        # A pooled instance that was modified since is no longer the canonical one
+        if pooled is not None and IdentityCache.get_id(pooled) != object_id:
+            del pool[object_id]
+            return None
+        return pooled
+
+    @classmethod
+    def intern(cls, obj: Serializable) -> Serializable:
+        """
+        Get the canonical instance of an object, pooling the object if it has none yet.
+
+        Args:
+            obj: The object
+
+        Returns:
+            The pooled instance with the object's ID, or obj itself if it is
+            now the pooled instance, has no ID, or its class spec is not interned
+        """
+        if not cls.active:
+            return obj
+        class_spec = obj.get_class_spec()
+        pool = cls._pools.get(class_spec)
+        if pool is None:
+            return obj
+        object_id = IdentityCache.get_id(obj)
+        if object_id is None:
+            return obj
+        pooled = cls.lookup(class_spec, object_id)
+        if pooled is not None:
+            return pooled
+        try:
+            pool[object_id] = obj
+        except TypeError:
+            # The object cannot be weakly referenced
+            pass
+        return obj
+
+    @classmethod
+    def size(cls, class_spec: Optional[str] = None) -> int:
+        """
+        Count the pooled instances.
+
+        Args:
+            class_spec: The class spec to count, or None to count all class specs
+
+        Returns:
+            The number of live pooled instances
+        """
+        if class_spec is not None:
+            pool = cls._pools.get(class_spec)
+            return len(pool) if pool is not None else 0
+        return sum(len(pool) for pool in cls._pools.values())
+
+    @classmethod
+    def clear(cls, class_spec: Optional[str] = None) -> None:
+        """
+        Empty the pools, keeping interning enabled.
+
+        Args:
+            class_spec: The class spec whose pool to empty, or None to empty all pools
+        """
+        if class_spec is None:
+            for pool in cls._pools.values():
+                pool.clear()
+        elif class_spec in cls._pools:
+            cls._pools[class_spec].clear()
@@ -1,16 +1,50 @@
 #!/usr/bin/env python3
 
 from __future__ import annotations
+import asyncio
+import functools
+import io
+import itertools
 import json
+import threading
 import typing
-from typing import Dict, List, Any, Set, Optional, Type, TypeVar, Union, Callable
+from concurrent.futures import Executor
+from typing import Dict, List, Any, Set, Optional, Type, TypeVar, Union, Callable, IO, Iterator, Iterable, Tuple
 
 from .serializable import Serializable, Visitor
 from .registry import Registry
 from .builder import Builder
+from .plans import ClassPlan, PlanCache
+from .identity import IdentityCache, scoped
+from .interning import InternPool
+from .columnar import COLUMNS_KEY, write_columns, read_columns
+
+if typing.TYPE_CHECKING:
+    from .fragments import FragmentCache
 
 T = TypeVar('T', bound=Serializable)
 
+# Number of characters handed to an asyncio.StreamWriter at a time by write_async()
+ASYNC_CHUNK_SIZE = 64 * 1024
+
+# Container levels below the root that the async API encodes item by item (see _iterencode)
+ASYNC_ENCODE_DEPTH = 2
+
+# Values of these types are already JSON-native and bypass to_json()
+_JSON_SCALARS = (str, int, float, bool)
+
+class _UntrackedWrites(threading.local):
+    """
+    Per-thread count of Serializable objects written by to_json() with a reference table of their own.
+
+    FragmentCache compares the count before and after encoding an object: the
+    objects nested in primitive values are not seen by its writers, so a
+    fragment that contains any is not cached.
+    """
+    count = 0
+
+_untracked_writes = _UntrackedWrites()
+
 class JsonWriter(Visitor[T]):
     """
     Visitor that serializes a Serializable object to JSON.
@@ -20,17 +54,30 @@ class JsonWriter(Visitor[T]):
     and object identity preservation.
     """
     
-    def __init__(self, obj: T, refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None):
+    def __init__(
+        self,
+        obj: T,
+        refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None,
+        classes: Optional[Dict[str, int]] = None,
+        columnar: bool = False
+    ):
         """
         Initialize the JSON writer with the object to serialize.
         
         Args:
             obj: The object to serialize
             refs: Optional dictionary to track serialized objects by class and id
+            classes: Optional class table for dictionary mode; when given, class specs
+                     are written as integer codes assigned from this table and
+                     '__is_ref__' is only written when it is true
+            columnar: If True, list properties holding objects of a single class
+                      are written in the columnar layout (see columnar.write_columns)
         """
         self.obj = obj
         self.json: Any = None
         self.refs = refs if refs is not None else {}
+        self.classes = classes
+        self.columnar = columnar
         self.is_ref: Optional[bool] = None
     
     def begin(self, obj: T, parent_prop_name: Optional[str] = None) -> None:
@@ -47,12 +94,16 @@ class JsonWriter(Visitor[T]):
         if class_spec not in self.refs:
             self.refs[class_spec] = {}
         
-        self.json['__class__'] = class_spec
+        if self.classes is None:
+            self.json['__class__'] = class_spec
+        else:
+            code = self.classes.get(class_spec)
+            if code is None:
+                code = self.classes[class_spec] = len(self.classes)
+            self.json['__class__'] = code
         
-        # Generate object ID using identity properties
-        id_writer = IdWriter()
-        obj.visit(id_writer, identity_only=True)
-        object_id = id_writer.get_id()
+        # Object ID from identity properties, computed once per instance
+        object_id = IdentityCache.get_id(obj)
         
         if object_id:
             self.is_ref = object_id in self.refs[class_spec]
@@ -62,7 +113,13 @@ class JsonWriter(Visitor[T]):
         else:
             self.is_ref = False
         
-        self.json['__is_ref__'] = self.is_ref
+        if self.classes is None or self.is_ref:
+            self.json['__is_ref__'] = self.is_ref
+        
+        if not self.is_ref:
+            version = Registry.get_version(class_spec)
+            if version is not None:
+                self.json['__version__'] = version
     
     def end(self, obj: T) -> None:
         """
@@ -105,7 +162,7 @@ class JsonWriter(Visitor[T]):
             return
         
         value = get_value(target)
-        self.json = to_json(value)
+        self.json = to_json(value, classes=self.classes, columnar=self.columnar)
     
     def primitive(
         self,
@@ -128,7 +185,7 @@ class JsonWriter(Visitor[T]):
         
         value = getattr(target, prop_name, None)
         if value is not None:
-            self.json[prop_name] = to_json(value)
+            self.json[prop_name] = to_json(value, classes=self.classes, columnar=self.columnar)
     
     def property(
         self,
@@ -156,45 +213,103 @@ class JsonWriter(Visitor[T]):
             self.json[prop_name] = None
             return
         
-        # Handle different property types
+        write_property = _WRITE_PROPERTY.get(prop_type) or _property_writer(prop_type)
+        write_property(self, prop_name, value)
+    
+    def _write_array(self, prop_name: str, value: Any) -> None:
+        """
+        Write an array property; values that are not lists or tuples are written dynamically.
+        
+        Args:
+            prop_name: The name of the property
+            value: The property value
+        """
+        value_type = type(value)
+        if value_type is not list and value_type is not tuple:
+            self._write_dynamic(prop_name, value)
+            return
+        
+        if self.columnar:
+            columns_json = write_columns(self, value)
+            if columns_json is not None:
+                self.json[prop_name] = columns_json
+                return
+        
+        write_element = self._write_element
+        self.json[prop_name] = [write_element(item) for item in value]
+    
+    def _write_map(self, prop_name: str, value: Any) -> None:
+        """
+        Write a map property; values that are not dicts are written dynamically.
+        
+        Args:
+            prop_name: The name of the property
+            value: The property value
+        """
+        if type(value) is not dict:
+            self._write_dynamic(prop_name, value)
+            return
+        
+        # Keys are converted to strings for JSON
+        write_element = self._write_element
+        self.json[prop_name] = {str(key): write_element(item) for key, item in value.items()}
+    
+    def _write_scalar(self, prop_name: str, value: Any) -> None:
+        """
+        Write a scalar property whose declared type is a Serializable class.
+        
+        Args:
+            prop_name: The name of the property
+            value: The property value
+        """
+        if _to_json_handler(value) is _serializable_to_json:
+            self.json[prop_name] = self._child(value).write()
+        else:
+            self._write_dynamic(prop_name, value)
+    
+    def _write_dynamic(self, prop_name: str, value: Any) -> None:
+        """
+        Write a property whose layout is decided by the type of its value.
+        
+        Args:
+            prop_name: The name of the property
+            value: The property value
+        """
         if isinstance(value, list) or isinstance(value, tuple):
             # Array property
-            array_json = []
-            for item in value:
-                if item is None:
-                    array_json.append(None)
-                elif isinstance(item, Serializable):
-                    writer = JsonWriter(item, self.refs)
-                    item.visit(writer)
-                    array_json.append(writer.json)
-                else:
-                    array_json.append(to_json(item))
-            self.json[prop_name] = array_json
+            if self.columnar:
+                columns_json = write_columns(self, value)
+                if columns_json is not None:
+                    self.json[prop_name] = columns_json
+                    return
+            self.json[prop_name] = [self._write_element(item) for item in value]
             
         elif isinstance(value, dict):
             # Map property
-            map_json = {}
-            for key, item in value.items():
-                str_key = str(key)  # Convert key to string for JSON
-                if item is None:
-                    map_json[str_key] = None
-                elif isinstance(item, Serializable):
-                    writer = JsonWriter(item, self.refs)
-                    item.visit(writer)
-                    map_json[str_key] = writer.json
-                else:
-                    map_json[str_key] = to_json(item)
-            self.json[prop_name] = map_json
+            self.json[prop_name] = {str(key): self._write_element(item) for key, item in value.items()}
             
-        elif isinstance(value, Serializable):
+        elif _to_json_handler(value) is _serializable_to_json:
             # Scalar property
-            writer = JsonWriter(value, self.refs)
-            value.visit(writer)
-            self.json[prop_name] = writer.json
+            self.json[prop_name] = self._child(value).write()
             
         else:
             # Handle other types
-            self.json[prop_name] = to_json(value)
+            self.json[prop_name] = to_json(value, classes=self.classes, columnar=self.columnar)
+    
+    def _write_element(self, item: Any) -> Any:
+        """
+        Convert an element of an array or map property, sharing this writer's tables.
+        
+        Args:
+            item: The element
+            
+        Returns:
+            The JSON representation of the element
+        """
+        handler = _TO_JSON.get(type(item)) or _to_json_handler(item)
+        if handler is _serializable_to_json:
+            return self._child(item).write()
+        return handler(item, [], self.classes, self.columnar)
     
     def write(self) -> Any:
         """
@@ -206,8 +321,27 @@ class JsonWriter(Visitor[T]):
         if self.json is not None:
             return self.json
         
-        self.obj.visit(self)
+        plan = PlanCache.get(self.obj)
+        if plan is None:
+            self.obj.visit(self)
+        else:
+            self.begin(self.obj)
+            if not self.is_ref:
+                plan.compile('json.encode', _compile_encoder)(self, self.obj)
+            self.end(self.obj)
         return self.json
+    
+    def _child(self, obj: Serializable) -> JsonWriter:
+        """
+        Create a writer for a nested object that shares this writer's tables.
+        
+        Args:
+            obj: The nested object
+            
+        Returns:
+            A writer for the nested object
+        """
+        return type(self)(obj, self.refs, self.classes, self.columnar)
 
 
 class JsonReader(Visitor[T]):
@@ -217,18 +351,29 @@ class JsonReader(Visitor[T]):
     The JsonReader reconstructs the object structure from JSON, handling circular
     references and preserving object identity.
     """
-    
-    def __init__(self, json_data: Any, refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None):
+
+    # Assigns the properties of the objects it visits (see Builder.visit)
+    populates = True
+
+    def __init__(
+        self,
+        json_data: Any,
+        refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None,
+        classes: Optional[List[str]] = None
+    ):
         """
         Initialize the JSON reader with the JSON data to deserialize.
         
         Args:
             json_data: The JSON data to deserialize
             refs: Optional dictionary to track deserialized objects by class and id
+            classes: Optional class table of a dictionary mode document, used to
+                     resolve integer '__class__' codes
         """
         self.json = json_data
         self.obj: Optional[T] = None
         self.refs = refs if refs is not None else {}
+        self.classes = classes
         self.is_ref = False
     
     def begin(self, obj: T, parent_prop_name: Optional[str] = None) -> None:
@@ -256,7 +401,13 @@ class JsonReader(Visitor[T]):
                 self.obj = typing.cast(T, by_id[obj_id])
                 self.is_ref = True
             else:
-                by_id[obj_id] = obj
+                pooled = InternPool.lookup(class_spec, obj_id) if InternPool.active else None
+                if pooled is not None:
+                    # An interned instance that an earlier call already read
+                    by_id[obj_id] = self.obj = pooled
+                    self.is_ref = True
+                else:
+                    by_id[obj_id] = obj
     
     def end(self, obj: T) -> None:
         """
@@ -298,7 +449,7 @@ class JsonReader(Visitor[T]):
         if self.is_ref:
             return
         
-        set_value(target, from_json(self.json))
+        set_value(target, from_json(self.json, self.classes))
     
     def primitive(
         self,
@@ -358,213 +509,909 @@ class JsonReader(Visitor[T]):
         if self.is_ref:
             return
         
-        if not isinstance(self.json, dict) or prop_name not in self.json:
+        json_data = self.json
+        if not isinstance(json_data, dict) or prop_name not in json_data:
             return
         
-        json_value = self.json[prop_name]
+        json_value = json_data[prop_name]
         if json_value is None:
             setattr(target, prop_name, None)
             return
         
-        # Determine property type from hints
-        if prop_type == list or prop_type == tuple or (
-            isinstance(json_value, list)):
+        if type(json_value) is dict and COLUMNS_KEY in json_value:
+            # Columnar batch of objects
+            setattr(target, prop_name, read_columns(self, json_value))
+            return
+        
+        read_property = _READ_PROPERTY.get(prop_type) or _property_reader(prop_type)
+        read_property(self, target, prop_name, json_value, key_type)
+    
+    def _read_array(self, target: Serializable, prop_name: str, json_value: Any, key_type: Optional[type]) -> None:
+        """
+        Read an array property.
+        
+        Args:
+            target: The object containing the property
+            prop_name: The name of the property
+            json_value: The JSON value of the property
+            key_type: Optional type for dictionary keys (unused for arrays)
+        """
+        if type(json_value) is not list:
+            return
+        
+        read_element = self._read_element
+        setattr(target, prop_name, [read_element(item) for item in json_value])
+    
+    def _read_map(self, target: Serializable, prop_name: str, json_value: Any, key_type: Optional[type]) -> None:
+        """
+        Read a map property, converting keys to key_type where possible.
+        
+        Args:
+            target: The object containing the property
+            prop_name: The name of the property
+            json_value: The JSON value of the property
+            key_type: Optional type for dictionary keys
+        """
+        if type(json_value) is not dict:
+            if isinstance(json_value, list):
+                self._read_array(target, prop_name, json_value, key_type)
+            return
+        
+        read_element = self._read_element
+        convert_key = _KEY_CONVERTERS.get(key_type)
+        if convert_key is None:
+            setattr(target, prop_name, {key: read_element(item) for key, item in json_value.items()})
+            return
+        
+        result = {}
+        for key, item in json_value.items():
+            try:
+                typed_key = convert_key(key)
+            except ValueError:
+                typed_key = key
+            result[typed_key] = read_element(item)
+        setattr(target, prop_name, result)
+    
+    def _read_set(self, target: Serializable, prop_name: str, json_value: Any, key_type: Optional[type]) -> None:
+        """
+        Read a set property.
+        
+        Args:
+            target: The object containing the property
+            prop_name: The name of the property
+            json_value: The JSON value of the property
+            key_type: Optional type for dictionary keys (unused for sets)
+        """
+        value = from_json(json_value, self.classes)
+        if isinstance(value, (set, frozenset, list)):
+            setattr(target, prop_name, set(value))
+    
+    def _read_frozenset(self, target: Serializable, prop_name: str, json_value: Any, key_type: Optional[type]) -> None:
+        """
+        Read a frozenset property.
+        
+        Args:
+            target: The object containing the property
+            prop_name: The name of the property
+            json_value: The JSON value of the property
+            key_type: Optional type for dictionary keys (unused for sets)
+        """
+        value = from_json(json_value, self.classes)
+        if isinstance(value, (set, frozenset, list)):
+            setattr(target, prop_name, frozenset(value))
+    
+    def _read_dynamic(self, target: Serializable, prop_name: str, json_value: Any, key_type: Optional[type]) -> None:
+        """
+        Read a property whose layout is decided by its JSON value.
+        
+        Args:
+            target: The object containing the property
+            prop_name: The name of the property
+            json_value: The JSON value of the property
+            key_type: Optional type for dictionary keys
+        """
+        if isinstance(json_value, list):
             # Array property
-            if not isinstance(json_value, list):
-                return
+            self._read_array(target, prop_name, json_value, key_type)
             
-            result = []
-            for item in json_value:
-                if item is None:
-                    result.append(None)
-                    continue
-                
-                if isinstance(item, dict) and '__class__' in item and Registry.has_builder(item['__class__']):
-                    reader = JsonReader(item, self.refs)
-                    builder = Registry.create_builder(item['__class__'])
-                    builder.visit(reader)
-                    result.append(builder.done())
-                else:
-                    result.append(from_json(item))
-            
-            setattr(target, prop_name, result)
-            
-        elif prop_type == dict or (
-            isinstance(json_value, dict) and not (
-                '__class__' in json_value and Registry.has_builder(json_value['__class__'])
-            )):
+        elif isinstance(json_value, dict) and self._class_spec(json_value) is None:
             # Map property
-            if not isinstance(json_value, dict):
-                return
-            
-            result = {}
-            for key, item in json_value.items():
-                # Convert key to appropriate type if needed
-                if key_type == int:
-                    try:
-                        typed_key = int(key)
-                    except ValueError:
-                        typed_key = key
-                elif key_type == float:
-                    try:
-                        typed_key = float(key)
-                    except ValueError:
-                        typed_key = key
-                else:
-                    typed_key = key
-                
-                if item is None:
-                    result[typed_key] = None
-                    continue
-                
-                if isinstance(item, dict) and '__class__' in item and Registry.has_builder(item['__class__']):
-                    reader = JsonReader(item, self.refs)
-                    builder = Registry.create_builder(item['__class__'])
-                    builder.visit(reader)
-                    result[typed_key] = builder.done()
-                else:
-                    result[typed_key] = from_json(item)
-            
-            setattr(target, prop_name, result)
+            self._read_map(target, prop_name, json_value, key_type)
             
         else:
             # Scalar property (assuming it's a Serializable object)
             if not isinstance(json_value, dict) or '__class__' not in json_value:
-                setattr(target, prop_name, from_json(json_value))
+                setattr(target, prop_name, from_json(json_value, self.classes))
                 return
             
-            class_spec = json_value['__class__']
-            if Registry.has_builder(class_spec):
-                reader = JsonReader(json_value, self.refs)
-                builder = Registry.create_builder(class_spec)
-                builder.visit(reader)
-                setattr(target, prop_name, builder.done())
+            if self._class_spec(json_value) is not None:
+                setattr(target, prop_name, self._child(json_value).read())
+    
+    def _read_element(self, item: Any) -> Any:
+        """
+        Convert an element of an array or map property, sharing this reader's tables.
+        
+        Args:
+            item: The JSON value of the element
+            
+        Returns:
+            The deserialized element
+        """
+        if type(item) is dict:
+            if self._class_spec(item) is not None:
+                return self._child(item).read()
+            return _dict_from_json(item, self.classes)
+        if type(item) is list:
+            return _list_from_json(item, self.classes)
+        return item
     
     def read(self) -> Optional[T]:
         """
         Complete the JSON deserialization process.
         
+        If the JSON carries an __id__ that is already in the reference table,
+        the previously read object is returned instead of a new one.
+        
         Returns:
             The deserialized object, or None if deserialization failed
         """
         if self.json is None:
             return None
         
-        if not isinstance(self.json, dict):
+        json_data = self.json
+        if not isinstance(json_data, dict):
+            return None
+        class_spec = json_data.get('__class__')
+        if self.classes is not None and isinstance(class_spec, int):
+            class_spec = self.classes[class_spec]
+        factory = Registry.get_factory(class_spec)
+        if factory is None:
             return None
         
-        class_spec = self.json.get('__class__', None)
-        if not class_spec or not Registry.has_builder(class_spec):
+        if json_data.get('__is_ref__'):
+            found = self.refs.get(class_spec, {}).get(json_data.get('__id__'))
+            if found is not None:
+                # A reference to an object read already needs no builder or instance
+                self.obj = found
+                self.is_ref = True
+                return found
+        elif Registry.migrations_active:
+            self._migrate()
+        
+        builder = factory()
+        obj = builder.done()
+        plan = PlanCache.get(obj)
+        if plan is None:
+            builder.visit(self)
+        else:
+            self.begin(obj)
+            if not self.is_ref:
+                plan.compile('json.decode', _compile_decoder)(self, obj)
+            self.end(obj)
+        if self.is_ref:
+            return self.obj
+        obj = builder.done()
+        return typing.cast(T, InternPool.intern(obj) if InternPool.active else obj)
+    
+    def _class_spec(self, json_data: Any) -> Optional[str]:
+        """
+        Get the class spec of a JSON object if a builder is registered for it.
+        
+        Args:
+            json_data: A JSON value
+            
+        Returns:
+            The class spec, resolving dictionary mode codes, or None if json_data
+            is not an object of a registered class
+        """
+        if not isinstance(json_data, dict):
+            return None
+        class_spec = json_data.get('__class__')
+        if self.classes is not None and isinstance(class_spec, int):
+            class_spec = self.classes[class_spec]
+        if class_spec is None or Registry.get_factory(class_spec) is None:
             return None
+        return class_spec
+    
+    def _migrate(self) -> None:
+        """
+        Upgrade the JSON of the object to the current version of its class, before any of it is read.
+        
+        Raises:
+            ValueError: If no chain of migrations upgrades the object's version
+        """
+        json_data = self.json
+        if json_data.get('__is_ref__'):
+            return
+        upgrade = Registry.get_migration(self._class_spec(json_data), json_data.get('__version__'))
+        if upgrade is not None:
+            self.json = upgrade(json_data)
+    
+    def _child(self, json_data: Any) -> JsonReader:
+        """
+        Create a reader for a nested object that shares this reader's tables.
+        
+        Args:
+            json_data: The JSON data of the nested object
+            
+        Returns:
+            A reader for the nested object
+        """
+        return type(self)(json_data, self.refs, self.classes)
+
+
+class DefinitionIndex:
+    """
+    Index of the JSON objects that define each object ID in a document, built on first use.
+
+    Readers that do not decode every object of a document, such as the
+    lazy and projected readers, resolve a reference to an object whose
+    definition they skipped through this index.
+    """
+
+    def __init__(self, json_data: Any):
+        """
+        Args:
+            json_data: The root of the document
+        """
+        self.root = json_data
+        self.index: Optional[Dict[Tuple[str, Union[str, int]], Dict[str, Any]]] = None
+
+    def find(self, reader: JsonReader, class_spec: str, object_id: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """
+        Find the JSON that defines an object.
+
+        Args:
+            reader: A reader of the document, used to resolve class specs and
+                    to decode columnar batches
+            class_spec: The class spec of the object
+            object_id: The object ID
+
+        Returns:
+            The JSON object, or None if the document does not define the object
+        """
+        if self.index is None:
+            self._build(reader)
+        return self.index.get((class_spec, object_id))
+
+    def _build(self, reader: JsonReader) -> None:
+        """
+        Index every definition in the document.
+
+        Objects in columnar batches are decoded into the reader's reference
+        table instead, since a batch has no JSON object per row. Batches are
+        decoded once every other definition is indexed, so that references
+        within them resolve.
+
+        Args:
+            reader: A reader of the document
+        """
+        self.index = index = {}
+        batches: List[Dict[str, Any]] = []
+        pending: List[Any] = [self.root]
+        while pending:
+            value = pending.pop()
+            if type(value) is list:
+                pending.extend(value)
+            elif type(value) is dict:
+                if COLUMNS_KEY in value:
+                    batches.append(value)
+                elif '__id__' in value and not value.get('__is_ref__'):
+                    class_spec = reader._class_spec(value)
+                    if class_spec is not None:
+                        index.setdefault((class_spec, value['__id__']), value)
+                pending.extend(value.values())
+        for batch in batches:
+            read_columns(reader, batch)
+
+
+def _compile_encoder(plan: ClassPlan) -> Callable[[JsonWriter, Serializable], None]:
+    """
+    Compile a ClassPlan into a flat encoder that fills in JsonWriter.json.
+    
+    The encoder is equivalent to visiting the object with the JsonWriter after
+    begin() has run, but reads primitive attributes directly and only falls
+    back to the visitor methods for complex properties.
+    
+    Args:
+        plan: The plan to compile
         
-        builder = Registry.create_builder(class_spec)
-        builder.visit(self)
-        return typing.cast(T, builder.done())
+    Returns:
+        A function taking the writer and the object being written
+    """
+    steps: List[Callable[[JsonWriter, Serializable], None]] = []
+    for step in plan.steps:
+        if step.kind == 'primitive':
+            def encode_primitive(writer: JsonWriter, obj: Serializable, prop_name: str = step.prop_name) -> None:
+                value = getattr(obj, prop_name, None)
+                if value is not None:
+                    writer.json[prop_name] = (
+                        value if isinstance(value, _JSON_SCALARS)
+                        else to_json(value, classes=writer.classes, columnar=writer.columnar)
+                    )
+            steps.append(encode_primitive)
+        elif step.kind == 'property':
+            def encode_property(
+                writer: JsonWriter,
+                obj: Serializable,
+                prop_name: str = step.prop_name,
+                write_property: Callable = _property_writer(step.data_type)
+            ) -> None:
+                value = getattr(obj, prop_name, None)
+                if value is None:
+                    writer.json[prop_name] = None
+                else:
+                    write_property(writer, prop_name, value)
+            steps.append(encode_property)
+        else:
+            def encode_verbatim(writer: JsonWriter, obj: Serializable, get_value: Callable = step.get_value) -> None:
+                writer.json = to_json(get_value(obj), classes=writer.classes, columnar=writer.columnar)
+            steps.append(encode_verbatim)
+    
+    def encode(writer: JsonWriter, obj: Serializable) -> None:
+        for encode_step in steps:
+            encode_step(writer, obj)
+    return encode
 
 
-def to_json(obj: Any, path: Optional[List[Any]] = None) -> Any:
+def _compile_decoder(plan: ClassPlan) -> Callable[[JsonReader, Serializable], None]:
+    """
+    Compile a ClassPlan into a flat decoder that populates an object from JsonReader.json.
+    
+    Args:
+        plan: The plan to compile
+        
+    Returns:
+        A function taking the reader and the object being populated
+    """
+    steps: List[Callable[[JsonReader, Serializable], None]] = []
+    for step in plan.steps:
+        if step.kind == 'primitive':
+            def decode_primitive(
+                reader: JsonReader,
+                obj: Serializable,
+                prop_name: str = step.prop_name,
+                from_string: Optional[Callable[[str], Any]] = step.from_string
+            ) -> None:
+                json_data = reader.json
+                if prop_name not in json_data:
+                    return
+                value = json_data[prop_name]
+                if from_string is not None and isinstance(value, str):
+                    try:
+                        value = from_string(value)
+                    except Exception:
+                        pass
+                setattr(obj, prop_name, value)
+            steps.append(decode_primitive)
+        elif step.kind == 'property':
+            def decode_property(
+                reader: JsonReader,
+                obj: Serializable,
+                prop_name: str = step.prop_name,
+                key_type: Optional[type] = step.key_type,
+                read_property: Callable = _property_reader(step.data_type)
+            ) -> None:
+                json_data = reader.json
+                if prop_name not in json_data:
+                    return
+                json_value = json_data[prop_name]
+                if json_value is None:
+                    setattr(obj, prop_name, None)
+                elif type(json_value) is dict and COLUMNS_KEY in json_value:
+                    setattr(obj, prop_name, read_columns(reader, json_value))
+                else:
+                    read_property(reader, obj, prop_name, json_value, key_type)
+            steps.append(decode_property)
+        else:
+            def decode_verbatim(reader: JsonReader, obj: Serializable, set_value: Callable = step.set_value) -> None:
+                set_value(obj, from_json(reader.json, reader.classes))
+            steps.append(decode_verbatim)
+    
+    def decode(reader: JsonReader, obj: Serializable) -> None:
+        for decode_step in steps:
+            decode_step(reader, obj)
+    return decode
+
+
+# Property writers/readers by declared property type, filled in on first use
+_WRITE_PROPERTY: Dict[Any, Callable[[JsonWriter, str, Any], None]] = {}
+_READ_PROPERTY: Dict[Any, Callable[[JsonReader, Serializable, str, Any, Optional[type]], None]] = {}
+
+# Conversions from JSON object keys to typed map keys
+_KEY_CONVERTERS: Dict[Any, Callable[[str], Any]] = {int: int, float: float}
+
+def _property_writer(prop_type: Any) -> Callable[[JsonWriter, str, Any], None]:
+    """
+    Get the JsonWriter method that writes properties of a declared type.
+    
+    Args:
+        prop_type: The declared type of the property
+        
+    Returns:
+        The unbound writer method
+    """
+    write_property = _WRITE_PROPERTY.get(prop_type)
+    if write_property is None:
+        if prop_type is list or prop_type is tuple:
+            write_property = JsonWriter._write_array
+        elif prop_type is dict:
+            write_property = JsonWriter._write_map
+        elif isinstance(prop_type, type) and Registry.is_serializable_type(prop_type):
+            write_property = JsonWriter._write_scalar
+        else:
+            write_property = JsonWriter._write_dynamic
+        _WRITE_PROPERTY[prop_type] = write_property
+    return write_property
+
+
+def _property_reader(prop_type: Any) -> Callable[[JsonReader, Serializable, str, Any, Optional[type]], None]:
+    """
+    Get the JsonReader method that reads properties of a declared type.
+    
+    Args:
+        prop_type: The declared type of the property
+        
+    Returns:
+        The unbound reader method
+    """
+    read_property = _READ_PROPERTY.get(prop_type)
+    if read_property is None:
+        if prop_type is list or prop_type is tuple:
+            read_property = JsonReader._read_array
+        elif prop_type is dict:
+            read_property = JsonReader._read_map
+        elif prop_type is set:
+            read_property = JsonReader._read_set
+        elif prop_type is frozenset:
+            read_property = JsonReader._read_frozenset
+        else:
+            read_property = JsonReader._read_dynamic
+        _READ_PROPERTY[prop_type] = read_property
+    return read_property
+
+
+def _serializable_to_json(obj: Any, path: List[Any], classes: Optional[Dict[str, int]], columnar: bool) -> Any:
+    _untracked_writes.count += 1
+    return JsonWriter(obj, classes=classes, columnar=columnar).write()
+
+
+def _sequence_to_json(obj: Any, path: List[Any], classes: Optional[Dict[str, int]], columnar: bool) -> Any:
+    return [to_json(item, path + [i], classes, columnar) for i, item in enumerate(obj)]
+
+
+def _set_to_json(obj: Any, path: List[Any], classes: Optional[Dict[str, int]], columnar: bool) -> Any:
+    return {
+        '__native__': 'Set',
+        '__values__': [to_json(item, path + [i], classes, columnar) for i, item in enumerate(obj)]
+    }
+
+
+def _dict_to_json(obj: Any, path: List[Any], classes: Optional[Dict[str, int]], columnar: bool) -> Any:
+    result = {'__native__': 'Dict'}
+    for key, value in obj.items():
+        result[str(key)] = to_json(value, path + [key], classes, columnar)
+    return result
+
+
+def _native_to_json(obj: Any, path: List[Any], classes: Optional[Dict[str, int]], columnar: bool) -> Any:
+    return obj
+
+
+def _other_to_json(obj: Any, path: List[Any], classes: Optional[Dict[str, int]], columnar: bool) -> Any:
+    # For other types, convert to string representation
+    return str(obj)
+
+
+# to_json() converters by exact value type, filled in on first use
+_TO_JSON: Dict[type, Callable[[Any, List[Any], Optional[Dict[str, int]], bool], Any]] = {
+    str: _native_to_json,
+    int: _native_to_json,
+    float: _native_to_json,
+    bool: _native_to_json,
+    type(None): _native_to_json,
+    list: _sequence_to_json,
+    tuple: _sequence_to_json,
+    set: _set_to_json,
+    frozenset: _set_to_json,
+    dict: _dict_to_json
+}
+
+def _to_json_handler(obj: Any) -> Callable[[Any, List[Any], Optional[Dict[str, int]], bool], Any]:
+    """
+    Get the to_json() converter for the type of a value, resolving and caching it on first use.
+    
+    Args:
+        obj: A value of the type to resolve
+        
+    Returns:
+        The converter function
+    """
+    obj_type = type(obj)
+    handler = _TO_JSON.get(obj_type)
+    if handler is None:
+        if Registry.is_serializable(obj):
+            handler = _serializable_to_json
+        elif isinstance(obj, (list, tuple)):
+            handler = _sequence_to_json
+        elif isinstance(obj, (set, frozenset)):
+            handler = _set_to_json
+        elif isinstance(obj, dict):
+            handler = _dict_to_json
+        elif isinstance(obj, (int, float, str, bool)):
+            handler = _native_to_json
+        else:
+            handler = _other_to_json
+        _TO_JSON[obj_type] = handler
+    return handler
+
+
+@scoped
+def to_json(
+    obj: Any,
+    path: Optional[List[Any]] = None,
+    classes: Optional[Dict[str, int]] = None,
+    columnar: bool = False,
+    fragments: Optional[FragmentCache] = None
+) -> Any:
     """
     Convert a Python object to a JSON-serializable representation.
     
     Args:
         obj: The object to convert
         path: Optional path to the object in the object graph (for debugging)
+        classes: Optional class table for dictionary mode (see JsonWriter)
+        columnar: If True, write homogeneous object lists as columns (see JsonWriter)
+        fragments: Optional cache of the JSON of unchanged objects, used when obj
+                   is Serializable; the result then shares parts with the cache
+                   and must not be modified
         
     Returns:
         A JSON-serializable representation of the object
     """
-    use_path = path or []
-    
-    if isinstance(obj, Serializable):
-        writer = JsonWriter(obj)
-        obj.visit(writer)
-        return writer.json
-    elif isinstance(obj, (list, tuple)):
-        return [to_json(item, use_path + [i]) for i, item in enumerate(obj)]
-    elif isinstance(obj, set):
-        return {
-            '__native__': 'Set',
-            '__values__': [to_json(item, use_path + [i]) for i, item in enumerate(obj)]
-        }
-    elif isinstance(obj, dict):
-        result = {'__native__': 'Dict'}
-        for key, value in obj.items():
-            result[str(key)] = to_json(value, use_path + [key])
-        return result
-    elif isinstance(obj, (int, float, str, bool)) or obj is None:
-        return obj
-    else:
-        # For other types, convert to string representation
-        return str(obj)
+    if fragments is not None and Registry.is_serializable(obj):
+        return fragments.write(obj, classes, columnar)
+    handler = _TO_JSON.get(type(obj)) or _to_json_handler(obj)
+    return handler(obj, path or [], classes, columnar)
+
 
+def _dict_from_json(json_data: Dict[str, Any], classes: Optional[List[str]]) -> Any:
+    if '__class__' in json_data:
+        obj = JsonReader(json_data, classes=classes).read()
+        if obj is not None:
+            return obj
+    if '__native__' in json_data:
+        native_type = json_data['__native__']
+        if native_type == 'Set':
+            return set(from_json(json_data['__values__'], classes))
+        elif native_type == 'Dict':
+            result = {}
+            for key, value in json_data.items():
+                if key not in ('__native__',):
+                    result[key] = from_json(value, classes)
+            return result
+    
+    # Regular dictionary
+    return {key: from_json(value, classes) for key, value in json_data.items()}
+
+
+def _list_from_json(json_data: List[Any], classes: Optional[List[str]]) -> Any:
+    return [from_json(item, classes) for item in json_data]
+
+
+# from_json() converters by JSON container type; other values are returned as-is
+_FROM_JSON: Dict[type, Callable[[Any, Optional[List[str]]], Any]] = {
+    dict: _dict_from_json,
+    list: _list_from_json
+}
 
-def from_json(json_data: Any) -> Any:
+def from_json(json_data: Any, classes: Optional[List[str]] = None) -> Any:
     """
     Convert a JSON-serializable representation back to a Python object.
     
     Args:
         json_data: The JSON data to convert
+        classes: Optional class table of a dictionary mode document
         
     Returns:
         The reconstructed Python object
     """
-    if json_data is None:
-        return None
-    
-    if isinstance(json_data, dict):
-        if '__class__' in json_data and Registry.has_builder(json_data['__class__']):
-            reader = JsonReader(json_data)
-            return reader.read()
-        elif '__native__' in json_data:
-            native_type = json_data['__native__']
-            if native_type == 'Set':
-                return set(from_json(json_data['__values__']))
-            elif native_type == 'Dict':
-                result = {}
-                for key, value in json_data.items():
-                    if key not in ('__native__',):
-                        result[key] = from_json(value)
-                return result
-        
-        # Regular dictionary
-        return {key: from_json(value) for key, value in json_data.items()}
-    elif isinstance(json_data, list):
-        return [from_json(item) for item in json_data]
-    else:
-        # Primitive types
-        return json_data
-
+    handler = _FROM_JSON.get(type(json_data))
+    if handler is None:
+        if isinstance(json_data, dict):
+            handler = _dict_from_json
+        elif isinstance(json_data, list):
+            handler = _list_from_json
+        else:
+            # Primitive types
+            return json_data
+    return handler(json_data, classes)
 
-def serialize(obj: Serializable) -> str:
+@scoped
+def serialize(
+    obj: Serializable,
+    dictionary: bool = False,
+    columnar: bool = False,
+    fragments: Optional[FragmentCache] = None
+) -> str:
     """
     Serialize a Serializable object to a JSON string.
     
+    In dictionary mode the document is wrapped as
+    {"__classes__": [class specs...], "__root__": ...}: every object refers to
+    its class by index into "__classes__", and "__is_ref__" is omitted unless
+    it is true.
+    
     Args:
         obj: The object to serialize
+        dictionary: If True, write the compact dictionary mode document
+        columnar: If True, write list properties holding objects of a single
+                  class one column per property
+        fragments: Optional cache of the JSON of unchanged objects (see
+                   fragments.FragmentCache)
         
     Returns:
         A JSON string representation of the object
     """
-    return json.dumps(to_json(obj))
+    if fragments is not None and Registry.is_serializable(obj):
+        return fragments.serialize(obj, dictionary, columnar)
+    if not dictionary:
+        return json.dumps(to_json(obj, columnar=columnar))
+    
+    classes: Dict[str, int] = {}
+    root = to_json(obj, classes=classes, columnar=columnar)
+    return json.dumps({'__classes__': list(classes), '__root__': root})
 
 
-def deserialize(json_str: str, class_spec: Optional[str] = None) -> Optional[Serializable]:
+def deserialize(
+    json_str: str,
+    class_spec: Optional[str] = None,
+    paths: Optional[Iterable[str]] = None
+) -> Optional[Serializable]:
     """
     Deserialize a JSON string to a Serializable object.
     
+    Both plain documents and dictionary mode documents (see serialize) are accepted.
+    
     Args:
         json_str: The JSON string to deserialize
         class_spec: Optional class specification to override the one in the JSON
+        paths: Optional property paths to populate, e.g. ["name", "address.city",
+               "contacts[*]"]; other properties keep their defaults (see projection)
         
     Returns:
         The deserialized object, or None if deserialization failed
     """
     json_data = json.loads(json_str)
     
+    classes: Optional[List[str]] = None
+    if isinstance(json_data, dict) and '__classes__' in json_data and '__root__' in json_data:
+        classes = json_data['__classes__']
+        json_data = json_data['__root__']
+    
     if class_spec:
         if isinstance(json_data, dict):
             json_data['__class__'] = class_spec
         else:
             return None
     
-    return from_json(json_data)
\ No newline at end of file
+    if paths is not None and isinstance(json_data, dict):
+        # projection imports this module
+        from .projection import read_projected
+        return read_projected(json_data, paths, classes)
+    return from_json(json_data, classes)
+
+
+def _iterencode(value: Any, depth: int = ASYNC_ENCODE_DEPTH) -> Iterator[str]:
+    """
+    Encode a JSON value in pieces that join to the text json.dumps() produces.
+
+    Lists and dicts down to `depth` levels are encoded one item at a time, so
+    that no single json.dumps() call holds the GIL for long. The default
+    splits the list properties of the root object into their items; deeper
+    levels are cheap to split only when they hold few, large values.
+
+    Args:
+        value: The JSON value
+        depth: Number of container levels to encode item by item
+
+    Returns:
+        An iterator of text pieces
+    """
+    if depth <= 0 or not value or not isinstance(value, (list, dict)):
+        yield json.dumps(value)
+    elif isinstance(value, list):
+        yield '['
+        for index, item in enumerate(value):
+            if index:
+                yield ', '
+            yield from _iterencode(item, depth - 1)
+        yield ']'
+    elif not all(isinstance(key, str) for key in value):
+        yield json.dumps(value)
+    else:
+        yield '{'
+        for index, (key, item) in enumerate(value.items()):
+            yield (', ' if index else '') + json.dumps(key) + ': '
+            yield from _iterencode(item, depth - 1)
+        yield '}'
+
+
+@scoped
+def _write_text(obj: Any, stream: IO[str], dictionary: bool, columnar: bool, chunk_size: int) -> None:
+    """
+    Executor thread: write the text serialize() produces to a text stream in chunks.
+
+    Plain documents are written by a JsonStreamWriter as they are visited;
+    dictionary mode and columnar documents are converted by to_json() and
+    then encoded in pieces.
+
+    Args:
+        obj: The object to serialize
+        stream: A text stream
+        dictionary: If True, write the compact dictionary mode document
+        columnar: If True, write list properties holding objects of a single
+                  class one column per property
+        chunk_size: Number of characters to buffer before writing to the stream
+    """
+    if not dictionary and not columnar:
+        # streaming imports this module
+        from .streaming import JsonStreamWriter
+        JsonStreamWriter(stream, chunk_size=chunk_size, binary=False).write(obj)
+        return
+
+    if dictionary:
+        classes: Dict[str, int] = {}
+        root = to_json(obj, classes=classes, columnar=columnar)
+        pieces = itertools.chain(
+            ['{"__classes__": ', json.dumps(list(classes)), ', "__root__": '], _iterencode(root), ['}']
+        )
+    else:
+        pieces = _iterencode(to_json(obj, columnar=columnar))
+
+    buffer: List[str] = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            stream.write(''.join(buffer))
+            buffer = []
+            buffered = 0
+    if buffer:
+        stream.write(''.join(buffer))
+
+
+async def serialize_async(
+    obj: Serializable,
+    dictionary: bool = False,
+    columnar: bool = False,
+    executor: Optional[Executor] = None
+) -> str:
+    """
+    Serialize a Serializable object to a JSON string without blocking the event loop.
+
+    The object is serialized in an executor thread, in small enough steps
+    that the event loop keeps running other tasks in the meantime. The result
+    is the same as serialize() returns. The object must not be modified until
+    the serialization is complete.
+
+    Args:
+        obj: The object to serialize
+        dictionary: If True, write the compact dictionary mode document
+        columnar: If True, write list properties holding objects of a single
+                  class one column per property
+        executor: Optional executor to run the serialization (default: the
+                  event loop's default executor)
+
+    Returns:
+        A JSON string representation of the object
+    """
+    loop = asyncio.get_running_loop()
+    stream = io.StringIO()
+    await loop.run_in_executor(
+        executor, functools.partial(_write_text, obj, stream, dictionary, columnar, ASYNC_CHUNK_SIZE)
+    )
+    return stream.getvalue()
+
+
+async def deserialize_async(
+    json_str: Union[str, bytes],
+    class_spec: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    paths: Optional[Iterable[str]] = None
+) -> Optional[Serializable]:
+    """
+    Deserialize a JSON string to a Serializable object without blocking the event loop.
+
+    Args:
+        json_str: The JSON string to deserialize
+        class_spec: Optional class specification to override the one in the JSON
+        executor: Optional executor to run the deserialization (default: the
+                  event loop's default executor)
+        paths: Optional property paths to populate (see deserialize)
+
+    Returns:
+        The deserialized object, or None if deserialization failed
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(deserialize, json_str, class_spec, paths))
+
+
+class _LoopStream:
+    """
+    Text stream that hands what an executor thread writes to an asyncio.StreamWriter as UTF-8.
+
+    Every write() blocks the thread until the StreamWriter has drained, so the
+    serialization runs no further ahead of the connection than one chunk.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop):
+        """
+        Args:
+            writer: The StreamWriter to write to
+            loop: The event loop the StreamWriter belongs to
+        """
+        self.writer = writer
+        self.loop = loop
+        self.cancelled = False
+
+    def write(self, text: str) -> int:
+        """
+        Write text to the StreamWriter and wait for it to drain.
+
+        Args:
+            text: The text to write
+
+        Returns:
+            The number of characters written
+
+        Raises:
+            asyncio.CancelledError: If the task awaiting write_async() was cancelled
+        """
+        if self.cancelled:
+            raise asyncio.CancelledError()
+        asyncio.run_coroutine_threadsafe(self._send(text.encode('utf-8')), self.loop).result()
+        return len(text)
+
+    async def _send(self, data: bytes) -> None:
+        self.writer.write(data)
+        await self.writer.drain()
+
+
+async def write_async(
+    obj: Any,
+    writer: asyncio.StreamWriter,
+    dictionary: bool = False,
+    columnar: bool = False,
+    executor: Optional[Executor] = None,
+    chunk_size: int = ASYNC_CHUNK_SIZE
+) -> None:
+    """
+    Serialize an object as UTF-8 JSON to an asyncio.StreamWriter without blocking the event loop.
+
+    The object is serialized in an executor thread and its output is written
+    to the StreamWriter chunk by chunk, waiting for the StreamWriter to drain
+    after every chunk. The text is the same as serialize() produces. The
+    object must not be modified until the write is complete.
+
+    Args:
+        obj: The object to serialize
+        writer: The StreamWriter to write to; it is drained but not closed
+        dictionary: If True, write the compact dictionary mode document
+        columnar: If True, write list properties holding objects of a single
+                  class one column per property
+        executor: Optional executor to run the serialization (default: the
+                  event loop's default executor)
+        chunk_size: Number of characters to write to the StreamWriter at a time
+    """
+    loop = asyncio.get_running_loop()
+    stream = _LoopStream(writer, loop)
+    try:
+        await loop.run_in_executor(
+            executor, functools.partial(_write_text, obj, stream, dictionary, columnar, chunk_size)
+        )
+    except asyncio.CancelledError:
+        # Stop the executor thread at its next write
+        stream.cancelled = True
+        raise
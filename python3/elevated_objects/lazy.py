@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+"""
+Lazy deserialization: nested objects are decoded on first use.
+
+deserialize_lazy() decodes only the properties of the root object. Every
+nested Serializable object, whether held by a property, a list element or
+a map value, is represented by a LazyProxy that holds the object's JSON and
+decodes it, through the Builder that Registry.create_builder() returns for
+its class, the first time one of its attributes is read or written. The
+properties of a decoded object are in turn decoded lazily.
+
+A proxy forwards attribute access to the decoded object and can itself be
+visited and serialized. All the proxies for one object ID in a document
+are the same proxy, so references within the document are preserved.
+"""
+
+from __future__ import annotations
+import json
+from typing import Dict, List, Any, Optional, Union
+
+from .serializable import Serializable, Visitor
+from .json import JsonReader, DefinitionIndex, from_json
+
+# Reference table: objects and proxies by class spec and object ID
+RefTable = Dict[str, Dict[Union[str, int], Any]]
+
+class LazyProxy:
+    """
+    Stand-in for a nested object that has not been decoded yet.
+
+    Reading or writing any attribute other than get_class_spec() and visit()
+    decodes the object. Code that reads many attributes of a proxy should
+    call materialize() once and use the object it returns.
+    """
+
+    __slots__ = ('_class_spec', '_json', '_reader', '_target', '__weakref__')
+
+    # Tells PlanCache to look at the decoded object instead of the proxy
+    __elevated_proxy__ = True
+
+    def __init__(self, class_spec: str, json_data: Dict[str, Any], reader: LazyReader):
+        """
+        Args:
+            class_spec: The class spec of the object
+            json_data: The JSON of the object
+            reader: The reader that found the object, whose tables the object is decoded with
+        """
+        object.__setattr__(self, '_class_spec', class_spec)
+        object.__setattr__(self, '_json', json_data)
+        object.__setattr__(self, '_reader', reader)
+        object.__setattr__(self, '_target', None)
+
+    def get_class_spec(self) -> str:
+        """
+        Get the class spec of the object without decoding it.
+
+        Returns:
+            The class spec
+        """
+        return self._class_spec
+
+    def visit(self, visitor: Visitor[Any], identity_only: bool = False) -> None:
+        """
+        Decode the object and let it accept a visitor.
+
+        Args:
+            visitor: The visitor to accept
+            identity_only: If True, only visit properties that participate in the object's identity
+        """
+        self._materialize().visit(visitor, identity_only)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._materialize(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._materialize(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._materialize(), name)
+
+    def __repr__(self) -> str:
+        if self._target is None:
+            return f"<LazyProxy {self._class_spec} {self._json.get('__id__')!r}>"
+        return repr(self._target)
+
+    def __str__(self) -> str:
+        return str(self._materialize())
+
+    def _materialize(self) -> Serializable:
+        """
+        Decode the object, if it has not been decoded yet.
+
+        Returns:
+            The decoded object
+        """
+        target = self._target
+        if target is None:
+            reader = self._reader
+            target = LazyReader(
+                self._json, reader.refs, reader.classes, reader.definitions, proxy=self
+            ).read()
+            object.__setattr__(self, '_target', target)
+            # The JSON and the reader are not needed any more
+            object.__setattr__(self, '_json', None)
+            object.__setattr__(self, '_reader', None)
+        return target
+
+
+class LazyReader(JsonReader):
+    """
+    JsonReader that decodes the properties of one object and defers every nested object to a LazyProxy.
+    """
+
+    def __init__(
+        self,
+        json_data: Any,
+        refs: Optional[RefTable] = None,
+        classes: Optional[List[str]] = None,
+        definitions: Optional[DefinitionIndex] = None,
+        deferred: bool = False,
+        proxy: Optional[LazyProxy] = None
+    ):
+        """
+        Args:
+            json_data: The JSON data to deserialize
+            refs: Optional dictionary to track deserialized objects and proxies by class and id
+            classes: Optional class table of a dictionary mode document
+            definitions: The definitions index of the document; json_data is
+                         taken to be the whole document if None
+            deferred: If True, read() returns a proxy instead of decoding the object
+            proxy: The proxy being decoded, which is already in the reference table
+        """
+        super().__init__(json_data, refs, classes)
+        self.definitions = definitions if definitions is not None else DefinitionIndex(json_data)
+        self.deferred = deferred
+        self.proxy = proxy
+
+    def begin(self, obj: Serializable, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object.
+
+        The object decoded for a proxy is not entered in the reference
+        table, which keeps referring to the proxy.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        if self.proxy is not None and self.obj is None:
+            self.obj = obj
+            self.is_ref = False
+            return
+        super().begin(obj, parent_prop_name)
+
+    def read(self) -> Any:
+        """
+        Decode the object, or get the proxy for it if this reader is deferred.
+
+        Returns:
+            The object or proxy, or None if the JSON is not an object of a registered class
+        """
+        if not self.deferred:
+            return super().read()
+
+        json_data = self.json
+        class_spec = self._class_spec(json_data)
+        if class_spec is None:
+            return None
+        object_id = json_data.get('__id__')
+        if object_id is None:
+            return LazyProxy(class_spec, json_data, self)
+
+        by_id = self.refs.setdefault(class_spec, {})
+        found = by_id.get(object_id)
+        if found is not None:
+            return found
+        if json_data.get('__is_ref__'):
+            definition = self.definitions.find(self, class_spec, object_id)
+            # Indexing decodes columnar batches, which may define the object
+            found = by_id.get(object_id)
+            if found is not None:
+                return found
+            if definition is not None:
+                json_data = definition
+        proxy = by_id[object_id] = LazyProxy(class_spec, json_data, self)
+        return proxy
+
+    def _child(self, json_data: Any) -> JsonReader:
+        """
+        Create a deferred reader for a nested object that shares this reader's tables.
+
+        Args:
+            json_data: The JSON data of the nested object
+
+        Returns:
+            A reader whose read() returns a proxy
+        """
+        return LazyReader(json_data, self.refs, self.classes, self.definitions, deferred=True)
+
+
+def materialize(value: Any) -> Any:
+    """
+    Get the decoded object behind a proxy.
+
+    Args:
+        value: A LazyProxy, or any other value
+
+    Returns:
+        The decoded object if value is a proxy, otherwise value itself
+    """
+    if type(value) is LazyProxy:
+        return value._materialize()
+    return value
+
+
+def deserialize_lazy(json_str: str, class_spec: Optional[str] = None) -> Any:
+    """
+    Deserialize a JSON string, decoding nested objects only when they are used.
+
+    Both plain documents and dictionary mode documents (see serialize) are accepted.
+
+    Args:
+        json_str: The JSON string to deserialize
+        class_spec: Optional class specification to override the one in the JSON
+
+    Returns:
+        The root object, whose nested objects are LazyProxy instances, or
+        None if deserialization failed
+    """
+    json_data = json.loads(json_str)
+
+    classes: Optional[List[str]] = None
+    if isinstance(json_data, dict) and '__classes__' in json_data and '__root__' in json_data:
+        classes = json_data['__classes__']
+        json_data = json_data['__root__']
+
+    if class_spec:
+        if isinstance(json_data, dict):
+            json_data['__class__'] = class_spec
+        else:
+            return None
+
+    if not isinstance(json_data, dict):
+        return from_json(json_data, classes)
+    return LazyReader(json_data, classes=classes).read()
@@ -0,0 +1,1030 @@
+#!/usr/bin/env python3
+
+"""
+Parallel serialization of large object graphs across a process pool.
+
+serialize_parallel() produces exactly the same JSON text as json.serialize(),
+with the work split across worker processes:
+
+- A top-level list, tuple, set or dict is split into chunks of elements.
+  to_json() gives every top-level element its own reference table, so the
+  chunks are independent and their output is simply concatenated.
+- A Serializable root has each of its large list properties split into
+  chunks. All objects below the root share one reference table, so the
+  chunks are written in two passes. First every worker collects the
+  (class, ID) keys its chunk reaches; from these the calling process works
+  out which keys each chunk will find already written by the part of the
+  document before it. Then every worker writes its chunk with its reference
+  table seeded with those keys, writing them as references exactly as the
+  sequential writer would.
+
+Every writer logs the references it wrote for seeded keys and the objects
+it defined. Replaying the logs in document order checks the seeding against
+the sequential result; if they disagree, which can only happen when
+distinct objects share an ID, the object is serialized in the calling
+process instead.
+
+When serialize_parallel() creates its own pool on a platform that supports
+fork, the workers read the object graph from the forked memory. Otherwise
+chunks are sent to the workers by pickling, so objects must be picklable.
+
+deserialize_parallel() reads a batch of independent documents. Every worker
+imports the modules that register builders once, when it starts, then reads
+chunks of documents with one reference table per chunk and sends the objects
+back pickled. A final pass in the calling process merges objects with the
+same class and ID that were read by different workers.
+"""
+
+from __future__ import annotations
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, List, Any, Set, Optional, Tuple, Union, Iterable, NamedTuple
+
+from .serializable import Serializable, Visitor
+from .registry import Registry
+from .plans import PlanCache
+from .identity import IdentityCache, scoped
+from .json import JsonWriter, JsonReader, to_json, from_json, serialize
+
+# Containers and list properties with fewer items are serialized in the calling process
+DEFAULT_MIN_ITEMS = 1024
+
+# Number of chunks per worker, so that uneven chunks still keep every worker busy
+CHUNKS_PER_WORKER = 4
+
+# (class spec, object ID) of an object written with a shared reference table
+RefKey = Tuple[str, Any]
+
+# Log entry of a _SharedWriter: (True, key) for a definition, (False, key) for a
+# reference to a seeded key, or (None, index) where split list property `index` goes
+LogEntry = Tuple[Optional[bool], Any]
+
+# Reference table of a reader: objects by class spec and object ID
+RefTable = Dict[str, Dict[Union[str, int], Any]]
+
+# Placeholder object for seeded keys in a reference table
+_ELSEWHERE = object()
+
+# Objects shared with forked workers, by token
+_FORKED: Dict[int, Any] = {}
+
+# Token of the next object shared with forked workers
+_tokens = itertools.count()
+
+class _Unsupported(Exception):
+    """
+    Raised when a graph cannot be split without changing the serialized output.
+    """
+    pass
+
+
+class _Items(NamedTuple):
+    """
+    A chunk of items read from an object shared with forked workers.
+    """
+    token: int
+    prop_name: Optional[str]
+    start: int
+    stop: int
+
+
+def _items(chunk: Union[_Items, List[Any]]) -> List[Any]:
+    """
+    Worker: get the items of a chunk.
+
+    Args:
+        chunk: The items, or where to find them in a forked object
+
+    Returns:
+        The items
+    """
+    if not isinstance(chunk, _Items):
+        return chunk
+    source = _FORKED[chunk.token]
+    if chunk.prop_name is not None:
+        source = getattr(source, chunk.prop_name)
+    elif isinstance(source, dict):
+        source = _FORKED[chunk.token] = list(source.values())
+    elif isinstance(source, set):
+        source = _FORKED[chunk.token] = list(source)
+    return source[chunk.start:chunk.stop]
+
+
+class _SharedWriter(JsonWriter):
+    """
+    JsonWriter that logs the definitions and seeded references it writes.
+    """
+
+    def __init__(
+        self,
+        obj: Serializable,
+        refs: Dict[str, Dict[Union[str, int], Any]],
+        classes: Optional[Dict[str, int]],
+        columnar: bool,
+        log: List[LogEntry]
+    ):
+        """
+        Args:
+            obj: The object to serialize
+            refs: The shared reference table, possibly seeded with _ELSEWHERE
+            classes: Optional class table for dictionary mode
+            columnar: If True, write homogeneous object lists as columns
+            log: The log shared by all writers of the reference table
+        """
+        super().__init__(obj, refs, classes, columnar)
+        self.log = log
+
+    def begin(self, obj: Serializable, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object, logging its definition or seeded reference.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        super().begin(obj, parent_prop_name)
+        object_id = self.json.get('__id__')
+        if object_id is None:
+            return
+        class_spec = obj.get_class_spec()
+        if not self.is_ref:
+            self.log.append((True, (class_spec, object_id)))
+        elif self.refs[class_spec][object_id] is _ELSEWHERE:
+            self.log.append((False, (class_spec, object_id)))
+
+    def _child(self, obj: Serializable) -> JsonWriter:
+        """
+        Create a writer for a nested object that shares this writer's tables and log.
+
+        Args:
+            obj: The nested object
+
+        Returns:
+            A writer for the nested object
+        """
+        return _SharedWriter(obj, self.refs, self.classes, self.columnar, self.log)
+
+
+class _Split:
+    """
+    A list property of the root being written by the workers.
+    """
+
+    def __init__(self, token: str, futures: List[Future], tables: Optional[List[List[str]]]):
+        """
+        Args:
+            token: The placeholder written in place of the property value
+            futures: The futures of the chunk writes
+            tables: In dictionary mode, the predicted class tables (see _predict_classes)
+        """
+        self.token = token
+        self.futures = futures
+        self.tables = tables
+
+
+class _RootWriter(_SharedWriter):
+    """
+    Writer for the root object that hands its large list properties to worker processes.
+    """
+
+    def __init__(
+        self,
+        obj: Serializable,
+        classes: Optional[Dict[str, int]],
+        executor: Executor,
+        token: Optional[int],
+        max_workers: Optional[int],
+        min_items: int,
+        chunk_size: int
+    ):
+        """
+        Args:
+            obj: The root object
+            classes: Class table for dictionary mode, or None
+            executor: The executor that runs the workers
+            token: The token of the root in forked workers, or None to pickle chunks
+            max_workers: The number of workers, or None for the CPU count
+            min_items: Minimum length of a list property that is split
+            chunk_size: Number of items per chunk, or 0 to derive it from the property length
+        """
+        super().__init__(obj, {}, classes, False, [])
+        self.executor = executor
+        self.token = token
+        self.max_workers = max_workers
+        self.min_items = min_items
+        self.chunk_size = chunk_size
+        self.splits: List[_Split] = []
+
+    def write(self) -> Any:
+        """
+        Write the root object, submitting its large list properties to the workers.
+
+        Returns:
+            The JSON representation of the root, with a placeholder string for
+            every split list property
+        """
+        if self.json is None:
+            # Visit directly so that property() sees every property of the root
+            self.obj.visit(self)
+        return self.json
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Write a complex property of the root, splitting it if it is a large list.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        value = getattr(target, prop_name, None)
+        if (self.is_ref or target is not self.obj or type(value) not in (list, tuple)
+                or len(value) < self.min_items):
+            super().property(prop_type, target, prop_name, element_builder_type, key_type)
+            return
+
+        size = _chunk_size(len(value), self.max_workers, self.chunk_size)
+        if self.token is None:
+            chunks: List[Any] = [list(value[start:start + size]) for start in range(0, len(value), size)]
+        else:
+            chunks = [_Items(self.token, prop_name, start, start + size) for start in range(0, len(value), size)]
+
+        # First pass: the keys and classes each chunk reaches
+        reached = [future.result() for future in [self.executor.submit(_collect, chunk) for chunk in chunks]]
+
+        # Seed each chunk with the keys written before it, and the class table so far
+        seen = {(class_spec, object_id) for class_spec, by_id in self.refs.items() for object_id in by_id}
+        tables = _predict_classes(list(self.classes), reached) if self.classes is not None else None
+        futures: List[Future] = []
+        for index, (chunk, (keys, _)) in enumerate(zip(chunks, reached)):
+            seeds = [key for key in keys if key in seen]
+            futures.append(self.executor.submit(
+                _write_chunk, chunk, seeds, tables[index] if tables is not None else None
+            ))
+            seen.update(keys)
+
+        # The rest of the root is written as if the chunks were written already
+        for class_spec, object_id in seen:
+            self.refs.setdefault(class_spec, {}).setdefault(object_id, _ELSEWHERE)
+        if tables is not None:
+            for class_spec in tables[-1]:
+                self.classes.setdefault(class_spec, len(self.classes))
+
+        token = f"\x00elevated_objects.parallel:{len(self.splits)}\x00"
+        self.splits.append(_Split(token, futures, tables))
+        self.log.append((None, len(self.splits) - 1))
+        self.json[prop_name] = token
+
+    def _child(self, obj: Serializable) -> JsonWriter:
+        """
+        Create a writer for a nested object that shares this writer's tables and log.
+
+        Args:
+            obj: The nested object
+
+        Returns:
+            A writer for the nested object
+        """
+        return _SharedWriter(obj, self.refs, self.classes, self.columnar, self.log)
+
+
+def _collect_begin(obj: Serializable, keys: Dict[RefKey, None], classes: Dict[str, None]) -> bool:
+    """
+    Record an object reached by the first pass.
+
+    Args:
+        obj: The object
+        keys: The keys reached so far, in order
+        classes: The class specs reached so far, in order
+
+    Returns:
+        True if the object's properties must be collected, False if its key was already reached
+    """
+    class_spec = obj.get_class_spec()
+    classes[class_spec] = None
+    object_id = IdentityCache.get_id(obj)
+    if object_id:
+        key = (class_spec, object_id)
+        if key in keys:
+            return False
+        keys[key] = None
+    return True
+
+
+def _collect_value(value: Any, keys: Dict[RefKey, None], classes: Dict[str, None]) -> None:
+    """
+    Record the objects reachable from a complex property value, as JsonWriter.property() would write them.
+
+    Args:
+        value: The property value
+        keys: The keys reached so far, in order
+        classes: The class specs reached so far, in order
+    """
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif isinstance(value, dict):
+        items = value.values()
+    else:
+        items = (value,)
+    for item in items:
+        if not Registry.is_serializable(item):
+            continue
+        plan = PlanCache.get(item)
+        if plan is None:
+            item.visit(_KeyCollector(keys, classes))
+        elif _collect_begin(item, keys, classes):
+            for step in plan.steps:
+                if step.kind == 'property':
+                    _collect_value(getattr(item, step.prop_name, None), keys, classes)
+
+
+class _KeyCollector(Visitor[Any]):
+    """
+    Visitor that records the objects reached by the first pass, for classes without a compiled plan.
+    """
+
+    def __init__(self, keys: Dict[RefKey, None], classes: Dict[str, None]):
+        """
+        Args:
+            keys: The keys reached so far, in order
+            classes: The class specs reached so far, in order
+        """
+        self.keys = keys
+        self.classes = classes
+        self.is_ref = False
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Record the object; its properties are skipped if its key was already reached.
+        """
+        self.is_ref = not _collect_begin(obj, self.keys, self.classes)
+
+    def end(self, obj: Any) -> None:
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        pass
+
+    def verbatim(self, data_type: type, target: Serializable, get_value: Any, set_value: Any, get_prop_names: Any) -> None:
+        """
+        Verbatim values are written with their own reference table and are not collected.
+        """
+        pass
+
+    def primitive(self, data_type: type, target: Serializable, prop_name: str, from_string: Any = None) -> None:
+        """
+        Primitive values are written with their own reference table and are not collected.
+        """
+        pass
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Collect the objects reachable from a complex property.
+        """
+        if not self.is_ref:
+            _collect_value(getattr(target, prop_name, None), self.keys, self.classes)
+
+
+@scoped
+def _collect(chunk: Union[_Items, List[Any]]) -> Tuple[List[RefKey], List[str]]:
+    """
+    Worker: first pass over a chunk of a list property.
+
+    Args:
+        chunk: The items of the chunk
+
+    Returns:
+        The keys and the class specs the chunk reaches, in order
+    """
+    keys: Dict[RefKey, None] = {}
+    classes: Dict[str, None] = {}
+    _collect_value(_items(chunk), keys, classes)
+    return list(keys), list(classes)
+
+
+@scoped
+def _write_chunk(
+    chunk: Union[_Items, List[Any]],
+    seeds: List[RefKey],
+    classes: Optional[List[str]]
+) -> Tuple[str, List[LogEntry], Optional[List[str]]]:
+    """
+    Worker: write a chunk of a list property with a seeded reference table.
+
+    Args:
+        chunk: The items of the chunk
+        seeds: The keys already written before the chunk
+        classes: In dictionary mode, the class table before the chunk
+
+    Returns:
+        The JSON text of the items (without brackets), the writer log and, in
+        dictionary mode, the class table after the chunk
+    """
+    refs: Dict[str, Dict[Union[str, int], Any]] = {}
+    for class_spec, object_id in seeds:
+        refs.setdefault(class_spec, {})[object_id] = _ELSEWHERE
+    class_table = {class_spec: code for code, class_spec in enumerate(classes)} if classes is not None else None
+    log: List[LogEntry] = []
+    writer = _SharedWriter(None, refs, class_table, False, log)
+    text = ', '.join(json.dumps(writer._write_element(item)) for item in _items(chunk))
+    return text, log, list(class_table) if class_table is not None else None
+
+
+@scoped
+def _collect_independent(chunk: Union[_Items, List[Any]]) -> Tuple[List[RefKey], List[str]]:
+    """
+    Worker: first pass over a chunk of a top-level container, whose elements each have their own reference table.
+
+    Args:
+        chunk: The elements of the chunk
+
+    Returns:
+        No keys, and the class specs the chunk reaches, in order
+    """
+    classes: Dict[str, None] = {}
+    for item in _items(chunk):
+        _collect_value(item, {}, classes)
+    return [], list(classes)
+
+
+@scoped
+def _write_independent(
+    chunk: Union[_Items, List[Any]],
+    classes: Optional[List[str]],
+    columnar: bool
+) -> Tuple[List[str], Optional[List[str]]]:
+    """
+    Worker: convert the elements of a chunk of a top-level container with to_json().
+
+    Args:
+        chunk: The elements of the chunk
+        classes: In dictionary mode, the class table before the chunk
+        columnar: If True, write homogeneous object lists in the columnar layout
+
+    Returns:
+        The JSON text of every element and, in dictionary mode, the class table after the chunk
+    """
+    if classes is None:
+        return [json.dumps(to_json(item, columnar=columnar)) for item in _items(chunk)], None
+    class_table = {class_spec: code for code, class_spec in enumerate(classes)}
+    items_text = [json.dumps(to_json(item, classes=class_table, columnar=columnar)) for item in _items(chunk)]
+    return items_text, list(class_table)
+
+
+def _predict_classes(classes: List[str], reached: List[Tuple[List[RefKey], List[str]]]) -> List[List[str]]:
+    """
+    Predict the class table before each chunk from the class specs the chunks reach.
+
+    Args:
+        classes: The class table before the first chunk
+        reached: The keys and class specs reached by each chunk
+
+    Returns:
+        The class table before each chunk, followed by the class table after the last chunk
+    """
+    tables = [list(classes)]
+    for _, chunk_classes in reached:
+        table = list(tables[-1])
+        table.extend(class_spec for class_spec in chunk_classes if class_spec not in table)
+        tables.append(table)
+    return tables
+
+
+def _check_classes(tables: List[List[str]], results: List[Tuple[Any, Any, Optional[List[str]]]]) -> None:
+    """
+    Check that each chunk was seeded with the class table the chunks before it left.
+
+    Args:
+        tables: The predicted class tables, as returned by _predict_classes()
+        results: The results of the chunks; the last element is the class table after the chunk
+
+    Raises:
+        _Unsupported: If a chunk left a different class table than predicted
+    """
+    for index, result in enumerate(results):
+        if result[-1] != tables[index + 1]:
+            raise _Unsupported("Class table mismatch")
+
+
+def _chunk_size(count: int, max_workers: Optional[int], chunk_size: int) -> int:
+    """
+    Choose the number of items per chunk.
+
+    Args:
+        count: The number of items to split
+        max_workers: The number of workers, or None for the CPU count
+        chunk_size: The requested chunk size, or 0 to derive one
+
+    Returns:
+        The chunk size
+    """
+    if chunk_size > 0:
+        return chunk_size
+    chunks = (max_workers or os.cpu_count() or 1) * CHUNKS_PER_WORKER
+    return max(1, -(-count // chunks))
+
+
+@scoped
+def serialize_parallel(
+    obj: Any,
+    dictionary: bool = False,
+    columnar: bool = False,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None,
+    min_items: int = DEFAULT_MIN_ITEMS,
+    chunk_size: int = 0
+) -> str:
+    """
+    Serialize an object to a JSON string using a pool of worker processes.
+
+    The result is identical to serialize(obj, dictionary, columnar). Only
+    top-level containers and list properties of the root object with at least
+    min_items items are split; a Serializable root with columnar=True is
+    serialized in the calling process.
+
+    Args:
+        obj: The object to serialize
+        dictionary: If True, write the compact dictionary mode document
+        columnar: If True, write list properties holding objects of a single
+                  class one column per property
+        executor: Optional executor to run the workers; if None, a process pool
+                  is created for the call, forking the workers where possible
+        max_workers: Number of workers of the created pool (default: CPU count)
+        min_items: Minimum number of items of a container or list property to split
+        chunk_size: Number of items per chunk (default: enough chunks for
+                    CHUNKS_PER_WORKER chunks per worker)
+
+    Returns:
+        A JSON string representation of the object
+    """
+    root = Registry.is_serializable(obj)
+    if (root and columnar) or not (root or (isinstance(obj, (list, tuple, set, dict)) and len(obj) >= min_items)):
+        return serialize(obj, dictionary, columnar)
+
+    if executor is not None:
+        if root:
+            return _serialize_root(obj, dictionary, executor, None, max_workers, min_items, chunk_size)
+        return _serialize_container(obj, dictionary, columnar, executor, None, max_workers, chunk_size)
+
+    token: Optional[int] = None
+    context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        token = next(_tokens)
+        _FORKED[token] = obj
+        context = multiprocessing.get_context('fork')
+    try:
+        with ProcessPoolExecutor(max_workers, mp_context=context) as pool:
+            if root:
+                return _serialize_root(obj, dictionary, pool, token, max_workers, min_items, chunk_size)
+            return _serialize_container(obj, dictionary, columnar, pool, token, max_workers, chunk_size)
+    finally:
+        _FORKED.pop(token, None)
+
+
+def _serialize_root(
+    obj: Serializable,
+    dictionary: bool,
+    executor: Executor,
+    token: Optional[int],
+    max_workers: Optional[int],
+    min_items: int,
+    chunk_size: int
+) -> str:
+    """
+    Serialize a Serializable root, splitting its large list properties across the workers.
+    """
+    classes: Optional[Dict[str, int]] = {} if dictionary else None
+    writer = _RootWriter(obj, classes, executor, token, max_workers, min_items, chunk_size)
+    root = writer.write()
+    results = [[future.result() for future in split.futures] for split in writer.splits]
+
+    try:
+        _verify(writer, results)
+    except _Unsupported:
+        return serialize(obj, dictionary)
+
+    if classes is None:
+        text = json.dumps(root)
+    else:
+        text = json.dumps({'__classes__': list(classes), '__root__': root})
+    for split, split_results in zip(writer.splits, results):
+        array_text = '[' + ', '.join(chunk_text for chunk_text, _, _ in split_results if chunk_text) + ']'
+        text = text.replace(json.dumps(split.token), array_text, 1)
+    return text
+
+
+def _verify(writer: _RootWriter, results: List[List[Tuple[str, List[LogEntry], Optional[List[str]]]]]) -> None:
+    """
+    Check that the seeded writers wrote what the sequential writer would have.
+
+    The logs are replayed in document order: every definition must be the
+    first occurrence of its key, every reference to a seeded key must follow
+    a definition, and every chunk must have been seeded with the class table
+    the chunks before it produced.
+
+    Args:
+        writer: The root writer
+        results: The results of every chunk of every split
+
+    Raises:
+        _Unsupported: If the output differs from the sequential output
+    """
+    seen: Set[RefKey] = set()
+    for defined, key in writer.log:
+        if defined is None:
+            split = writer.splits[key]
+            if split.tables is not None:
+                _check_classes(split.tables, results[key])
+            for _, log, _ in results[key]:
+                chunk_defined: List[RefKey] = []
+                for chunk_defined_flag, chunk_key in log:
+                    if chunk_defined_flag:
+                        if chunk_key in seen:
+                            raise _Unsupported(f"Duplicate definition of {chunk_key!r}")
+                        chunk_defined.append(chunk_key)
+                    elif chunk_key not in seen:
+                        raise _Unsupported(f"Reference to {chunk_key!r} before its definition")
+                seen.update(chunk_defined)
+        elif defined:
+            if key in seen:
+                raise _Unsupported(f"Duplicate definition of {key!r}")
+            seen.add(key)
+        elif key not in seen:
+            raise _Unsupported(f"Reference to {key!r} before its definition")
+
+
+def _serialize_container(
+    obj: Union[List[Any], tuple, Set[Any], Dict[Any, Any]],
+    dictionary: bool,
+    columnar: bool,
+    executor: Executor,
+    token: Optional[int],
+    max_workers: Optional[int],
+    chunk_size: int
+) -> str:
+    """
+    Serialize a top-level container by converting chunks of its elements in the workers.
+
+    In dictionary mode the elements share the class table, so the chunks are
+    seeded with the class table predicted by a first pass, as for list
+    properties of a Serializable root.
+    """
+    if isinstance(obj, dict):
+        keys: Optional[List[str]] = [str(key) for key in obj.keys()]
+        items = list(obj.values())
+    else:
+        keys = None
+        items = list(obj)
+
+    size = _chunk_size(len(items), max_workers, chunk_size)
+    if token is None:
+        chunks: List[Any] = [items[start:start + size] for start in range(0, len(items), size)]
+    else:
+        chunks = [_Items(token, None, start, start + size) for start in range(0, len(items), size)]
+
+    tables: Optional[List[List[str]]] = None
+    if dictionary:
+        reached = [future.result() for future in [executor.submit(_collect_independent, chunk) for chunk in chunks]]
+        tables = _predict_classes([], reached)
+    futures = [
+        executor.submit(_write_independent, chunk, tables[index] if tables is not None else None, columnar)
+        for index, chunk in enumerate(chunks)
+    ]
+    results = [future.result() for future in futures]
+    if tables is not None:
+        try:
+            _check_classes(tables, results)
+        except _Unsupported:
+            return serialize(obj, dictionary, columnar)
+
+    items_text = [text for chunk_text, _ in results for text in chunk_text]
+    if keys is not None:
+        entries = {'__native__': '"Dict"'}
+        for key, text in zip(keys, items_text):
+            entries[key] = text
+        text = '{' + ', '.join(json.dumps(key) + ': ' + text for key, text in entries.items()) + '}'
+    elif isinstance(obj, set):
+        text = '{"__native__": "Set", "__values__": [' + ', '.join(items_text) + ']}'
+    else:
+        text = '[' + ', '.join(items_text) + ']'
+
+    if tables is None:
+        return text
+    return '{"__classes__": ' + json.dumps(tables[-1]) + ', "__root__": ' + text + '}'
+
+
+def registered_modules() -> List[str]:
+    """
+    Get the modules that define the registered builder classes.
+
+    Returns:
+        The module names, in registration order
+    """
+    modules: Dict[str, None] = {}
+    for class_spec in Registry.get_registered_classes():
+        modules[Registry.get_builder_class(class_spec).__module__] = None
+    return list(modules)
+
+
+def bootstrap(modules: Iterable[str]) -> None:
+    """
+    Worker initializer: import the modules that register builders.
+
+    Pass this as the initializer of an executor given to deserialize_parallel(),
+    with registered_modules() as its argument, so that workers started
+    without fork populate the Registry before reading documents.
+
+    Args:
+        modules: The names of the modules to import
+    """
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _read_document(document: Union[str, bytes], refs: RefTable, class_spec: Optional[str]) -> Any:
+    """
+    Deserialize one document, as deserialize() would, with a shared reference table.
+
+    Args:
+        document: The JSON text of the document
+        refs: The reference table shared by the documents of a chunk
+        class_spec: Optional class specification to override the one in the JSON
+
+    Returns:
+        The deserialized object
+    """
+    json_data = json.loads(document)
+
+    classes: Optional[List[str]] = None
+    if isinstance(json_data, dict) and '__classes__' in json_data and '__root__' in json_data:
+        classes = json_data['__classes__']
+        json_data = json_data['__root__']
+
+    if class_spec:
+        if not isinstance(json_data, dict):
+            return None
+        json_data['__class__'] = class_spec
+
+    reader = JsonReader(json_data, refs, classes)
+    if reader._class_spec(json_data) is not None:
+        return reader.read()
+    return from_json(json_data, classes)
+
+
+def _read_documents(documents: List[Union[str, bytes]], class_spec: Optional[str]) -> Tuple[List[Any], RefTable]:
+    """
+    Worker: deserialize a chunk of documents.
+
+    Args:
+        documents: The JSON text of the documents
+        class_spec: Optional class specification to override the one in the JSON
+
+    Returns:
+        The deserialized objects and the reference table of the chunk, which
+        are pickled together so that the objects in both stay shared
+    """
+    refs: RefTable = {}
+    return [_read_document(document, refs, class_spec) for document in documents], refs
+
+
+def _relink_item(item: Any, replacements: Dict[int, Any], pending: List[Any]) -> Any:
+    """
+    Get the object that replaces an item, queueing the item for relinking if it is kept.
+
+    Args:
+        item: An item of a complex property
+        replacements: The merged object for each object read more than once, by id()
+        pending: The objects still to relink
+
+    Returns:
+        The merged object, or the item itself
+    """
+    replacement = replacements.get(id(item))
+    if replacement is not None:
+        return replacement
+    if Registry.is_serializable(item):
+        pending.append(item)
+    return item
+
+
+def _relink_property(target: Any, prop_name: str, replacements: Dict[int, Any], pending: List[Any]) -> None:
+    """
+    Replace the merged objects in a complex property, as JsonReader.property() set it.
+
+    Args:
+        target: The object containing the property
+        prop_name: The name of the property
+        replacements: The merged object for each object read more than once, by id()
+        pending: The objects still to relink
+    """
+    value = getattr(target, prop_name, None)
+    if isinstance(value, list):
+        for index, item in enumerate(value):
+            value[index] = _relink_item(item, replacements, pending)
+    elif isinstance(value, tuple):
+        relinked = tuple(_relink_item(item, replacements, pending) for item in value)
+        if any(new is not old for new, old in zip(relinked, value)):
+            setattr(target, prop_name, relinked)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            value[key] = _relink_item(item, replacements, pending)
+    elif value is not None:
+        relinked = _relink_item(value, replacements, pending)
+        if relinked is not value:
+            setattr(target, prop_name, relinked)
+
+
+class _Relinker(Visitor[Any]):
+    """
+    Visitor that relinks the complex properties of classes without a compiled plan.
+    """
+
+    def __init__(self, replacements: Dict[int, Any], pending: List[Any]):
+        """
+        Args:
+            replacements: The merged object for each object read more than once, by id()
+            pending: The objects still to relink
+        """
+        self.replacements = replacements
+        self.pending = pending
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        pass
+
+    def end(self, obj: Any) -> None:
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        pass
+
+    def verbatim(self, data_type: type, target: Serializable, get_value: Any, set_value: Any, get_prop_names: Any) -> None:
+        """
+        Verbatim values are read with their own reference table and are not relinked.
+        """
+        pass
+
+    def primitive(self, data_type: type, target: Serializable, prop_name: str, from_string: Any = None) -> None:
+        """
+        Primitive values are read with their own reference table and are not relinked.
+        """
+        pass
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Replace the merged objects in a complex property.
+        """
+        _relink_property(target, prop_name, self.replacements, self.pending)
+
+
+def _relink(roots: List[Any], replacements: Dict[int, Any], visited: Set[int]) -> None:
+    """
+    Replace every reference to a merged object in the graphs below some roots.
+
+    Args:
+        roots: The deserialized objects of a chunk
+        replacements: The merged object for each object read more than once, by id()
+        visited: The id() of every object relinked so far
+    """
+    pending = [root for root in roots if Registry.is_serializable(root)]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in visited:
+            continue
+        visited.add(id(obj))
+        plan = PlanCache.get(obj)
+        if plan is None:
+            obj.visit(_Relinker(replacements, pending))
+            continue
+        for step in plan.steps:
+            if step.kind == 'property':
+                _relink_property(obj, step.prop_name, replacements, pending)
+
+
+def _merge(results: List[Tuple[List[Any], RefTable]]) -> List[Any]:
+    """
+    Merge the objects read by the workers into one set of objects.
+
+    Objects with the same class and ID read by different chunks are replaced
+    by the one read first, in document order; only chunks that read such an
+    object are walked.
+
+    Args:
+        results: The deserialized objects and reference table of every chunk
+
+    Returns:
+        The deserialized objects of all chunks
+    """
+    merged: Dict[RefKey, Any] = {}
+    replacements: Dict[int, Any] = {}
+    stale: List[int] = []
+    for index, (_, refs) in enumerate(results):
+        count = len(replacements)
+        for class_spec, by_id in refs.items():
+            for object_id, obj in by_id.items():
+                first = merged.setdefault((class_spec, object_id), obj)
+                if first is not obj:
+                    replacements[id(obj)] = first
+        if len(replacements) > count:
+            stale.append(index)
+
+    visited: Set[int] = set()
+    for index in stale:
+        _relink(results[index][0], replacements, visited)
+    return [replacements.get(id(obj), obj) for roots, _ in results for obj in roots]
+
+
+def deserialize_parallel(
+    documents: Iterable[Union[str, bytes]],
+    class_spec: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None,
+    modules: Optional[Iterable[str]] = None,
+    min_items: int = DEFAULT_MIN_ITEMS,
+    chunk_size: int = 0
+) -> List[Any]:
+    """
+    Deserialize a batch of JSON documents using a pool of worker processes.
+
+    Every document is read as deserialize() would read it, except that all
+    documents share one reference table, as with JsonStreamReader: a document
+    may refer with __is_ref__ to an object of another document, and an object
+    that several documents contain is read once, from the first of them.
+
+    Objects are sent back from the workers by pickling, so they must be
+    picklable. When the workers are not forked from the calling process, the
+    Registry is populated in each of them by importing the modules that define
+    the registered builders.
+
+    Args:
+        documents: The JSON text of the documents
+        class_spec: Optional class specification to override the one in every document
+        executor: Optional executor to run the workers; its workers must already
+                  have the builders registered (see bootstrap()). If None, a
+                  process pool is created for the call.
+        max_workers: Number of workers of the created pool (default: CPU count)
+        modules: Modules the created pool's workers import at startup
+                 (default: registered_modules())
+        min_items: Minimum number of documents to split across the workers
+        chunk_size: Number of documents per chunk (default: enough chunks for
+                    CHUNKS_PER_WORKER chunks per worker)
+
+    Returns:
+        The deserialized object of every document, in order; None for a
+        document that could not be deserialized
+    """
+    documents = list(documents)
+    if len(documents) < min_items:
+        return _read_documents(documents, class_spec)[0]
+
+    if executor is not None:
+        return _deserialize_chunks(documents, class_spec, executor, max_workers, chunk_size)
+
+    if modules is None:
+        modules = registered_modules()
+    with ProcessPoolExecutor(max_workers, initializer=bootstrap, initargs=(list(modules),)) as pool:
+        return _deserialize_chunks(documents, class_spec, pool, max_workers, chunk_size)
+
+
+def _deserialize_chunks(
+    documents: List[Union[str, bytes]],
+    class_spec: Optional[str],
+    executor: Executor,
+    max_workers: Optional[int],
+    chunk_size: int
+) -> List[Any]:
+    """
+    Deserialize chunks of documents in the workers and merge the results.
+    """
+    size = _chunk_size(len(documents), max_workers, chunk_size)
+    futures = [
+        executor.submit(_read_documents, documents[start:start + size], class_spec)
+        for start in range(0, len(documents), size)
+    ]
+    return _merge([future.result() for future in futures])
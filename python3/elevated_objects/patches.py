@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+
+"""
+Delta serialization: patches that carry only the properties changed since a baseline.
+
+A Baseline records the JSON of every property of every object reachable from
+a root object, together with the mutation versions of the objects (see
+tracking.MutationTracker). Baseline.diff() re-encodes only the objects that
+were mutated since, and the objects that were added, and returns a patch
+document:
+
+    {"__patch__": [
+        {"__class__": class spec, "__id__": object ID, prop: value, ...},
+        {"__class__": class spec, "__root__": true, prop: value, ...},
+        ...
+    ]}
+
+Each entry addresses an object by its class and ID, or as the root object
+(together with its current ID, if it has one, so that a renamed root is
+still found), and carries the properties that changed, in the same layout
+as serialize(). Objects with an ID are written as references within
+properties; objects without an ID are written in full, so a change to one
+of them appears as a change to the property that holds it. Objects that
+the peer does not have yet get an entry with all of their properties.
+
+apply_patch() applies a patch to the peer's copy of the root object through
+the Builders of the objects, so caches derived from them are invalidated.
+
+Objects must be modified through their Builder, or tracking.touch() must be
+called after modifying them directly, for diff() to see the change.
+"""
+
+from __future__ import annotations
+import json
+from typing import Dict, List, Any, Optional, Tuple, Union, Callable, Set
+
+from .serializable import Serializable, Visitor
+from .registry import Registry
+from .plans import PlanCache
+from .identity import IdentityCache, scoped
+from .tracking import MutationTracker
+from .json import JsonWriter, JsonReader, from_json, _untracked_writes
+
+# Key of the list of entries in a patch document
+PATCH_KEY = '__patch__'
+
+# Key that marks the entry of the root object
+ROOT_KEY = '__root__'
+
+# Key of the value of an object written by a verbatim visit
+VERBATIM_KEY = '__verbatim__'
+
+# Keys of the JSON envelope of an object
+_ENVELOPE = ('__class__', '__id__', '__is_ref__', '__version__')
+
+# (class spec, object ID) of an object; the ID of a root object without one is None
+ObjectKey = Tuple[str, Any]
+
+# Reference table: objects by class spec and object ID
+RefTable = Dict[str, Dict[Union[str, int], Any]]
+
+# Marks a property that is absent from a recorded state
+_MISSING = object()
+
+class _Log:
+    """
+    What a _DeltaWriter saw while writing one object.
+    """
+
+    __slots__ = ('root', 'envelope', 'versions', 'referenced', 'untracked')
+
+    def __init__(self, root: Serializable):
+        """
+        Args:
+            root: The object being written
+        """
+        self.root = root
+        # The JSON envelope of the object, which a verbatim visit replaces
+        self.envelope: Optional[Dict[str, Any]] = None
+        # (id(obj), version) of the object and the objects written in full inside it
+        self.versions: List[Tuple[int, Optional[int]]] = []
+        # Objects with an ID written as references
+        self.referenced: List[Serializable] = []
+        # True if an object that cannot be watched was written
+        self.untracked = False
+
+
+class _DeltaWriter(JsonWriter):
+    """
+    JsonWriter that writes every nested object with an ID as a reference.
+    """
+
+    def __init__(self, obj: Serializable, refs: RefTable, log: _Log):
+        """
+        Args:
+            obj: The object to write
+            refs: The reference table of the object
+            log: The log shared by the writers of the object
+        """
+        super().__init__(obj, refs)
+        self.log = log
+
+    def begin(self, obj: Serializable, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object, turning it into a reference if it is a nested object with an ID.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        super().begin(obj, parent_prop_name)
+        log = self.log
+        if obj is log.root and log.envelope is None:
+            log.envelope = self.json
+        elif '__id__' in self.json:
+            self.is_ref = True
+            self.json['__is_ref__'] = True
+            self.json.pop('__version__', None)
+            log.referenced.append(obj)
+            return
+        version = MutationTracker.watch(obj)
+        if version is None:
+            log.untracked = True
+        log.versions.append((id(obj), version))
+
+    def _child(self, obj: Serializable) -> JsonWriter:
+        """
+        Create a writer for a nested object that shares this writer's tables and log.
+
+        Args:
+            obj: The nested object
+
+        Returns:
+            A writer for the nested object
+        """
+        return _DeltaWriter(obj, self.refs, self.log)
+
+
+class _State:
+    """
+    The recorded properties of one object.
+    """
+
+    __slots__ = ('obj_key', 'versions', 'props', 'referenced')
+
+    def __init__(
+        self,
+        obj_key: int,
+        versions: Optional[List[Tuple[int, Optional[int]]]],
+        props: Dict[str, Any],
+        referenced: List[ObjectKey]
+    ):
+        """
+        Args:
+            obj_key: id() of the object
+            versions: (id(obj), version) of the object and the objects written in full
+                      inside it, or None if changes to them cannot be detected
+            props: The JSON of every property
+            referenced: The keys of the objects that the properties refer to
+        """
+        self.obj_key = obj_key
+        self.versions = versions
+        self.props = props
+        self.referenced = referenced
+
+    def is_current(self) -> bool:
+        """
+        Check whether the object and the objects written in full inside it are unchanged.
+
+        Returns:
+            True if none of them was mutated since the state was recorded
+        """
+        if self.versions is None:
+            return False
+        for key, version in self.versions:
+            if not MutationTracker.is_current(key, version):
+                return False
+        return True
+
+
+def _object_key(obj: Serializable, root: Serializable) -> Optional[ObjectKey]:
+    """
+    Get the key that addresses an object in a patch.
+
+    Args:
+        obj: The object
+        root: The root object of the graph
+
+    Returns:
+        The key, or None if the object has no ID and is not the root
+    """
+    object_id = IdentityCache.get_id(obj)
+    if not object_id and obj is not root:
+        return None
+    return (obj.get_class_spec(), object_id or None)
+
+
+def _encode(obj: Serializable) -> Tuple[_State, List[Serializable]]:
+    """
+    Record the properties of an object.
+
+    Args:
+        obj: The object
+
+    Returns:
+        The recorded state and the objects with an ID that its properties refer to
+    """
+    log = _Log(obj)
+    untracked = _untracked_writes.count
+    json_data = _DeltaWriter(obj, {}, log).write()
+
+    if json_data is log.envelope:
+        props = {name: value for name, value in json_data.items() if name not in _ENVELOPE}
+        # JsonWriter omits primitives that are None, which a new object may not default to
+        plan = PlanCache.get(obj)
+        if plan is not None:
+            for step in plan.steps:
+                props.setdefault(step.prop_name, None)
+    else:
+        # A verbatim visit replaced the whole object
+        props = {VERBATIM_KEY: json_data}
+
+    versions = None if log.untracked or _untracked_writes.count != untracked else log.versions
+    referenced = [(child.get_class_spec(), IdentityCache.get_id(child)) for child in log.referenced]
+    return _State(id(obj), versions, props, referenced), log.referenced
+
+
+class Baseline:
+    """
+    The recorded state of the objects reachable from a root object, from which patches are computed.
+    """
+
+    def __init__(self, root: Serializable):
+        """
+        Record the state of every object reachable from a root object.
+
+        Args:
+            root: The root object
+        """
+        self.root = root
+        self._states: Dict[ObjectKey, _State] = {}
+        self.update()
+
+    @scoped
+    def update(self) -> None:
+        """
+        Record the current state of every object reachable from the root, discarding the previous state.
+        """
+        self._states = {}
+        pending = [self.root]
+        while pending:
+            obj = pending.pop()
+            key = _object_key(obj, self.root)
+            if key in self._states:
+                continue
+            state, referenced = _encode(obj)
+            self._states[key] = state
+            pending.extend(referenced)
+
+    @scoped
+    def diff(self, advance: bool = True) -> Dict[str, Any]:
+        """
+        Compute the patch that brings a copy of the recorded state up to date.
+
+        Only objects that were mutated since the state was recorded, and
+        objects that are new or replaced another object with the same ID,
+        are encoded.
+
+        Args:
+            advance: If True, record the current state of the objects in the
+                     patch, so that the next patch is relative to this one
+
+        Returns:
+            The patch document
+        """
+        states = self._states
+        pending: List[Tuple[ObjectKey, Serializable]] = []
+        reachable: Optional[Dict[int, Serializable]] = None
+        renamed: List[ObjectKey] = []
+        # The previous key of the root, if its ID changed
+        root_moved: Optional[ObjectKey] = None
+        for key, state in states.items():
+            if state.is_current():
+                continue
+            obj = MutationTracker.get_object(state.obj_key)
+            if obj is None:
+                # Objects that cannot be watched are looked up in the graph
+                if reachable is None:
+                    reachable = {id(item): item for item in _reachable(self.root)}
+                obj = reachable.get(state.obj_key)
+            if obj is None:
+                continue
+            if _object_key(obj, self.root) == key:
+                pending.append((key, obj))
+            else:
+                # An object whose ID changed is new under its new ID, and the
+                # objects that refer to it must refer to the new ID
+                renamed.append(key)
+                if obj is self.root:
+                    root_moved = key
+
+        if renamed:
+            pending.extend(self._referrers(renamed))
+        if root_moved is not None:
+            # The peer finds its root by the root marker rather than the old
+            # ID; the entry comes first so that references to the new ID resolve
+            pending.append((_object_key(self.root, self.root), self.root))
+
+        entries: List[Dict[str, Any]] = []
+        updates: Dict[ObjectKey, _State] = {}
+        done: Set[ObjectKey] = set()
+        while pending:
+            key, obj = pending.pop()
+            if key in done:
+                continue
+            done.add(key)
+
+            state, referenced = _encode(obj)
+            updates[key] = state
+            previous = states.get(key)
+            before = previous
+            if before is None and obj is self.root and root_moved is not None:
+                before = states.get(root_moved)
+            changed: Dict[str, Any] = {}
+            if before is None or before.obj_key != id(obj):
+                # The peer's object, if any, has no properties in common with this one
+                changed.update(state.props)
+                if before is not None:
+                    for name in before.props:
+                        changed.setdefault(name, None)
+            else:
+                for name, value in state.props.items():
+                    if before.props.get(name, _MISSING) != value:
+                        changed[name] = value
+                for name in before.props:
+                    if name not in state.props:
+                        changed[name] = None
+            if changed or previous is None:
+                entries.append(self._entry(key, obj, changed))
+
+            for child in referenced:
+                child_key = _object_key(child, self.root)
+                child_state = states.get(child_key)
+                if child_key not in done and (child_state is None or child_state.obj_key != id(child)):
+                    pending.append((child_key, child))
+
+        if advance:
+            for key in renamed:
+                del states[key]
+            states.update(updates)
+        return {PATCH_KEY: entries}
+
+    def _referrers(self, keys: List[ObjectKey]) -> List[Tuple[ObjectKey, Serializable]]:
+        """
+        Find the objects whose recorded properties refer to some objects.
+
+        Args:
+            keys: The keys of the referenced objects
+
+        Returns:
+            The key and the object of every referrer that is still alive
+        """
+        targets = set(keys)
+        found: List[Tuple[ObjectKey, Serializable]] = []
+        reachable: Optional[Dict[int, Serializable]] = None
+        for key, state in self._states.items():
+            if not targets.intersection(state.referenced):
+                continue
+            obj = MutationTracker.get_object(state.obj_key)
+            if obj is None:
+                if reachable is None:
+                    reachable = {id(item): item for item in _reachable(self.root)}
+                obj = reachable.get(state.obj_key)
+            if obj is not None and _object_key(obj, self.root) == key:
+                found.append((key, obj))
+        return found
+
+    def _entry(self, key: ObjectKey, obj: Serializable, props: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create the patch entry of an object.
+
+        Args:
+            key: The key of the object
+            obj: The object
+            props: The changed properties
+
+        Returns:
+            The entry
+        """
+        class_spec, object_id = key
+        entry: Dict[str, Any] = {'__class__': class_spec}
+        if obj is self.root:
+            entry[ROOT_KEY] = True
+            if object_id is not None:
+                entry['__id__'] = object_id
+        else:
+            entry['__id__'] = object_id
+        entry.update(props)
+        return entry
+
+
+def _reachable(root: Serializable) -> List[Serializable]:
+    """
+    Get the objects reachable from a root object through complex properties.
+
+    Args:
+        root: The root object
+
+    Returns:
+        The objects, root first
+    """
+    found: Dict[int, Serializable] = {}
+    pending = [root]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in found:
+            continue
+        found[id(obj)] = obj
+        plan = PlanCache.get(obj)
+        if plan is None:
+            obj.visit(_ChildCollector(pending))
+            continue
+        for step in plan.steps:
+            if step.kind == 'property':
+                _collect_children(getattr(obj, step.prop_name, None), pending)
+    return list(found.values())
+
+
+def _collect_children(value: Any, pending: List[Serializable]) -> None:
+    """
+    Collect the objects held by a complex property value.
+
+    Args:
+        value: The property value
+        pending: The list to append the objects to
+    """
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif isinstance(value, dict):
+        items = value.values()
+    else:
+        items = (value,)
+    pending.extend(item for item in items if Registry.is_serializable(item))
+
+
+class _ChildCollector(Visitor[Any]):
+    """
+    Visitor that collects the objects held by the complex properties of classes without a compiled plan.
+    """
+
+    def __init__(self, pending: List[Serializable]):
+        """
+        Args:
+            pending: The list to append the objects to
+        """
+        self.pending = pending
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        pass
+
+    def end(self, obj: Any) -> None:
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        pass
+
+    def verbatim(self, data_type: type, target: Serializable, get_value: Any, set_value: Any, get_prop_names: Any) -> None:
+        pass
+
+    def primitive(self, data_type: type, target: Serializable, prop_name: str, from_string: Any = None) -> None:
+        pass
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Collect the objects held by a complex property.
+        """
+        _collect_children(getattr(target, prop_name, None), self.pending)
+
+
+@scoped
+def index(root: Serializable) -> RefTable:
+    """
+    Build the reference table of the objects with an ID reachable from a root object.
+
+    Pass the table to successive apply_patch() calls on the same root to
+    avoid rebuilding it for every patch.
+
+    Args:
+        root: The root object
+
+    Returns:
+        The objects by class spec and object ID
+    """
+    refs: RefTable = {}
+    for obj in _reachable(root):
+        object_id = IdentityCache.get_id(obj)
+        if object_id:
+            refs.setdefault(obj.get_class_spec(), {}).setdefault(object_id, obj)
+    return refs
+
+
+class PatchReader(JsonReader):
+    """
+    JsonReader that applies a patch entry to an existing object.
+
+    Only the properties present in the entry are set. Nested objects are
+    read as by JsonReader, so references resolve to the objects in the
+    reference table.
+    """
+
+    def begin(self, obj: Serializable, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting the patched object.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        if self.obj is None:
+            self.obj = obj
+        self.is_ref = False
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Set a verbatim value if the entry carries one.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+        """
+        if VERBATIM_KEY in self.json:
+            set_value(target, from_json(self.json[VERBATIM_KEY], self.classes))
+
+    def _child(self, json_data: Any) -> JsonReader:
+        """
+        Create a plain reader for a nested object that shares this reader's tables.
+
+        Args:
+            json_data: The JSON data of the nested object
+
+        Returns:
+            A reader for the nested object
+        """
+        return JsonReader(json_data, self.refs, self.classes)
+
+
+def apply_patch(
+    root: Serializable,
+    patch: Union[str, Dict[str, Any]],
+    refs: Optional[RefTable] = None
+) -> Serializable:
+    """
+    Apply a patch computed by Baseline.diff() to a copy of the baseline's root object.
+
+    Every patched object is modified through the Builder that
+    Registry.create_builder() returns for it. Objects that the patch adds
+    are created through their Builder.
+
+    Args:
+        root: The root object to patch in place
+        patch: The patch document, or its JSON text
+        refs: Optional reference table of the objects reachable from root, as
+              returned by index(); it is updated with the objects the patch adds
+
+    Returns:
+        The root object
+    """
+    if isinstance(patch, str):
+        patch = json.loads(patch)
+    if refs is None:
+        refs = index(root)
+
+    for entry in patch[PATCH_KEY]:
+        class_spec = entry['__class__']
+        if entry.get(ROOT_KEY):
+            target = root
+            object_id = entry.get('__id__')
+            if object_id:
+                # The root may have been renamed
+                by_id = refs.setdefault(class_spec, {})
+                if by_id.get(object_id) is not root:
+                    for stale in [key for key, obj in by_id.items() if obj is root]:
+                        del by_id[stale]
+                    by_id[object_id] = root
+        else:
+            by_id = refs.setdefault(class_spec, {})
+            target = by_id.get(entry['__id__'])
+            if target is None:
+                target = by_id[entry['__id__']] = Registry.create_builder(class_spec).done()
+        Registry.create_builder(class_spec, target).visit(PatchReader(entry, refs))
+    return root
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+from typing import Dict, List, Any, Set, Optional, Type, Callable, NamedTuple, ClassVar
+
+from .serializable import Serializable, Visitor
+
+class PlanStep(NamedTuple):
+    """
+    One recorded visitor call from a Serializable's visit() method.
+
+    Only the arguments relevant to the step's kind are populated; the
+    target object is deliberately not recorded so the step can be replayed
+    against any instance of the same class.
+    """
+    kind: str
+    data_type: type
+    prop_name: Optional[str] = None
+    from_string: Optional[Callable[[str], Any]] = None
+    element_builder_type: Optional[type] = None
+    key_type: Optional[type] = None
+    get_value: Optional[Callable[[Serializable], Any]] = None
+    set_value: Optional[Callable[[Serializable, Any], None]] = None
+    get_prop_names: Optional[Callable[[], Set[str]]] = None
+
+
+class ClassPlan:
+    """
+    Flat, precomputed sequence of visitor calls for one class specification.
+
+    A ClassPlan is recorded once per class spec by visiting a single instance
+    with a PlanRecorder. Codecs may compile the steps into specialized
+    encoders/decoders and cache them on the plan under their own key.
+    """
+
+    def __init__(self, class_spec: str, steps: List[PlanStep], identity_steps: Optional[List[PlanStep]] = None):
+        """
+        Initialize the plan.
+
+        Args:
+            class_spec: The class specification the plan was recorded for
+            steps: The recorded visitor calls, in visit order
+            identity_steps: The calls recorded with identity_only=True, if available
+        """
+        self.class_spec = class_spec
+        self.steps = steps
+        self.identity_steps = identity_steps
+        self.compiled: Dict[str, Any] = {}
+
+    def compile(self, codec: str, compiler: Callable[[ClassPlan], Any]) -> Any:
+        """
+        Get the codec-specific compiled form of this plan, compiling it on first use.
+
+        Args:
+            codec: A key identifying the codec (e.g. 'json.encode')
+            compiler: A function that turns this plan into the compiled form
+
+        Returns:
+            The compiled form returned by the compiler
+        """
+        compiled = self.compiled.get(codec)
+        if compiled is None:
+            compiled = compiler(self)
+            self.compiled[codec] = compiled
+        return compiled
+
+    def replay(self, visitor: Visitor, obj: Serializable, identity_only: bool = False) -> None:
+        """
+        Replay the recorded steps against an instance, as if obj.visit(visitor) was called.
+
+        Args:
+            visitor: The visitor to drive
+            obj: The instance to visit
+            identity_only: If True, replay only the steps recorded for identity properties
+        """
+        steps = self.identity_steps if identity_only else self.steps
+        if steps is None:
+            obj.visit(visitor, identity_only=identity_only)
+            return
+        visitor.begin(obj)
+        for step in steps:
+            if step.kind == 'primitive':
+                visitor.primitive(step.data_type, obj, step.prop_name, step.from_string)
+            elif step.kind == 'property':
+                visitor.property(step.data_type, obj, step.prop_name, step.element_builder_type, step.key_type)
+            else:
+                visitor.verbatim(step.data_type, obj, step.get_value, step.set_value, step.get_prop_names)
+        visitor.end(obj)
+
+
+class PlanRecorder(Visitor[Any]):
+    """
+    Visitor that records the primitive/property/verbatim calls made by visit().
+
+    If visit() passes a target other than the object being recorded, or
+    begins a second object, the recording is marked as dynamic and cannot
+    be turned into a ClassPlan.
+    """
+
+    def __init__(self, obj: Serializable, identity_only: bool = False):
+        """
+        Initialize the recorder with the object whose visit() will be recorded.
+
+        Args:
+            obj: The object to record
+            identity_only: If True, record the visit made for identity properties only
+        """
+        self.obj = obj
+        self.identity_only = identity_only
+        self.steps: List[PlanStep] = []
+        self.dynamic = False
+        self.depth = 0
+
+    def begin(self, obj: Any, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin recording; a nested or foreign begin() makes the recording dynamic.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        self.depth += 1
+        if obj is not self.obj or self.depth > 1:
+            self.dynamic = True
+
+    def end(self, obj: Any) -> None:
+        """
+        End recording.
+
+        Args:
+            obj: The object being visited
+        """
+        pass
+
+    def owner(self, target: Any, owner_prop_name: str) -> None:
+        """
+        Owner relationships are not part of a plan.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Record a verbatim step.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+        """
+        if target is not self.obj:
+            self.dynamic = True
+        self.steps.append(PlanStep(
+            'verbatim', data_type, get_value=get_value, set_value=set_value, get_prop_names=get_prop_names
+        ))
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Record a primitive step.
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        if target is not self.obj:
+            self.dynamic = True
+        self.steps.append(PlanStep('primitive', data_type, prop_name, from_string=from_string))
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Record a property step.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        if target is not self.obj:
+            self.dynamic = True
+        self.steps.append(PlanStep(
+            'property', prop_type, prop_name, element_builder_type=element_builder_type, key_type=key_type
+        ))
+
+    def plan(self) -> Optional[ClassPlan]:
+        """
+        Record the object's visit() and build a plan from it.
+
+        Returns:
+            The recorded plan, or None if the visit() could not be recorded statically
+        """
+        try:
+            self.obj.visit(self, identity_only=self.identity_only)
+        except Exception:
+            return None
+        if self.dynamic:
+            return None
+
+        identity_steps: Optional[List[PlanStep]] = None
+        if not self.identity_only:
+            identity_plan = PlanRecorder(self.obj, identity_only=True).plan()
+            if identity_plan is not None:
+                identity_steps = identity_plan.steps
+        return ClassPlan(self.obj.get_class_spec(), self.steps, identity_steps)
+
+
+class PlanCache:
+    """
+    Process-wide cache of ClassPlans keyed by class specification.
+
+    Plans are opt-in, because a plan recorded from one instance is only
+    valid for the others if visit() makes the same calls for every instance.
+    A class whose visit() does not branch on instance data opts in by setting
+    the class attribute ``compiled_plan = True`` or by calling
+    PlanCache.opt_in(class_spec); its plan is then recorded lazily the first
+    time an instance is seen. Classes declared with schema.schema() have their
+    plan seeded from the declaration. Every other class is visited directly.
+    """
+
+    # Recorded plans; None marks a class spec whose visit() could not be recorded
+    _plans: ClassVar[Dict[str, Optional[ClassPlan]]] = {}
+
+    # Class specs that must always be visited directly
+    _opted_out: ClassVar[Set[str]] = set()
+
+    # Class specs whose plans may be recorded, besides classes with compiled_plan = True
+    _opted_in: ClassVar[Set[str]] = set()
+
+    @classmethod
+    def get(cls, obj: Serializable) -> Optional[ClassPlan]:
+        """
+        Get the plan for an object's class spec, recording it from obj if needed.
+
+        Args:
+            obj: An instance of the class to get the plan for
+
+        Returns:
+            The plan, or None if the class must be visited directly
+        """
+        class_spec = obj.get_class_spec()
+        try:
+            return cls._plans[class_spec]
+        except KeyError:
+            pass
+
+        if getattr(type(obj), '__elevated_proxy__', False):
+            # A proxy's own class says nothing about the class it stands for
+            from .lazy import materialize
+            obj = materialize(obj)
+
+        if class_spec not in cls._opted_out and (
+            class_spec in cls._opted_in or getattr(type(obj), 'compiled_plan', False) is True
+        ):
+            plan = PlanRecorder(obj).plan()
+        else:
+            plan = None
+        cls._plans[class_spec] = plan
+        return plan
+
+    @classmethod
+    def seed(cls, plan: ClassPlan) -> None:
+        """
+        Install a plan built without recording a visit, e.g. from a class declaration.
+
+        Args:
+            plan: The plan; ignored if its class spec has opted out
+        """
+        if plan.class_spec not in cls._opted_out:
+            cls._plans[plan.class_spec] = plan
+
+    @classmethod
+    def opt_in(cls, class_spec: str) -> None:
+        """
+        Allow a class spec to use a compiled plan.
+
+        Only opt in classes whose visit() makes the same visitor calls for
+        every instance; the plan is recorded from the first instance seen.
+
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+        """
+        cls._opted_in.add(class_spec)
+        cls._opted_out.discard(class_spec)
+        if cls._plans.get(class_spec, False) is None:
+            del cls._plans[class_spec]
+
+    @classmethod
+    def opt_out(cls, class_spec: str) -> None:
+        """
+        Prevent a class spec from using a compiled plan.
+
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+        """
+        cls._opted_out.add(class_spec)
+        cls._plans[class_spec] = None
+
+    @classmethod
+    def clear(cls, class_spec: Optional[str] = None) -> None:
+        """
+        Forget recorded plans so they are recorded again on next use.
+
+        Args:
+            class_spec: The class spec to forget, or None to forget all plans
+        """
+        if class_spec is None:
+            cls._plans.clear()
+        else:
+            cls._plans.pop(class_spec, None)
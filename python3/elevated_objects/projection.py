@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+"""
+Projected deserialization: populate only the properties on a set of paths.
+
+A path names a property of the root object, optionally followed by the
+properties of the objects it holds:
+
+    name                 the root's name
+    address.city         the city of the root's address, and nothing else of the address
+    contacts[*]          every element of the root's contacts
+    members[*].name      the name of every member
+    roster[*].age        the age of every value of the roster map
+
+"[*]" may follow any property name and only makes the path easier to read;
+"members.name" is the same path as "members[*].name". A path that ends at a
+property holding objects selects those objects in full.
+
+Every object on a path is created through its Builder as usual; properties
+that are not on any path keep the defaults of a new instance. Rows of
+columnar batches (see columnar) are always populated in full. The JSON is
+still parsed in full: with CPython's C JSON decoder, parsing a document is
+much cheaper than building its objects, and cheaper than any tokenizer
+written in Python that could skip the unrequested subtrees.
+"""
+
+from __future__ import annotations
+import functools
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set, Iterable
+
+from .serializable import Serializable
+from .registry import Registry
+from .plans import PlanCache
+from .json import JsonReader, DefinitionIndex, _compile_decoder
+
+# A projection: the selected properties of an object, each mapped to the
+# projection of the objects it holds, or to None if they are selected in full
+Projection = Dict[str, Optional['Projection']]
+
+# Marks an object read in full in ProjectedReader.applied
+_FULL = 0
+
+# Suffix of a property name that stands for the elements of a list or map
+_ELEMENTS = '[*]'
+
+def _parse_path(path: str) -> List[str]:
+    """
+    Split a path into property names.
+
+    Args:
+        path: The path, e.g. "members[*].address.city"
+
+    Returns:
+        The property names, e.g. ['members', 'address', 'city']
+
+    Raises:
+        ValueError: If the path is malformed
+    """
+    names: List[str] = []
+    for segment in path.split('.'):
+        name = segment
+        while name.endswith(_ELEMENTS):
+            name = name[:-len(_ELEMENTS)]
+        if not name or '[' in name or ']' in name:
+            raise ValueError(f"Malformed property path {path!r}")
+        names.append(name)
+    return names
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_paths(paths: Tuple[str, ...]) -> Projection:
+    """
+    Merge paths into one projection.
+
+    Args:
+        paths: The paths
+
+    Returns:
+        The projection of the root object
+    """
+    projection: Projection = {}
+    for path in paths:
+        node: Optional[Projection] = projection
+        names = _parse_path(path)
+        for index, name in enumerate(names):
+            if index == len(names) - 1:
+                node[name] = None
+                break
+            if name in node and node[name] is None:
+                # An ancestor is already selected in full
+                break
+            node = node.setdefault(name, {})
+    return projection
+
+
+def compile_paths(paths: Iterable[str]) -> Projection:
+    """
+    Merge paths into the projection that ProjectedReader reads.
+
+    Args:
+        paths: The paths, e.g. ["name", "address.city", "contacts[*]"]
+
+    Returns:
+        The projection of the root object
+
+    Raises:
+        ValueError: If a path is malformed
+    """
+    return _compile_paths(tuple(sorted(set(paths))))
+
+
+class ProjectedReader(JsonReader):
+    """
+    JsonReader that populates only the properties selected by a projection.
+
+    An object with an ID that is reached through several paths is populated
+    with the properties that each of them selects: a later path re-reads the
+    object's JSON for the properties it adds.
+    """
+
+    def __init__(
+        self,
+        json_data: Any,
+        projection: Optional[Projection],
+        refs: Optional[Dict[str, Dict[Any, Serializable]]] = None,
+        classes: Optional[List[str]] = None,
+        applied: Optional[Dict[Tuple[str, Any], Tuple[Dict[str, Any], Set[int]]]] = None,
+        definitions: Optional[DefinitionIndex] = None
+    ):
+        """
+        Args:
+            json_data: The JSON data to deserialize
+            projection: The selected properties of the object, or None to read the object in full
+            refs: Optional dictionary to track deserialized objects by class and id
+            classes: Optional class table of a dictionary mode document
+            applied: The JSON of each object read so far with an ID, and the
+                     projections it was read with, shared by the readers of a document
+            definitions: The definitions index of the document; json_data is
+                         taken to be the whole document if None
+        """
+        super().__init__(json_data, refs, classes)
+        self.projection = projection
+        self.applied = applied if applied is not None else {}
+        self.definitions = definitions if definitions is not None else DefinitionIndex(json_data)
+        # Projection of the objects held by the property being read
+        self._child_projection: Optional[Projection] = None
+
+    def begin(self, obj: Serializable, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object, unless read() has already begun it.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        if obj is self.obj:
+            return
+        super().begin(obj, parent_prop_name)
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Read a primitive property if it is selected.
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        if self.projection is not None and prop_name not in self.projection:
+            return
+        super().primitive(data_type, target, prop_name, from_string)
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[type] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Read a complex property if it is selected, projecting the objects it holds.
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        if self.projection is None:
+            self._child_projection = None
+        elif prop_name in self.projection:
+            self._child_projection = self.projection[prop_name]
+        else:
+            return
+        super().property(prop_type, target, prop_name, element_builder_type, key_type)
+
+    def read(self) -> Optional[Serializable]:
+        """
+        Populate the selected properties of the object.
+
+        Returns:
+            The deserialized object, or None if deserialization failed
+        """
+        json_data = self.json
+        if json_data is None:
+            return None
+        class_spec = self._class_spec(json_data)
+        if class_spec is None:
+            return None
+
+        object_id = json_data.get('__id__')
+        if json_data.get('__is_ref__') and object_id not in self.refs.get(class_spec, ()):
+            # The object is defined in a subtree that no path selected
+            full_reader = ProjectedReader(
+                self.definitions.root, None, self.refs, self.classes, self.applied, self.definitions
+            )
+            definition = self.definitions.find(full_reader, class_spec, object_id)
+            if definition is not None:
+                self.json = json_data = definition
+        if Registry.migrations_active:
+            self._migrate()
+            json_data = self.json
+
+        builder = Registry.create_builder(class_spec)
+        self.begin(builder.done())
+        obj = self.obj
+
+        mark = _FULL if self.projection is None else id(self.projection)
+        entry = self.applied.get((class_spec, object_id)) if object_id is not None else None
+        if self.is_ref:
+            if entry is None or _FULL in entry[1] or mark in entry[1]:
+                return obj
+            # Add the properties this path selects to an object read through another path
+            self.json = entry[0]
+            self.is_ref = False
+        elif object_id is not None:
+            entry = self.applied[(class_spec, object_id)] = (json_data, set())
+        if entry is not None:
+            entry[1].add(mark)
+
+        plan = PlanCache.get(obj)
+        if plan is None:
+            obj.visit(self)
+        elif self.projection is None:
+            plan.compile('json.decode', _compile_decoder)(self, obj)
+        else:
+            for step in plan.steps:
+                if step.prop_name in self.projection:
+                    if step.kind == 'primitive':
+                        self.primitive(step.data_type, obj, step.prop_name, step.from_string)
+                    else:
+                        self.property(step.data_type, obj, step.prop_name, step.element_builder_type, step.key_type)
+                elif step.kind == 'verbatim':
+                    # A verbatim value cannot be projected and is always read
+                    self.verbatim(step.data_type, obj, step.get_value, step.set_value, step.get_prop_names)
+        self.end(obj)
+        return obj
+
+    def _child(self, json_data: Any) -> JsonReader:
+        """
+        Create a reader for an object held by the property being read.
+
+        Args:
+            json_data: The JSON data of the nested object
+
+        Returns:
+            A reader that applies the property's projection
+        """
+        return ProjectedReader(
+            json_data, self._child_projection, self.refs, self.classes, self.applied, self.definitions
+        )
+
+
+def read_projected(json_data: Any, paths: Iterable[str], classes: Optional[List[str]] = None) -> Optional[Serializable]:
+    """
+    Deserialize parsed JSON, populating only the properties on some paths.
+
+    Args:
+        json_data: The parsed JSON of an object
+        paths: The property paths to populate
+        classes: Optional class table of a dictionary mode document
+
+    Returns:
+        The deserialized object, or None if deserialization failed
+
+    Raises:
+        ValueError: If a path is malformed
+    """
+    return ProjectedReader(json_data, compile_paths(paths), classes=classes).read()
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 
 from __future__ import annotations
-from typing import Dict, Type, List, Optional, Any, TypeVar, Generic, Set, ClassVar
+import importlib
+import json
+import types
+import typing
+from typing import Dict, Type, List, Optional, Any, TypeVar, Generic, Set, Tuple, Callable, Mapping, ClassVar
 
 # Type variable for the built object
 T = TypeVar('T')
@@ -10,6 +14,18 @@ T = TypeVar('T')
 class Builder:
     pass
 
+# Creates a builder, optionally for an existing instance
+BuilderFactory = Callable[..., Builder]
+
+# Number of unknown class specs remembered before the negative cache is emptied
+MAX_NEGATIVE_ENTRIES = 1024
+
+# Upgrades the JSON of an object from one version of its class to a later one
+Migration = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# Entry point group in which installed packages declare their builder classes
+ENTRY_POINT_GROUP = 'elevated_objects.builders'
+
 class Registry:
     """
     Central registry for locating Builder classes by serializable class name.
@@ -18,7 +34,10 @@ class Registry:
     1. Builder class registration by class specification
     2. Builder class lookup by class specification
     3. Builder instance creation
-    4. Version validation (future functionality)
+    4. Serializable type detection by registered instance type
+    5. Class versions and the migrations that upgrade older JSON
+    6. Lazy registration, from "module:attr" locations, package entry points
+       or a manifest file, that imports a builder on first lookup
     
     The Registry serves as a central point of access for all Builder classes,
     allowing for discovery and instantiation without knowing specific builder classes.
@@ -27,16 +46,326 @@ class Registry:
     # Class variable to store registered builders
     _builders: ClassVar[Dict[str, Type[Builder]]] = {}
     
+    # Maps the type of registered instances to their class specification
+    _types: ClassVar[Dict[type, str]] = {}
+    
+    # Cache of is_serializable_type() results by type
+    _serializable_types: ClassVar[Dict[type, bool]] = {}
+    
+    # Builder factories by class spec, resolved on first use; None marks a class
+    # spec that has no builder
+    _factories: ClassVar[Dict[Any, Optional[BuilderFactory]]] = {}
+    
+    # Number of None entries in _factories
+    _negative_entries: ClassVar[int] = 0
+    
+    # Read-only copy of the registered factories, rebuilt after a registration
+    _snapshot: ClassVar[Optional[Mapping[str, BuilderFactory]]] = None
+    
+    # "module:attr" locations of the builder classes registered lazily and not imported yet
+    _lazy: ClassVar[Dict[str, str]] = {}
+    
+    # Current version of each versioned class spec
+    _versions: ClassVar[Dict[str, str]] = {}
+    
+    # Upgrades by class spec and version upgraded from: the version upgraded to, and the upgrade
+    _migrations: ClassVar[Dict[Tuple[str, Optional[str]], Tuple[str, Migration]]] = {}
+    
+    # Compiled migration chains by class spec, version upgraded from and version upgraded to
+    _chains: ClassVar[Dict[Tuple[str, Optional[str], str], Migration]] = {}
+    
+    # True once any migration is registered, checked first on hot paths
+    migrations_active: ClassVar[bool] = False
+    
     @classmethod
-    def register(cls, class_spec: str, builder_class: Type[Builder]) -> None:
+    def register(cls, class_spec: str, builder_class: Type[Builder], instance_type: Optional[type] = None) -> None:
         """
         Register a builder class for a given class specification.
         
         Args:
             class_spec: A string that uniquely identifies a serializable class
             builder_class: The builder class for that serializable class
+            instance_type: The type of the instances the builder creates; if None,
+                it is taken from the builder's generic argument, e.g. Builder[Person]
         """
         cls._builders[class_spec] = builder_class
+        cls._lazy.pop(class_spec, None)
+        if cls._factories.get(class_spec, builder_class) is None:
+            cls._negative_entries -= 1
+        cls._factories[class_spec] = builder_class
+        cls._snapshot = None
+        if instance_type is None:
+            instance_type = cls._builder_instance_type(builder_class)
+        if instance_type is not None:
+            cls._types[instance_type] = class_spec
+            cls._serializable_types[instance_type] = True
+    
+    @classmethod
+    def register_lazy(cls, class_spec: str, location: str) -> None:
+        """
+        Register the location of a builder class without importing it.
+        
+        The module is imported the first time the class spec is looked up;
+        importing it is expected to register the builder, typically with
+        @Builder.register. If it does not, the attribute at the location is
+        registered as the builder class. A class spec whose builder is
+        already registered keeps it.
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            location: The builder class as "module:attr", e.g. "app.models:PersonBuilder"
+            
+        Raises:
+            ValueError: If the location is not of the form "module:attr"
+        """
+        module_name, _, attr = location.partition(':')
+        if not module_name or not attr:
+            raise ValueError(f"Builder location {location!r} is not of the form 'module:attr'")
+        if class_spec in cls._builders:
+            return
+        cls._lazy[class_spec] = location
+        if cls._factories.get(class_spec, cls) is None:
+            # Forget that the class spec had no builder
+            del cls._factories[class_spec]
+            cls._negative_entries -= 1
+    
+    @classmethod
+    def discover(cls, group: str = ENTRY_POINT_GROUP) -> int:
+        """
+        Register lazily the builder classes that installed packages declare as entry points.
+        
+        Each entry point of the group maps a class spec to the builder
+        class's "module:attr" location, e.g. in a package's pyproject.toml:
+        
+            [project.entry-points."elevated_objects.builders"]
+            "app.models.Person" = "app.models:PersonBuilder"
+        
+        No module is imported until its class spec is looked up. Scanning the
+        installed packages takes time; load_manifest() avoids it.
+        
+        Args:
+            group: The entry point group
+            
+        Returns:
+            The number of entry points found
+        """
+        from importlib import metadata
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            selected = entry_points.select(group=group)
+        else:
+            selected = entry_points.get(group, ())
+        count = 0
+        for entry_point in selected:
+            cls.register_lazy(entry_point.name, entry_point.value)
+            count += 1
+        return count
+    
+    @classmethod
+    def load_manifest(cls, path: str) -> None:
+        """
+        Register lazily the builder classes listed in a manifest file.
+        
+        The manifest is a JSON object that maps class specs to "module:attr"
+        locations, as written by write_manifest().
+        
+        Args:
+            path: The path of the manifest
+            
+        Raises:
+            ValueError: If the manifest is malformed
+        """
+        with open(path, 'r', encoding='utf-8') as manifest:
+            locations = json.load(manifest)
+        if not isinstance(locations, dict):
+            raise ValueError(f"Builder manifest {path} is not a JSON object")
+        for class_spec, location in locations.items():
+            cls.register_lazy(class_spec, location)
+    
+    @classmethod
+    def write_manifest(cls, path: str) -> None:
+        """
+        Write the locations of all registered builder classes to a manifest file.
+        
+        Run this at build time, after importing or discovering every builder,
+        and call load_manifest() at startup instead.
+        
+        Args:
+            path: The path of the manifest
+        """
+        locations = dict(cls._lazy)
+        for class_spec, builder_class in cls._builders.items():
+            locations[class_spec] = f"{builder_class.__module__}:{builder_class.__qualname__}"
+        with open(path, 'w', encoding='utf-8') as manifest:
+            json.dump(locations, manifest, indent=2, sort_keys=True)
+    
+    @classmethod
+    def _import_lazy(cls, class_spec: str, location: str) -> Type[Builder]:
+        """
+        Import the builder class registered lazily for a class spec.
+        
+        Args:
+            class_spec: The class specification
+            location: The builder class as "module:attr"
+            
+        Returns:
+            The builder class
+            
+        Raises:
+            ImportError: If the module cannot be imported
+            AttributeError: If the module has no such attribute
+        """
+        module_name, _, attr = location.partition(':')
+        target: Any = importlib.import_module(module_name)
+        builder_class = cls._builders.get(class_spec)
+        if builder_class is None:
+            # Importing the module did not register the builder
+            for name in attr.split('.'):
+                target = getattr(target, name)
+            cls.register(class_spec, target)
+            builder_class = target
+        return builder_class
+    
+    @classmethod
+    def _builder_instance_type(cls, builder_class: Type[Builder]) -> Optional[type]:
+        """
+        Find the instance type a builder class declares through its generic base.
+        
+        Args:
+            builder_class: The builder class
+            
+        Returns:
+            The instance type, or None if the builder does not declare a concrete type
+        """
+        for klass in builder_class.__mro__:
+            for base in getattr(klass, '__orig_bases__', ()):
+                for arg in typing.get_args(base):
+                    if isinstance(arg, type):
+                        return arg
+        return None
+    
+    @classmethod
+    def get_class_spec_for_type(cls, instance_type: type) -> Optional[str]:
+        """
+        Get the class specification registered for an instance type.
+        
+        Args:
+            instance_type: The type of a serializable object
+            
+        Returns:
+            The class specification, or None if the type was not registered
+        """
+        return cls._types.get(instance_type)
+    
+    @classmethod
+    def is_serializable_type(cls, value_type: type) -> bool:
+        """
+        Check whether values of a type implement the Serializable protocol.
+        
+        Registered instance types are known up front; any other type is checked
+        structurally once and the answer is cached, so repeated checks are a
+        single dictionary lookup.
+        
+        Args:
+            value_type: The type to check
+            
+        Returns:
+            True if values of the type are Serializable, False otherwise
+        """
+        result = cls._serializable_types.get(value_type)
+        if result is None:
+            result = (
+                callable(getattr(value_type, 'visit', None))
+                and callable(getattr(value_type, 'get_class_spec', None))
+            )
+            cls._serializable_types[value_type] = result
+        return result
+    
+    @classmethod
+    def is_serializable(cls, value: Any) -> bool:
+        """
+        Check whether a value implements the Serializable protocol.
+        
+        Args:
+            value: The value to check
+            
+        Returns:
+            True if the value is Serializable, False otherwise
+        """
+        result = cls._serializable_types.get(type(value))
+        if result is None:
+            return cls.is_serializable_type(type(value))
+        return result
+    
+    @classmethod
+    def get_factory(cls, class_spec: Any) -> Optional[BuilderFactory]:
+        """
+        Get the callable that creates builders for a class, in a single lookup.
+        
+        The factory takes an optional existing instance, like the builder
+        class's constructor. Class specs without a builder are remembered, so
+        looking them up again is as cheap as looking up a registered one.
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class;
+                        any other value has no builder
+            
+        Returns:
+            The factory, or None if no builder is registered for the class specification
+        """
+        try:
+            return cls._factories[class_spec]
+        except KeyError:
+            return cls._resolve(class_spec)
+        except TypeError:
+            # An unhashable value read from a document
+            return None
+    
+    @classmethod
+    def _resolve(cls, class_spec: Any) -> Optional[BuilderFactory]:
+        """
+        Resolve a class spec that has not been looked up yet, importing its
+        builder if it was registered lazily, and cache the result.
+        
+        Args:
+            class_spec: The class specification
+            
+        Returns:
+            The factory, or None if no builder is registered for the class specification
+        """
+        factory = cls._builders.get(class_spec)
+        if factory is None and class_spec in cls._lazy:
+            return cls._import_lazy(class_spec, cls._lazy[class_spec])
+        if factory is None:
+            if cls._negative_entries >= MAX_NEGATIVE_ENTRIES:
+                # Documents full of distinct unknown class specs must not grow the cache forever
+                cls._factories = {spec: value for spec, value in cls._factories.items() if value is not None}
+                cls._negative_entries = 0
+            cls._negative_entries += 1
+        cls._factories[class_spec] = factory
+        return factory
+    
+    @classmethod
+    def snapshot(cls) -> Mapping[str, BuilderFactory]:
+        """
+        Get a read-only mapping of class specs to builder factories.
+        
+        The mapping does not change when builders are registered later; call
+        snapshot() again to see them. Builders registered lazily are only in
+        it once their modules have been imported. Hot loops can bind its get() method to a
+        local variable to resolve class specs without any class attribute lookup:
+        
+            get_factory = Registry.snapshot().get
+            for json_data in documents:
+                factory = get_factory(json_data.get('__class__'))
+        
+        Returns:
+            The class specs registered so far and their factories
+        """
+        snapshot = cls._snapshot
+        if snapshot is None:
+            snapshot = cls._snapshot = types.MappingProxyType(dict(cls._builders))
+        return snapshot
     
     @classmethod
     def get_builder_class(cls, class_spec: str) -> Type[Builder]:
@@ -52,9 +381,10 @@ class Registry:
         Raises:
             ValueError: If no builder is registered for the class specification
         """
-        if class_spec not in cls._builders:
+        factory = cls.get_factory(class_spec)
+        if factory is None:
             raise ValueError(f"No builder registered for {class_spec}")
-        return cls._builders[class_spec]
+        return factory
     
     @classmethod
     def create_builder(cls, class_spec: str, instance: Optional[Any] = None) -> Builder:
@@ -71,8 +401,10 @@ class Registry:
         Raises:
             ValueError: If no builder is registered for the class specification
         """
-        builder_class = cls.get_builder_class(class_spec)
-        return builder_class(instance)
+        factory = cls.get_factory(class_spec)
+        if factory is None:
+            raise ValueError(f"No builder registered for {class_spec}")
+        return factory(instance)
     
     @classmethod
     def has_builder(cls, class_spec: str) -> bool:
@@ -85,7 +417,7 @@ class Registry:
         Returns:
             True if a builder is registered, False otherwise
         """
-        return class_spec in cls._builders
+        return cls.get_factory(class_spec) is not None
     
     @classmethod
     def get_registered_classes(cls) -> List[str]:
@@ -98,7 +430,155 @@ class Registry:
         return list(cls._builders.keys())
     
     @classmethod
-    def validate_version(cls, class_spec: str, version: str) -> bool:
+    def set_version(cls, class_spec: str, version: str) -> None:
+        """
+        Set the current version of a class.
+        
+        Writers record the version of every object of the class in its JSON as
+        "__version__", and readers upgrade objects of older versions with the
+        registered migrations before building them.
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            version: The current version
+        """
+        cls._versions[class_spec] = version
+        cls._chains.clear()
+    
+    @classmethod
+    def get_version(cls, class_spec: str) -> Optional[str]:
+        """
+        Get the current version of a class.
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            
+        Returns:
+            The current version, or None if the class is not versioned
+        """
+        return cls._versions.get(class_spec)
+    
+    @classmethod
+    def register_migration(
+        cls,
+        class_spec: str,
+        from_version: Optional[str],
+        to_version: str,
+        upgrade: Migration
+    ) -> None:
+        """
+        Register the upgrade of the JSON of an object from one version of its class to the next.
+        
+        The upgrade receives the JSON object, including its envelope, before
+        any of it is read, and returns the upgraded JSON object; it may modify
+        and return the one it receives. Upgrades are chained: an object is
+        upgraded from its version to the version the upgrade produces, and so
+        on up to the current version.
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            from_version: The version upgraded from; None upgrades objects
+                          written before the class was versioned
+            to_version: The version upgraded to
+            upgrade: The upgrade function
+        """
+        cls._migrations[(class_spec, from_version)] = (to_version, upgrade)
+        cls._chains.clear()
+        cls.migrations_active = True
+    
+    @classmethod
+    def migration(cls, class_spec: str, from_version: Optional[str], to_version: str) -> Callable[[Migration], Migration]:
+        """
+        Decorator to register an upgrade function with register_migration().
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            from_version: The version upgraded from
+            to_version: The version upgraded to
+            
+        Returns:
+            A decorator function that registers the upgrade function
+            
+        Example:
+            @Registry.migration("app.models.Person", "1", "2")
+            def split_name(json_data):
+                json_data["first"], _, json_data["last"] = json_data.pop("name", "").partition(" ")
+                return json_data
+        """
+        def decorator(upgrade: Migration) -> Migration:
+            cls.register_migration(class_spec, from_version, to_version, upgrade)
+            return upgrade
+        return decorator
+    
+    @classmethod
+    def get_migration(cls, class_spec: str, from_version: Optional[str]) -> Optional[Migration]:
+        """
+        Get the function that upgrades the JSON of an object to the current version of its class.
+        
+        The chain of upgrades is compiled into one function on first use and
+        cached per version pair.
+        
+        Args:
+            class_spec: A string that uniquely identifies a serializable class
+            from_version: The version of the object, or None if it has none
+            
+        Returns:
+            The function, or None if the object needs no upgrade: it is at the
+            current version, its class is not versioned, or it has no version
+            and no upgrade from None is registered
+            
+        Raises:
+            ValueError: If no chain of upgrades leads to the current version
+        """
+        to_version = cls._versions.get(class_spec)
+        if to_version is None or from_version == to_version:
+            return None
+        key = (class_spec, from_version, to_version)
+        chain = cls._chains.get(key)
+        if chain is None:
+            if from_version is None and (class_spec, None) not in cls._migrations:
+                return None
+            chain = cls._chains[key] = cls._compile_chain(class_spec, from_version, to_version)
+        return chain
+    
+    @classmethod
+    def _compile_chain(cls, class_spec: str, from_version: Optional[str], to_version: str) -> Migration:
+        """
+        Compose the upgrades from one version of a class to another into one function.
+        
+        Args:
+            class_spec: The class specification
+            from_version: The version upgraded from
+            to_version: The version upgraded to
+            
+        Returns:
+            The composed upgrade, which also sets "__version__" to to_version
+            
+        Raises:
+            ValueError: If no chain of upgrades leads from from_version to to_version
+        """
+        upgrades: List[Migration] = []
+        visited: Set[Optional[str]] = set()
+        version = from_version
+        while version != to_version:
+            step = cls._migrations.get((class_spec, version))
+            if step is None or version in visited:
+                raise ValueError(f"No migration of {class_spec} from version {from_version} to {to_version}")
+            visited.add(version)
+            version, upgrade = step
+            upgrades.append(upgrade)
+        
+        steps = tuple(upgrades)
+        
+        def migrate(json_data: Dict[str, Any]) -> Dict[str, Any]:
+            for upgrade in steps:
+                json_data = upgrade(json_data)
+            json_data['__version__'] = to_version
+            return json_data
+        return migrate
+    
+    @classmethod
+    def validate_version(cls, class_spec: str, version: Optional[str]) -> bool:
         """
         Validate if the specified version of a class is supported.
         
@@ -107,10 +587,12 @@ class Registry:
             version: The version string to validate
             
         Returns:
-            True if the version is supported, False otherwise
-            
-        Note:
-            This is a placeholder for future functionality
+            True if objects of that version can be read: the class is not
+            versioned, the version is current, or a chain of migrations
+            upgrades it to the current version; False otherwise
         """
-        # Future functionality for version validation
-        return True
\ No newline at end of file
+        try:
+            cls.get_migration(class_spec, version)
+        except ValueError:
+            return False
+        return True
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+
+"""
+Declarative serializable classes.
+
+A class decorated with @schema declares its properties as annotated class
+attributes, and the decorator generates everything a hand-written model
+needs: __init__, visit(), get_class_spec(), a Builder with a with_* method
+per property, and the Registry entry. For example
+
+    @schema("app.models.Person")
+    class Person:
+        name: str = field(identity=True)
+        age: int = 0
+        address: Optional[Address] = None
+        contacts: List[str] = field(default_factory=list)
+
+is equivalent to the Person and PersonBuilder classes of examples.py. The
+generated class stores its properties in __slots__ unless slots=False, and
+its ClassPlan is seeded in PlanCache from the declaration, so the codecs use
+their compiled encoders and decoders without recording a visit first.
+"""
+
+from __future__ import annotations
+import sys
+import types
+import typing
+from typing import Dict, List, Any, Optional, Tuple, Type, Callable, TypeVar
+
+from .builder import Builder
+from .registry import Registry
+from .plans import ClassPlan, PlanStep, PlanCache
+from .serializable import Visitor
+
+C = TypeVar('C', bound=type)
+
+class _Missing:
+    """Marks a field without a default value."""
+
+    def __repr__(self) -> str:
+        return 'MISSING'
+
+MISSING: Any = _Missing()
+
+# Types of the properties that are visited as primitives, and their default values
+_PRIMITIVE_DEFAULTS: Dict[type, Any] = {str: '', int: 0, float: 0.0, bool: False}
+
+# Types of the properties that are visited as complex properties, by generic origin
+_CONTAINER_TYPES: Dict[Any, type] = {list: list, tuple: tuple, dict: dict, set: set, frozenset: frozenset}
+
+class Field:
+    """
+    The declaration of one property of a schema class.
+    """
+
+    __slots__ = (
+        'name', 'annotation', 'default', 'default_factory', 'identity',
+        'from_string', 'element_builder_type', 'kind', 'data_type', 'key_type'
+    )
+
+    def __init__(
+        self,
+        default: Any = MISSING,
+        default_factory: Optional[Callable[[], Any]] = None,
+        identity: bool = False,
+        from_string: Optional[Callable[[str], Any]] = None,
+        element_builder_type: Optional[Type[Builder]] = None
+    ):
+        """
+        Args:
+            default: The default value of the property
+            default_factory: A function that creates the default value, for mutable defaults
+            identity: If True, the property participates in the identity of the object
+            from_string: Optional function to convert from string to the property's type;
+                         a property with one is visited as a primitive
+            element_builder_type: Optional builder type for the objects the property holds
+        """
+        if default is not MISSING and default_factory is not None:
+            raise ValueError("A field cannot have both a default and a default_factory")
+        if isinstance(default, (list, dict, set)):
+            raise ValueError(f"Mutable default {default!r} would be shared by every instance; use default_factory")
+        self.default = default
+        self.default_factory = default_factory
+        self.identity = identity
+        self.from_string = from_string
+        self.element_builder_type = element_builder_type
+        # Set when the field is bound to its class
+        self.name = ''
+        self.annotation: Any = None
+        self.kind = 'property'
+        self.data_type: Any = object
+        self.key_type: Optional[type] = None
+
+    def __repr__(self) -> str:
+        return f"Field({self.name!r}, {self.kind}, {getattr(self.data_type, '__name__', self.data_type)})"
+
+    def _bind(self, name: str, annotation: Any) -> None:
+        """
+        Bind the field to its property and derive how the property is visited.
+
+        Args:
+            name: The name of the property
+            annotation: The resolved type annotation of the property, or None if it could not be resolved
+        """
+        self.name = name
+        self.annotation = annotation
+        value_type = _unwrap_optional(annotation)
+        origin = typing.get_origin(value_type) or value_type
+        if value_type in _PRIMITIVE_DEFAULTS or (self.from_string is not None and isinstance(value_type, type)):
+            self.kind = 'primitive'
+            self.data_type = value_type
+        elif origin in _CONTAINER_TYPES:
+            self.kind = 'property'
+            self.data_type = _CONTAINER_TYPES[origin]
+            args = typing.get_args(value_type)
+            if origin is dict and args and isinstance(args[0], type):
+                self.key_type = args[0]
+        else:
+            self.kind = 'property'
+            self.data_type = value_type if isinstance(value_type, type) else object
+
+        if self.default is MISSING and self.default_factory is None:
+            if annotation is not value_type:
+                # Optional[X]
+                self.default = None
+            elif value_type in _PRIMITIVE_DEFAULTS:
+                self.default = _PRIMITIVE_DEFAULTS[value_type]
+            elif origin in _CONTAINER_TYPES and origin is not tuple:
+                self.default_factory = origin
+            elif origin is tuple:
+                self.default = ()
+            else:
+                self.default = None
+
+    def step(self) -> PlanStep:
+        """
+        Get the plan step that visits the property.
+
+        Returns:
+            The step
+        """
+        if self.kind == 'primitive':
+            return PlanStep('primitive', self.data_type, self.name, from_string=self.from_string)
+        return PlanStep(
+            'property', self.data_type, self.name,
+            element_builder_type=self.element_builder_type, key_type=self.key_type
+        )
+
+
+def field(
+    default: Any = MISSING,
+    *,
+    default_factory: Optional[Callable[[], Any]] = None,
+    identity: bool = False,
+    from_string: Optional[Callable[[str], Any]] = None,
+    builder: Optional[Type[Builder]] = None
+) -> Any:
+    """
+    Declare a property of a schema class with options.
+
+    A property without a default gets the zero value of its type: "", 0,
+    0.0 or False for primitives, an empty list, dict or set for containers,
+    and None otherwise.
+
+    Args:
+        default: The default value of the property
+        default_factory: A function that creates the default value, for mutable defaults
+        identity: If True, the property participates in the identity of the object;
+                  if no property of a class does, they all do
+        from_string: Optional function to convert from string to the property's type
+        builder: Optional builder type for the objects the property holds
+
+    Returns:
+        The field declaration, to assign to the annotated class attribute
+    """
+    return Field(default, default_factory, identity, from_string, builder)
+
+
+def fields(cls: type) -> Tuple[Field, ...]:
+    """
+    Get the fields of a schema class.
+
+    Args:
+        cls: A class decorated with @schema
+
+    Returns:
+        The fields, in declaration order
+
+    Raises:
+        TypeError: If the class was not decorated with @schema
+    """
+    declared = getattr(cls, '__elevated_fields__', None)
+    if declared is None:
+        raise TypeError(f"{cls.__name__} is not a schema class")
+    return declared
+
+
+def schema(class_spec: str, *, slots: bool = True, version: Optional[str] = None) -> Callable[[C], C]:
+    """
+    Decorator that makes a class with annotated properties serializable.
+
+    The decorated class gets __init__ (taking every property as an optional
+    argument, in declaration order), visit(), get_class_spec(), and a
+    generated Builder as its Builder attribute, registered for class_spec.
+    Properties of the base classes of a schema class are inherited.
+
+    With slots=True, the class is recreated with a __slots__ entry per
+    property declared on it, so its instances have no __dict__. Methods of
+    such a class cannot use zero-argument super().
+
+    Args:
+        class_spec: The class specification string of the class
+        slots: If True, store the properties in __slots__
+        version: Optional current version of the class (see Registry.set_version)
+
+    Returns:
+        A decorator that returns the generated class
+
+    Example:
+        @schema("app.models.Address")
+        class Address:
+            street: str = field(identity=True)
+            city: str = field(identity=True)
+    """
+    def decorator(cls: C) -> C:
+        declared = _declared_fields(cls)
+        inherited: List[Field] = []
+        for base in reversed(cls.__mro__[1:]):
+            for base_field in base.__dict__.get('__elevated_fields__', ()):
+                if base_field.name not in declared and all(f.name != base_field.name for f in inherited):
+                    inherited.append(base_field)
+        all_fields = tuple(inherited) + tuple(declared.values())
+
+        namespace = {
+            name: value for name, value in cls.__dict__.items()
+            if name not in declared and name not in ('__dict__', '__weakref__')
+        }
+        if slots:
+            names = tuple(declared)
+            if not any('__weakref__' in base.__dict__.get('__slots__', ()) or
+                       (base is not object and '__slots__' not in base.__dict__)
+                       for base in cls.__mro__[1:]):
+                # The identity, mutation and intern caches hold instances weakly
+                names += ('__weakref__',)
+            namespace['__slots__'] = names
+        generated = typing.cast(C, type(cls)(cls.__name__, cls.__bases__, namespace))
+
+        plan = _plan(class_spec, all_fields)
+        generated.__elevated_fields__ = all_fields
+        generated.__init__ = _make_init(generated, all_fields)
+        generated.visit = _make_visit(plan)
+        generated.get_class_spec = lambda self: class_spec
+        generated.compiled_plan = True
+        generated.Builder = _make_builder(generated, all_fields)
+
+        Registry.register(class_spec, generated.Builder, generated)
+        if version is not None:
+            Registry.set_version(class_spec, version)
+        PlanCache.seed(plan)
+        return generated
+    return decorator
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    """
+    Get X from Optional[X].
+
+    Args:
+        annotation: A type annotation
+
+    Returns:
+        X if the annotation is Optional[X], Any for any other Union, else the annotation itself
+    """
+    if typing.get_origin(annotation) is typing.Union or (
+        hasattr(types, 'UnionType') and isinstance(annotation, types.UnionType)
+    ):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return args[0] if len(args) == 1 else Any
+    return annotation
+
+
+def _declared_fields(cls: type) -> Dict[str, Field]:
+    """
+    Collect the fields declared in the body of a class.
+
+    Args:
+        cls: The class
+
+    Returns:
+        The fields by property name, in declaration order
+    """
+    annotations = cls.__dict__.get('__annotations__', {})
+    module = sys.modules.get(cls.__module__)
+    globalns = dict(vars(module)) if module is not None else {}
+    # The class may refer to itself, e.g. in List["Team"]
+    localns = {cls.__name__: cls}
+
+    declared: Dict[str, Field] = {}
+    for name, annotation in annotations.items():
+        if typing.get_origin(annotation) is typing.ClassVar or (
+            isinstance(annotation, str) and annotation.startswith(('ClassVar', 'typing.ClassVar'))
+        ):
+            continue
+        value = cls.__dict__.get(name, MISSING)
+        declaration = value if isinstance(value, Field) else Field(default=value)
+        try:
+            if isinstance(annotation, str):
+                annotation = eval(annotation, globalns, localns)
+        except Exception:
+            # Declared in terms of a name that is not defined yet; read by the shape of its JSON
+            annotation = None
+        declaration._bind(name, annotation)
+        declared[name] = declaration
+    return declared
+
+
+def _plan(class_spec: str, all_fields: Tuple[Field, ...]) -> ClassPlan:
+    """
+    Build the plan of a schema class from its fields.
+
+    Args:
+        class_spec: The class specification
+        all_fields: The fields of the class
+
+    Returns:
+        The plan, whose identity steps are the identity fields, or all fields if none is one
+    """
+    steps = [declared.step() for declared in all_fields]
+    identity_fields = [declared for declared in all_fields if declared.identity]
+    identity_steps = [declared.step() for declared in identity_fields] if identity_fields else list(steps)
+    return ClassPlan(class_spec, steps, identity_steps)
+
+
+def _make_init(cls: type, all_fields: Tuple[Field, ...]) -> Callable[..., None]:
+    """
+    Generate the __init__ of a schema class.
+
+    The function is compiled from source, like the __init__ of a dataclass,
+    so that creating an instance costs no more than with a hand-written one.
+
+    Args:
+        cls: The class
+        all_fields: The fields of the class
+
+    Returns:
+        The __init__ function, taking every property as an optional argument
+    """
+    namespace: Dict[str, Any] = {'MISSING': MISSING}
+    parameters: List[str] = []
+    body: List[str] = []
+    for index, declared in enumerate(all_fields):
+        name = declared.name
+        if declared.default_factory is not None:
+            namespace[f'_factory_{index}'] = declared.default_factory
+            parameters.append(f'{name}=MISSING')
+            body.append(f'    self.{name} = _factory_{index}() if {name} is MISSING else {name}')
+        else:
+            namespace[f'_default_{index}'] = declared.default
+            parameters.append(f'{name}=_default_{index}')
+            body.append(f'    self.{name} = {name}')
+    source = f"def __init__(self, {', '.join(parameters)}):\n" + ('\n'.join(body) or '    pass') + '\n'
+    exec(source, namespace)
+    init = namespace['__init__']
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    init.__module__ = cls.__module__
+    return init
+
+
+def _make_visit(plan: ClassPlan) -> Callable[..., None]:
+    """
+    Generate the visit() of a schema class.
+
+    Args:
+        plan: The plan of the class
+
+    Returns:
+        The visit function, which replays the plan
+    """
+    replay = plan.replay
+
+    def visit(self: Any, visitor: Visitor, identity_only: bool = False) -> None:
+        replay(visitor, self, identity_only)
+
+    return visit
+
+
+def _make_builder(cls: type, all_fields: Tuple[Field, ...]) -> Type[Builder]:
+    """
+    Generate the Builder of a schema class.
+
+    Args:
+        cls: The class
+        all_fields: The fields of the class
+
+    Returns:
+        The builder class, with a with_<name> method per property
+    """
+    def _create_default_instance(self: Builder) -> Any:
+        return cls()
+
+    def make_with(name: str) -> Callable[[Builder, Any], Builder]:
+        def with_value(self: Builder, value: Any) -> Builder:
+            setattr(self._instance, name, value)
+            return self
+        with_value.__name__ = f"with_{name}"
+        with_value.__qualname__ = f"{cls.__qualname__}.Builder.with_{name}"
+        return with_value
+
+    body: Dict[str, Any] = {
+        '__module__': cls.__module__,
+        '__qualname__': f"{cls.__qualname__}.Builder",
+        '__doc__': f"Builder for {cls.__name__} objects.",
+        '_create_default_instance': _create_default_instance,
+    }
+    for declared in all_fields:
+        body[f"with_{declared.name}"] = make_with(declared.name)
+    return types.new_class(f"{cls.__name__}Builder", (Builder[cls],), {}, lambda namespace: namespace.update(body))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from __future__ import annotations
-from typing import Protocol, TypeVar, Optional, Any, Union, Generic
+from typing import Protocol, TypeVar, Optional, Any, Union, Generic, runtime_checkable
 
 T = TypeVar('T', bound='Serializable')
 
@@ -108,6 +108,7 @@ class Visitor(Protocol, Generic[T]):
         ...
 
 
+@runtime_checkable
 class Serializable(Protocol):
     """
     Protocol defining the interface for serializable objects.
@@ -119,6 +120,9 @@ class Serializable(Protocol):
     This protocol should be implemented by any class that needs to be
     serialized, compared, or otherwise introspected by the elevated_objects
     framework.
+    
+    isinstance(obj, Serializable) works, but is slow; the framework's own hot
+    paths use Registry.is_serializable(obj) instead.
     """
     
     def visit(self, visitor: Visitor[Any], identity_only: bool = False) -> None:
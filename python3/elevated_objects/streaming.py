@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import codecs
+import io
+import json
+from typing import Dict, List, Any, Set, Optional, Type, TypeVar, Union, Callable, IO, Iterator, Iterable
+
+from .serializable import Serializable, Visitor
+from .builder import Builder
+from .identity import IdentityCache, scoped
+from .registry import Registry
+from .json import JsonReader, from_json
+from .projection import ProjectedReader, compile_paths
+
+T = TypeVar('T', bound=Serializable)
+
+# Number of characters buffered before a chunk is written to the stream
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Characters at the end of the buffer that may hold the start of a token that
+# has not been read completely, such as a literal, a number or an escape
+_TOKEN_SLACK = 16
+
+# Characters that may continue a number
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+class _Frame:
+    """
+    Output state of one object whose JSON envelope is being streamed.
+    """
+
+    def __init__(self, envelope: str, is_ref: bool, refs: Dict[str, Dict[Union[str, int], Serializable]]):
+        self.envelope = envelope
+        self.is_ref = is_ref
+        self.refs = refs
+        self.opened = False
+        self.verbatim = False
+
+
+class JsonStreamWriter(Visitor[T]):
+    """
+    Visitor that serializes a Serializable object as JSON directly to a stream.
+
+    The JsonStreamWriter produces exactly the same text as serialize(), but
+    writes it incrementally instead of building an intermediate dict tree and
+    encoding it in one piece. Only the envelopes of the objects currently being
+    visited and one chunk of pending output are held in memory.
+    """
+
+    def __init__(
+        self,
+        stream: IO[Any],
+        refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        binary: Optional[bool] = None
+    ):
+        """
+        Initialize the stream writer.
+
+        Args:
+            stream: A text or binary file-like object with a write() method
+            refs: Optional dictionary to track serialized objects by class and id
+            chunk_size: Number of characters to buffer before writing to the stream
+            binary: Whether the stream expects bytes; detected from the stream if None
+        """
+        self.stream = stream
+        self.refs = refs if refs is not None else {}
+        self.chunk_size = chunk_size
+        if binary is None:
+            binary = isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(stream, 'mode', '')
+        self.binary = binary
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._frames: List[_Frame] = []
+        self._next_refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None
+
+    def begin(self, obj: T, parent_prop_name: Optional[str] = None) -> None:
+        """
+        Begin visiting an object and prepare its JSON envelope.
+
+        The envelope is written lazily so that a verbatim value can still replace it.
+
+        Args:
+            obj: The object being visited
+            parent_prop_name: Optional name of the property in the parent object
+        """
+        refs = self._next_refs if self._next_refs is not None else self.refs
+        self._next_refs = None
+
+        class_spec = obj.get_class_spec()
+        if class_spec not in refs:
+            refs[class_spec] = {}
+
+        envelope = '{"__class__": ' + json.dumps(class_spec)
+        object_id = IdentityCache.get_id(obj)
+        if object_id:
+            is_ref = object_id in refs[class_spec]
+            if not is_ref:
+                refs[class_spec][object_id] = obj
+            envelope += ', "__id__": ' + json.dumps(object_id)
+        else:
+            is_ref = False
+        envelope += ', "__is_ref__": ' + ('true' if is_ref else 'false')
+        if not is_ref:
+            version = Registry.get_version(class_spec)
+            if version is not None:
+                envelope += ', "__version__": ' + json.dumps(version)
+
+        self._frames.append(_Frame(envelope, is_ref, refs))
+
+    def end(self, obj: T) -> None:
+        """
+        End visiting an object and close its JSON representation.
+
+        Args:
+            obj: The object being visited
+        """
+        frame = self._frames.pop()
+        if frame.verbatim:
+            return
+        if not frame.opened:
+            self._emit(frame.envelope)
+        self._emit('}')
+
+    def owner(self, target: T, owner_prop_name: str) -> None:
+        """
+        Visit the owner relationship.
+
+        Args:
+            target: The target object
+            owner_prop_name: The property name in the owner that references this object
+        """
+        pass
+
+    def verbatim(
+        self,
+        data_type: type,
+        target: Serializable,
+        get_value: Callable[[Serializable], Any],
+        set_value: Callable[[Serializable, Any], None],
+        get_prop_names: Callable[[], Set[str]]
+    ) -> None:
+        """
+        Write a verbatim value in place of the object's envelope.
+
+        Args:
+            data_type: The type of the data being visited
+            target: The object containing the property
+            get_value: A function to get the property value
+            set_value: A function to set the property value
+            get_prop_names: A function to get the names of all properties
+
+        Raises:
+            ValueError: If other properties of the object have already been written
+        """
+        frame = self._frames[-1]
+        if frame.is_ref:
+            return
+        if frame.opened:
+            raise ValueError("verbatim() must be visited before any other property when streaming")
+
+        frame.verbatim = True
+        self._write_value(get_value(target))
+
+    def primitive(
+        self,
+        data_type: type,
+        target: Serializable,
+        prop_name: str,
+        from_string: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        """
+        Write a primitive property (int, float, str, etc.).
+
+        Args:
+            data_type: The type of the primitive data
+            target: The object containing the property
+            prop_name: The name of the property
+            from_string: Optional function to convert from string to the data type
+        """
+        if self._frames[-1].is_ref:
+            return
+
+        value = getattr(target, prop_name, None)
+        if value is not None:
+            self._key(prop_name)
+            self._write_value(value)
+
+    def property(
+        self,
+        prop_type: type,
+        target: Serializable,
+        prop_name: str,
+        element_builder_type: Optional[Type[Builder]] = None,
+        key_type: Optional[type] = None
+    ) -> None:
+        """
+        Write a complex property (object, list, dictionary, etc.).
+
+        Args:
+            prop_type: The type of the property (e.g., list, dict, Serializable)
+            target: The object containing the property
+            prop_name: The name of the property
+            element_builder_type: Optional builder type for elements
+            key_type: Optional type for dictionary keys
+        """
+        if self._frames[-1].is_ref:
+            return
+
+        value = getattr(target, prop_name, None)
+        self._key(prop_name)
+        if value is None:
+            self._emit('null')
+        elif isinstance(value, (list, tuple)):
+            self._emit('[')
+            for index, item in enumerate(value):
+                if index:
+                    self._emit(', ')
+                self._write_element(item)
+            self._emit(']')
+        elif isinstance(value, dict):
+            self._emit('{')
+            for index, (key, item) in enumerate(value.items()):
+                if index:
+                    self._emit(', ')
+                self._emit(json.dumps(str(key)) + ': ')
+                self._write_element(item)
+            self._emit('}')
+        elif Registry.is_serializable(value):
+            self._write_object(value, self._frames[-1].refs)
+        else:
+            self._write_value(value)
+
+    def write(self, obj: Any) -> None:
+        """
+        Stream the JSON representation of a value and flush all buffered output.
+
+        A Serializable object is written using this writer's reference table;
+        other values are written as to_json() would convert them.
+
+        Args:
+            obj: A Serializable object, or any value accepted by to_json()
+        """
+        if Registry.is_serializable(obj):
+            self._write_object(obj, self.refs)
+        else:
+            self._write_value(obj)
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Write any buffered output to the stream and flush the stream if it supports it.
+        """
+        self._flush_buffer()
+        flush = getattr(self.stream, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def _write_object(self, obj: Serializable, refs: Dict[str, Dict[Union[str, int], Serializable]]) -> None:
+        """
+        Stream a Serializable object using the given reference table.
+
+        Args:
+            obj: The object to write
+            refs: The reference table the object's ID is recorded in
+        """
+        self._next_refs = refs
+        obj.visit(self)
+
+    def _write_element(self, item: Any) -> None:
+        """
+        Stream an element of a list or map property, sharing the current object's reference table.
+
+        Args:
+            item: The element to write
+        """
+        if item is None:
+            self._emit('null')
+        elif Registry.is_serializable(item):
+            self._write_object(item, self._frames[-1].refs)
+        else:
+            self._write_value(item)
+
+    def _write_value(self, value: Any) -> None:
+        """
+        Stream a value exactly as json.dumps(to_json(value)) would encode it.
+
+        Args:
+            value: The value to write
+        """
+        if value is None or isinstance(value, (str, int, float, bool)):
+            self._emit(json.dumps(value))
+        elif Registry.is_serializable(value):
+            # to_json() gives every top-level object a fresh reference table
+            self._write_object(value, {})
+        elif isinstance(value, (list, tuple)):
+            self._emit('[')
+            for index, item in enumerate(value):
+                if index:
+                    self._emit(', ')
+                self._write_value(item)
+            self._emit(']')
+        elif isinstance(value, set):
+            self._emit('{"__native__": "Set", "__values__": [')
+            for index, item in enumerate(value):
+                if index:
+                    self._emit(', ')
+                self._write_value(item)
+            self._emit(']}')
+        elif isinstance(value, dict):
+            self._emit('{"__native__": "Dict"')
+            for key, item in value.items():
+                self._emit(', ' + json.dumps(str(key)) + ': ')
+                self._write_value(item)
+            self._emit('}')
+        else:
+            self._emit(json.dumps(str(value)))
+
+    def _key(self, prop_name: str) -> None:
+        """
+        Write the key of the next property of the current object, opening its envelope if needed.
+
+        Args:
+            prop_name: The name of the property
+        """
+        frame = self._frames[-1]
+        if not frame.opened:
+            self._emit(frame.envelope)
+            frame.opened = True
+        self._emit(', ' + json.dumps(prop_name) + ': ')
+
+    def _emit(self, text: str) -> None:
+        """
+        Buffer output text, writing a chunk to the stream once the buffer is full.
+
+        Args:
+            text: The text to write
+        """
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.chunk_size:
+            self._flush_buffer()
+
+    def _flush_buffer(self) -> None:
+        """
+        Write the buffered output to the stream as one chunk.
+        """
+        if not self._buffer:
+            return
+        chunk = ''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self.stream.write(chunk.encode('utf-8') if self.binary else chunk)
+
+
+@scoped
+def serialize_to(obj: Any, stream: IO[Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Serialize a Serializable object as JSON directly to a text or binary stream.
+
+    The output is identical to serialize(obj), but is written in chunks of
+    about chunk_size characters without materializing the whole document.
+
+    Args:
+        obj: The object to serialize
+        stream: A text or binary file-like object with a write() method
+        chunk_size: Number of characters to buffer before writing to the stream
+    """
+    JsonStreamWriter(stream, chunk_size=chunk_size).write(obj)
+
+
+class JsonStreamReader:
+    """
+    Incremental reader that deserializes a sequence of JSON documents from a stream.
+
+    The JsonStreamReader reads a text or binary stream in chunks and yields
+    each top-level value as soon as it is complete. The stream may contain
+    newline-delimited JSON (or any whitespace-separated sequence of JSON
+    values); a top-level array is unwrapped and its elements are yielded one
+    at a time. All records share one reference table, so a record with
+    __is_ref__ resolves to the object defined by an earlier record. Records
+    may be plain or dictionary mode documents (see json.serialize).
+    """
+
+    def __init__(
+        self,
+        stream: IO[Any],
+        refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        unwrap_arrays: bool = True,
+        paths: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize the stream reader.
+
+        Args:
+            stream: A text or binary file-like object with a read() method
+            refs: Optional dictionary to track deserialized objects by class and id
+            chunk_size: Number of characters or bytes to read from the stream at a time
+            unwrap_arrays: If True, yield the elements of top-level arrays instead of the arrays
+            paths: Optional property paths to populate in every record (see projection)
+        """
+        self.stream = stream
+        self.refs = refs if refs is not None else {}
+        self.chunk_size = chunk_size
+        self.unwrap_arrays = unwrap_arrays
+        self.projection = compile_paths(paths) if paths is not None else None
+        # Shared by the projected readers of all records
+        self._applied: Dict[Any, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._text_decoder: Optional[codecs.IncrementalDecoder] = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate over the deserialized top-level values.
+
+        Returns:
+            An iterator of deserialized objects (or plain values for non-Serializable JSON)
+        """
+        while self._skip_whitespace():
+            if self.unwrap_arrays and self._buffer[self._pos] == '[':
+                self._pos += 1
+                yield from self._read_array()
+            else:
+                yield self._build(self._parse_value())
+
+    def _read_array(self) -> Iterator[Any]:
+        """
+        Yield the elements of a top-level array whose opening bracket has been consumed.
+
+        Raises:
+            ValueError: If the array is malformed or truncated
+        """
+        if not self._skip_whitespace():
+            raise ValueError("Unterminated JSON array")
+        if self._buffer[self._pos] == ']':
+            self._pos += 1
+            return
+        while True:
+            if not self._skip_whitespace():
+                raise ValueError("Unterminated JSON array")
+            yield self._build(self._parse_value())
+            if not self._skip_whitespace():
+                raise ValueError("Unterminated JSON array")
+            delimiter = self._buffer[self._pos]
+            self._pos += 1
+            if delimiter == ']':
+                return
+            if delimiter != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {delimiter!r}")
+
+    def _build(self, json_data: Any) -> Any:
+        """
+        Deserialize one parsed value using the shared reference table.
+
+        Dictionary mode records ({"__classes__": [...], "__root__": ...}) are
+        read with their own class table.
+
+        Args:
+            json_data: The parsed JSON value
+
+        Returns:
+            The deserialized object
+        """
+        classes: Optional[List[str]] = None
+        if isinstance(json_data, dict) and '__classes__' in json_data and '__root__' in json_data:
+            classes = json_data['__classes__']
+            json_data = json_data['__root__']
+
+        if isinstance(json_data, dict):
+            class_spec = json_data.get('__class__')
+            if classes is not None and isinstance(class_spec, int):
+                class_spec = classes[class_spec]
+            if Registry.has_builder(class_spec):
+                if self.projection is not None:
+                    return ProjectedReader(json_data, self.projection, self.refs, classes, applied=self._applied).read()
+                return JsonReader(json_data, self.refs, classes).read()
+        return from_json(json_data, classes)
+
+    def _parse_value(self) -> Any:
+        """
+        Parse the JSON value starting at the current position, reading more input as needed.
+
+        Returns:
+            The parsed JSON value
+
+        Raises:
+            json.JSONDecodeError: If the value is malformed or the stream ends inside it;
+                                  a malformed value is reported without reading past it
+        """
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as error:
+                if self._eof or _is_malformed(error, self._buffer):
+                    raise
+                self._fill(len(self._buffer) - self._pos)
+                continue
+            # A number at the end of the buffer, or followed by the start of a
+            # fraction or exponent there, may continue in the next chunk
+            buffer = self._buffer
+            if not self._eof and isinstance(value, (int, float)) and not isinstance(value, bool) \
+                    and (end == len(buffer) or (buffer[end] in _NUMBER_CHARS and end + _TOKEN_SLACK >= len(buffer))):
+                self._fill(len(buffer) - self._pos)
+                continue
+            self._pos = end
+            return value
+
+    def _skip_whitespace(self) -> bool:
+        """
+        Advance past whitespace, reading more input as needed.
+
+        Returns:
+            True if there is a non-whitespace character at the current position, False at end of stream
+        """
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return True
+            if self._eof:
+                return False
+            self._fill(0)
+
+    def _fill(self, pending: int) -> None:
+        """
+        Read the next chunk of the stream into the buffer, discarding consumed input.
+
+        Args:
+            pending: Size of the incomplete value at the current position; reads grow with it
+                     so that re-parsing a large value stays linear
+        """
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        chunk = self.stream.read(max(self.chunk_size, pending))
+        if not chunk:
+            self._eof = True
+            if self._text_decoder is not None:
+                self._buffer += self._text_decoder.decode(b'', final=True)
+            return
+        if isinstance(chunk, bytes):
+            if self._text_decoder is None:
+                self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = self._text_decoder.decode(chunk)
+        self._buffer += chunk
+
+
+def _is_malformed(error: json.JSONDecodeError, buffer: str) -> bool:
+    """
+    Check whether a decode error is caused by malformed input rather than by input not read yet.
+
+    Args:
+        error: The error raised while decoding the buffer
+        buffer: The decoded buffer
+
+    Returns:
+        True if reading more of the stream cannot make the value valid
+    """
+    if error.msg.startswith('Unterminated string'):
+        return False
+    return error.pos + _TOKEN_SLACK < len(buffer)
+
+
+def deserialize_from(
+    stream: IO[Any],
+    refs: Optional[Dict[str, Dict[Union[str, int], Serializable]]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    paths: Optional[Iterable[str]] = None
+) -> Iterator[Any]:
+    """
+    Deserialize the JSON documents in a text or binary stream one at a time.
+
+    Accepts newline-delimited JSON, concatenated JSON documents, or a single
+    top-level array, whose elements are yielded individually.
+
+    Args:
+        stream: A text or binary file-like object with a read() method
+        refs: Optional dictionary to track deserialized objects by class and id across records
+        chunk_size: Number of characters or bytes to read from the stream at a time
+        paths: Optional property paths to populate in every record, e.g.
+               ["name", "address.city"]; other properties keep their defaults
+
+    Returns:
+        An iterator over the deserialized objects
+    """
+    return iter(JsonStreamReader(stream, refs, chunk_size, paths=paths))
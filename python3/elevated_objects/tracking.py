@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import itertools
+import weakref
+from typing import Dict, Any, Optional, Tuple, Callable, Iterator, ClassVar
+
+from .identity import IdentityCache
+
+class MutationTracker:
+    """
+    Process-wide, weakly-referenced mutation versions of watched objects.
+
+    Caches of data derived from an object (such as FragmentCache) watch the
+    object and remember its version; every mutation through the object's
+    Builder, or a call to touch(), gives a watched object a new version.
+    Versions are drawn from one process-wide clock, so an object that is
+    garbage collected and replaced by another at the same address never has
+    the version of its predecessor.
+    """
+
+    # Maps id(obj) to a weak reference to obj and its current version
+    _versions: ClassVar[Dict[int, Tuple[weakref.ref, int]]] = {}
+
+    # Source of new versions
+    _clock: ClassVar[Iterator[int]] = itertools.count(1)
+
+    @classmethod
+    def watch(cls, obj: Any) -> Optional[int]:
+        """
+        Start tracking an object's mutations, if it is not tracked yet.
+
+        Args:
+            obj: The object to watch
+
+        Returns:
+            The object's current version, or None if the object cannot be
+            weakly referenced and therefore cannot be watched
+        """
+        key = id(obj)
+        entry = cls._versions.get(key)
+        if entry is not None and entry[0]() is obj:
+            return entry[1]
+        try:
+            ref = weakref.ref(obj, cls._forget(key))
+        except TypeError:
+            return None
+        version = next(cls._clock)
+        cls._versions[key] = (ref, version)
+        return version
+
+    @classmethod
+    def is_current(cls, key: int, version: int) -> bool:
+        """
+        Check whether a watched object still has a version.
+
+        Args:
+            key: The id() of the object
+            version: The version returned by watch()
+
+        Returns:
+            True if the object is alive and has not been mutated since
+        """
+        entry = cls._versions.get(key)
+        return entry is not None and entry[1] == version
+
+    @classmethod
+    def get_object(cls, key: int) -> Any:
+        """
+        Get a watched object by its id().
+
+        Args:
+            key: The id() of the object
+
+        Returns:
+            The object, or None if it is not watched or was garbage collected
+        """
+        entry = cls._versions.get(key)
+        return entry[0]() if entry is not None else None
+
+    @classmethod
+    def touch(cls, obj: Any) -> None:
+        """
+        Give a watched object a new version.
+
+        Args:
+            obj: The object that was mutated
+        """
+        key = id(obj)
+        entry = cls._versions.get(key)
+        if entry is not None and entry[0]() is obj:
+            cls._versions[key] = (entry[0], next(cls._clock))
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Stop watching all objects; everything derived from their versions becomes stale.
+        """
+        cls._versions.clear()
+
+    @classmethod
+    def _forget(cls, key: int) -> Callable[[weakref.ref], None]:
+        """
+        Create the weak reference callback that drops a dead object's entry.
+
+        Args:
+            key: The id() of the referenced object
+
+        Returns:
+            The callback
+        """
+        def forget(ref: weakref.ref) -> None:
+            entry = cls._versions.get(key)
+            if entry is not None and entry[0] is ref:
+                del cls._versions[key]
+        return forget
+
+
+def touch(obj: Any) -> None:
+    """
+    Mark an object as modified after changing it without its Builder.
+
+    Invalidates everything cached for the object, such as its object ID and
+    the encoded fragments that contain it.
+
+    Args:
+        obj: The object that was modified
+    """
+    IdentityCache.invalidate(obj)
+    MutationTracker.touch(obj)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevated_objects import binary
+from elevated_objects.interning import InternPool
+from elevated_objects.json import serialize, deserialize
+from elevated_objects.examples import AddressBuilder, PersonBuilder
+
+
+class BinaryRoundTripTest(unittest.TestCase):
+    """Values encoded by binary.serialize() and decoded by binary.deserialize()."""
+
+    def round_trip(self, value):
+        return binary.deserialize(binary.serialize(value))
+
+    def test_scalars_and_containers(self):
+        value = [None, True, 0, -1, 300, 2 ** 70, 1.5, "text", b"bytes", {"a": [1, 2]}, {3, 4}]
+        self.assertEqual(self.round_trip(value), value)
+
+    def test_tuple_keys(self):
+        self.assertEqual(self.round_trip({(1, 2): 'a', (3, (4, 5)): 'b'}), {(1, 2): 'a', (3, (4, 5)): 'b'})
+
+    def test_sets_of_tuples_and_frozensets(self):
+        self.assertEqual(self.round_trip({(1, 2), (3, 4)}), {(1, 2), (3, 4)})
+        self.assertEqual(self.round_trip({frozenset({1}), frozenset({2, 3})}), {frozenset({1}), frozenset({2, 3})})
+
+    def test_object_with_tuple_set_metadata(self):
+        address = AddressBuilder().with_street("1 Main St").with_city("Springfield").done()
+        person = PersonBuilder().with_name("ann").with_age(30).with_address(address).done()
+        person.metadata = {"pairs": {('a', 'b')}}
+        copy = self.round_trip(person)
+        self.assertEqual(copy.name, "ann")
+        self.assertEqual(copy.address.city, "Springfield")
+        self.assertEqual(copy.metadata, {"pairs": {('a', 'b')}})
+
+    def test_truncated_document(self):
+        data = binary.serialize({"key": "value"})
+        with self.assertRaises(ValueError):
+            binary.deserialize(data[:-2])
+
+
+class BinaryInterningTest(unittest.TestCase):
+    """Interned classes read with the binary codec."""
+
+    def setUp(self):
+        InternPool.enable("examples.Address")
+        address = AddressBuilder().with_street("1 Main St").with_city("Springfield").done()
+        self.person = PersonBuilder().with_name("ann").with_address(address).done()
+
+    def tearDown(self):
+        InternPool.disable("examples.Address")
+
+    def test_decodes_share_interned_instance(self):
+        data = binary.serialize(self.person)
+        first = binary.deserialize(data)
+        second = binary.deserialize(data)
+        self.assertIsNot(first, second)
+        self.assertIs(first.address, second.address)
+
+    def test_codecs_share_interned_instance(self):
+        from_json = deserialize(serialize(self.person))
+        from_binary = binary.deserialize(binary.serialize(self.person))
+        self.assertIs(from_binary.address, from_json.address)
+
+
+if __name__ == '__main__':
+    unittest.main()
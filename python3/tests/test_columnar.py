@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevated_objects.json import serialize, deserialize
+from elevated_objects.plans import PlanCache
+from elevated_objects.examples import AddressBuilder, PersonBuilder
+from benchmarks.serialization import TeamBuilder
+
+
+class ColumnarTest(unittest.TestCase):
+    """Lists of objects written with serialize(..., columnar=True)."""
+
+    def setUp(self):
+        shared = AddressBuilder().with_street("1 Main St").with_city("Springfield").done()
+        team = TeamBuilder().with_name("core")
+        for name, age in (("ann", 30), ("bob", 40), ("cyd", 50)):
+            team.add_member(PersonBuilder().with_name(name).with_age(age).with_address(shared).done())
+        self.team = team.done()
+        self.text = serialize(self.team, columnar=True)
+
+    def tearDown(self):
+        PlanCache.opt_in("examples.Person")
+
+    def assertRoundTrip(self):
+        copy = deserialize(self.text)
+        self.assertEqual([member.name for member in copy.members], ["ann", "bob", "cyd"])
+        self.assertEqual([member.age for member in copy.members], [30, 40, 50])
+        self.assertIs(copy.members[0].address, copy.members[2].address)
+        self.assertIs(copy.roster["bob"], copy.members[1])
+        self.assertEqual(serialize(copy, columnar=True), self.text)
+
+    def test_batch_is_columnar(self):
+        self.assertIn('"__columns__": "examples.Person"', self.text)
+        self.assertRoundTrip()
+
+    def test_read_without_compiled_plan(self):
+        PlanCache.opt_out("examples.Person")
+        copy = deserialize(self.text)
+        self.assertEqual([member.name for member in copy.members], ["ann", "bob", "cyd"])
+        self.assertEqual([member.age for member in copy.members], [30, 40, 50])
+        self.assertEqual(copy.members[1].address.city, "Springfield")
+        self.assertIs(copy.roster["bob"], copy.members[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevated_objects.json import serialize, deserialize
+from elevated_objects.patches import Baseline, apply_patch, index
+from elevated_objects.examples import AddressBuilder, PersonBuilder
+
+
+class BaselineDiffTest(unittest.TestCase):
+    """Patches computed by Baseline.diff() and applied by apply_patch()."""
+
+    def setUp(self):
+        address = AddressBuilder().with_street("1 Main St").with_city("Springfield").done()
+        self.root = PersonBuilder().with_name("root").with_age(40).with_address(address).done()
+        self.peer = deserialize(serialize(self.root))
+        self.baseline = Baseline(self.root)
+
+    def assertInSync(self):
+        self.assertEqual(serialize(self.peer), serialize(self.root))
+
+    def test_unchanged_root_gives_empty_patch(self):
+        self.assertEqual(self.baseline.diff(), {"__patch__": []})
+
+    def test_property_change(self):
+        PersonBuilder(self.root).with_age(41)
+        patch = self.baseline.diff()
+        self.assertEqual(len(patch["__patch__"]), 1)
+        apply_patch(self.peer, patch)
+        self.assertInSync()
+
+    def test_root_rename_then_second_edit(self):
+        refs = index(self.peer)
+
+        PersonBuilder(self.root).with_name("newroot")
+        patch = self.baseline.diff()
+        self.assertNotEqual(patch, {"__patch__": []})
+        apply_patch(self.peer, patch, refs)
+        self.assertEqual(self.peer.name, "newroot")
+        self.assertInSync()
+
+        PersonBuilder(self.root).with_age(77)
+        patch = self.baseline.diff()
+        self.assertEqual(len(patch["__patch__"]), 1)
+        apply_patch(self.peer, patch, refs)
+        self.assertEqual(self.peer.age, 77)
+        self.assertInSync()
+
+        self.assertIs(refs["examples.Person"]["newroot"], self.peer)
+        self.assertNotIn("root", refs["examples.Person"])
+        self.assertEqual(self.baseline.diff(), {"__patch__": []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+import os
+import sys
+import unittest
+from typing import Dict, FrozenSet, List, Optional, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevated_objects import binary
+from elevated_objects.json import serialize, deserialize
+from elevated_objects.schema import schema, field, fields
+
+
+@schema("tests.schema.Address")
+class Address:
+    street: str = ""
+    city: str = ""
+
+
+@schema("tests.schema.Member")
+class Member:
+    name: str = field(identity=True)
+    age: int = 0
+    address: Optional[Address] = None
+    contacts: List[str] = field(default_factory=list)
+    scores: Dict[str, int] = field(default_factory=dict)
+    tags: Set[str] = field(default_factory=set)
+    roles: FrozenSet[str] = frozenset()
+
+
+class SchemaTest(unittest.TestCase):
+    """Classes generated by @schema."""
+
+    def setUp(self):
+        self.member = Member.Builder() \
+            .with_name("ann") \
+            .with_age(30) \
+            .with_address(Address("1 Main St", "Springfield")) \
+            .with_contacts(["bob"]) \
+            .with_scores({"chess": 3}) \
+            .with_tags({"admin", "ops"}) \
+            .with_roles(frozenset({"owner"})) \
+            .done()
+
+    def assertSameMember(self, copy):
+        self.assertIsInstance(copy, Member)
+        self.assertEqual(copy.name, "ann")
+        self.assertEqual(copy.age, 30)
+        self.assertEqual((copy.address.street, copy.address.city), ("1 Main St", "Springfield"))
+        self.assertEqual(copy.contacts, ["bob"])
+        self.assertEqual(copy.scores, {"chess": 3})
+        self.assertEqual(copy.tags, {"admin", "ops"})
+        self.assertIsInstance(copy.tags, set)
+        self.assertEqual(copy.roles, frozenset({"owner"}))
+        self.assertIsInstance(copy.roles, frozenset)
+
+    def test_defaults(self):
+        member = Member("cyd")
+        self.assertEqual((member.age, member.address, member.contacts, member.tags), (0, None, [], set()))
+        self.assertEqual([f.name for f in fields(Member)], ["name", "age", "address", "contacts", "scores", "tags", "roles"])
+
+    def test_json_round_trip(self):
+        text = serialize(self.member)
+        copy = deserialize(text)
+        self.assertSameMember(copy)
+        self.assertEqual(serialize(copy), text)
+
+    def test_binary_round_trip(self):
+        self.assertSameMember(binary.deserialize(binary.serialize(self.member)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevated_objects.json import serialize
+from elevated_objects.streaming import deserialize_from
+from elevated_objects.examples import AddressBuilder, PersonBuilder
+
+
+class _CountingStream(io.StringIO):
+    """StringIO that counts the characters read from it."""
+
+    consumed = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+class DeserializeFromTest(unittest.TestCase):
+    """Records read by deserialize_from()."""
+
+    def setUp(self):
+        address = AddressBuilder().with_street("1 Main St").with_city("Springfield").done()
+        self.people = [
+            PersonBuilder().with_name(f"p{index}").with_age(index).with_address(address).done()
+            for index in range(200)
+        ]
+
+    def test_newline_delimited_records(self):
+        text = ''.join(serialize(person) + '\n' for person in self.people)
+        records = list(deserialize_from(io.StringIO(text), chunk_size=64))
+        self.assertEqual([record.name for record in records], [person.name for person in self.people])
+        self.assertIs(records[0].address, records[-1].address)
+
+    def test_dictionary_mode_records(self):
+        text = ''.join(serialize(person, True) + '\n' for person in self.people[:3])
+        records = list(deserialize_from(io.StringIO(text), chunk_size=64))
+        self.assertEqual([record.name for record in records], ["p0", "p1", "p2"])
+
+    def test_malformed_record_is_reported_when_reached(self):
+        lines = [serialize(person) for person in self.people]
+        lines[2] = lines[2].replace('"age":', '"age"', 1)
+        stream = _CountingStream(''.join(line + '\n' for line in lines))
+        records = deserialize_from(stream, chunk_size=256)
+        self.assertEqual([next(records).name, next(records).name], ["p0", "p1"])
+        with self.assertRaises(json.JSONDecodeError):
+            next(records)
+        self.assertLess(stream.consumed, len(stream.getvalue()) // 10)
+
+    def test_truncated_stream(self):
+        text = serialize(self.people[0]) + '\n' + serialize(self.people[1])[:-5]
+        records = deserialize_from(io.StringIO(text), chunk_size=16)
+        self.assertEqual(next(records).name, "p0")
+        with self.assertRaises(json.JSONDecodeError):
+            next(records)
+
+
+if __name__ == '__main__':
+    unittest.main()